@@ -1,19 +1,40 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-import json
+"""
+Smart Money Tracker - Serverless entry point
+
+Cold starts only pay for the standard library: "/", "/health",
+"/api/wallets" and "/api/leaderboard" are answered by a small ASGI
+handler from a prebuilt snapshot (SNAPSHOT_PATH, default
+api/snapshot.json) that is read on first use. Every other request
+(docs, OpenAPI schema, CORS preflight) builds the FastAPI app on demand.
+STARTUP_MODE=full builds it at import time instead.
+"""
 
-app = FastAPI(title="Smart Money Tracker API")
+import json
+import os
+from datetime import datetime, timezone
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+SNAPSHOT_PATH = os.getenv(
+    "SNAPSHOT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshot.json")
 )
+STARTUP_MODE = os.getenv("STARTUP_MODE", "fast")
+
+_snapshot = None
+_bodies = {}
+_full_app = None
+
 
-@app.get("/")
-async def root():
+def load_snapshot() -> dict:
+    global _snapshot
+    if _snapshot is None:
+        try:
+            with open(SNAPSHOT_PATH) as f:
+                _snapshot = json.load(f)
+        except FileNotFoundError:
+            _snapshot = {"wallets": [], "leaderboard": []}
+    return _snapshot
+
+
+def root_payload():
     return {
         "message": "Smart Money Tracker API",
         "version": "1.0.0",
@@ -26,40 +47,116 @@ async def root():
         }
     }
 
-@app.get("/health")
-async def health():
-    return {"status": "healthy", "timestamp": "2024-02-03T15:00:00Z"}
 
-@app.get("/api/wallets")
-async def get_wallets():
-    return {
-        "wallets": [
-            {
-                "address": "0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb",
-                "label": "Smart Trader #1",
-                "total_pnl": 1250000,
-                "win_rate": 0.78,
-                "total_trades": 145
-            },
-            {
-                "address": "0x28C6c06298d514Db089934071355E5743bf21d60",
-                "label": "Whale Investor",
-                "total_pnl": 890000,
-                "win_rate": 0.72,
-                "total_trades": 89
-            }
-        ]
-    }
+def health_payload():
+    return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()}
 
-@app.get("/api/leaderboard")
-async def get_leaderboard():
-    return {
-        "leaderboard": [
-            {"rank": 1, "address": "0x742d35Cc", "pnl": 1250000, "win_rate": 78},
-            {"rank": 2, "address": "0x28C6c062", "pnl": 890000, "win_rate": 72},
-            {"rank": 3, "address": "0x9876abcd", "pnl": 650000, "win_rate": 68}
-        ]
-    }
+
+def wallets_payload():
+    return {"wallets": load_snapshot().get("wallets", [])}
+
+
+def leaderboard_payload():
+    return {"leaderboard": load_snapshot().get("leaderboard", [])}
+
+
+# path -> (payload, cacheable); cacheable bodies are encoded once per process
+FAST_ROUTES = {
+    "/": (root_payload, True),
+    "/health": (health_payload, False),
+    "/api/wallets": (wallets_payload, True),
+    "/api/leaderboard": (leaderboard_payload, True),
+}
+
+
+def _body(path: str) -> bytes:
+    payload, cacheable = FAST_ROUTES[path]
+    body = _bodies.get(path)
+    if body is None:
+        body = json.dumps(payload(), separators=(",", ":")).encode()
+        if cacheable:
+            _bodies[path] = body
+    return body
+
+
+async def _send_fast(scope, send):
+    body = _body(scope["path"])
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]
+    # Same answer CORSMiddleware(allow_origins=["*"], allow_credentials=True) gives
+    request_headers = dict(scope["headers"])
+    origin = request_headers.get(b"origin")
+    if origin is not None:
+        allow_origin = origin if b"cookie" in request_headers else b"*"
+        headers += [(b"access-control-allow-origin", allow_origin),
+                    (b"access-control-allow-credentials", b"true")]
+        if allow_origin != b"*":
+            headers.append((b"vary", b"Origin"))
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+
+def build_full_app():
+    """The FastAPI app (docs, schema, CORS preflight); imported on demand"""
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+
+    full = FastAPI(title="Smart Money Tracker API")
+
+    full.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    @full.get("/")
+    async def root():
+        return root_payload()
+
+    @full.get("/health")
+    async def health():
+        return health_payload()
+
+    @full.get("/api/wallets")
+    async def get_wallets():
+        return wallets_payload()
+
+    @full.get("/api/leaderboard")
+    async def get_leaderboard():
+        return leaderboard_payload()
+
+    return full
+
+
+def get_full_app():
+    global _full_app
+    if _full_app is None:
+        _full_app = build_full_app()
+    return _full_app
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "http" and scope["method"] in ("GET", "HEAD") and scope["path"] in FAST_ROUTES:
+        await _send_fast(scope, send)
+        return
+    if scope["type"] == "lifespan" and _full_app is None:
+        # Nothing to start up; don't build FastAPI just for this
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    await get_full_app()(scope, receive, send)
+
+
+if STARTUP_MODE == "full":
+    get_full_app()
 
 # Vercel serverless handler
 handler = app
@@ -0,0 +1,200 @@
+"""
+Smart Money Tracker - Alert Rule Engine
+Matches incoming trades against users' alert rules and batches Alert writes
+"""
+
+import itertools
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sortedcontainers import SortedList
+from sqlalchemy import insert
+
+from init_db import Alert
+
+LARGE_TRADE = "large_trade"
+NEW_POSITION = "new_position"
+PROFIT_MILESTONE = "profit_milestone"
+ALERT_TYPES = (LARGE_TRADE, NEW_POSITION, PROFIT_MILESTONE)
+
+
+class _AddressRules:
+    """All rules for one wallet address, grouped by type"""
+    __slots__ = ("large_trade", "new_position", "profit_milestone", "positions", "profit")
+
+    def __init__(self):
+        # (threshold, rule_id), so a trade only visits rules it crosses
+        self.large_trade = SortedList()
+        self.profit_milestone = SortedList()
+        self.new_position: Dict[int, dict] = {}
+        # State kept only for addresses someone is watching
+        self.positions: set = set()
+        self.profit = 0.0
+
+    def __bool__(self) -> bool:
+        return bool(self.large_trade or self.profit_milestone or self.new_position)
+
+
+class AlertEngine:
+    """
+    In-memory alert rules indexed by wallet address, then by type.
+
+    - large_trade: trade value (amount * price) >= threshold
+    - new_position: first buy of a token by the wallet since it was watched
+    - profit_milestone: the wallet's running profit crosses threshold
+
+    A trade looks up its address once and visits only the rules of that
+    address whose threshold it reaches, so cost does not grow with the
+    total number of subscriptions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._rules: Dict[int, dict] = {}
+        self._by_address: Dict[str, _AddressRules] = {}
+        self._by_user: Dict[int, set] = {}
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def add_rule(self, user_id: int, wallet_address: str, alert_type: str,
+                 threshold: float = 0.0, created_at: Optional[datetime] = None) -> dict:
+        if alert_type not in ALERT_TYPES:
+            raise ValueError(f"alert_type must be one of {', '.join(ALERT_TYPES)}")
+        with self._lock:
+            rule = {
+                "id": next(self._ids),
+                "user_id": user_id,
+                "wallet_address": wallet_address,
+                "alert_type": alert_type,
+                "threshold": float(threshold),
+                "created_at": created_at or datetime.now(),
+            }
+            self._rules[rule["id"]] = rule
+            self._by_user.setdefault(user_id, set()).add(rule["id"])
+            rules = self._by_address.setdefault(wallet_address.lower(), _AddressRules())
+            if alert_type == NEW_POSITION:
+                rules.new_position[rule["id"]] = rule
+            else:
+                getattr(rules, alert_type).add((rule["threshold"], rule["id"]))
+        return rule
+
+    def remove_rule(self, rule_id: int) -> Optional[dict]:
+        with self._lock:
+            rule = self._rules.pop(rule_id, None)
+            if rule is None:
+                return None
+            self._by_user[rule["user_id"]].discard(rule_id)
+            address = rule["wallet_address"].lower()
+            rules = self._by_address[address]
+            if rule["alert_type"] == NEW_POSITION:
+                del rules.new_position[rule_id]
+            else:
+                getattr(rules, rule["alert_type"]).remove((rule["threshold"], rule_id))
+            if not rules:
+                del self._by_address[address]
+        return rule
+
+    def get_rule(self, rule_id: int) -> Optional[dict]:
+        return self._rules.get(rule_id)
+
+    def list_rules(self, user_id: int) -> List[dict]:
+        with self._lock:
+            return [self._rules[i] for i in sorted(self._by_user.get(user_id, ()))]
+
+    def evaluate(self, trades: List[dict]) -> List[dict]:
+        """
+        Match a batch of stored trades (ingest rows) and return Alert rows
+        ready to insert, in trade order.
+        """
+        alerts = []
+        with self._lock:
+            for trade in trades:
+                rules = self._by_address.get(trade["wallet_address"].lower())
+                if rules is not None:
+                    self._match(rules, trade, alerts)
+        return alerts
+
+    def _match(self, rules: _AddressRules, trade: dict, alerts: List[dict]):
+        token = trade["token_symbol"] or "?"
+        amount = trade["amount"] or 0.0
+        value = amount * (trade["price"] or 0.0)
+        action = (trade["action"] or "").lower()
+        when = trade["timestamp"]
+        short = trade["wallet_address"][:10]
+
+        def emit(rule_id: int, message: str):
+            rule = self._rules[rule_id]
+            alerts.append({
+                "user_id": rule["user_id"],
+                "wallet_address": trade["wallet_address"],
+                "alert_type": rule["alert_type"],
+                "message": message,
+                "is_read": False,
+                "created_at": when,
+            })
+
+        if rules.large_trade:
+            for _, rule_id in rules.large_trade.irange(maximum=(value, float("inf"))):
+                emit(rule_id, f"Large trade: {short}… {action or 'traded'} {amount:,.4g} {token} (${value:,.0f})")
+
+        if rules.new_position and action == "buy" and token not in rules.positions:
+            rules.positions.add(token)
+            for rule_id in rules.new_position:
+                emit(rule_id, f"New position: {short}… opened {token}")
+
+        profit = trade["profit_loss"] or 0.0
+        if rules.profit_milestone and profit:
+            before, rules.profit = rules.profit, rules.profit + profit
+            if rules.profit > before:
+                crossed = rules.profit_milestone.irange((before, float("inf")), (rules.profit, float("inf")),
+                                                       inclusive=(False, True))
+                for threshold, rule_id in crossed:
+                    emit(rule_id, f"Profit milestone: {short}… passed ${threshold:,.0f} (now ${rules.profit:,.0f})")
+
+
+class AlertWriter:
+    """
+    Buffers Alert rows and inserts them with one executemany per batch.
+    `add` flushes inline once `batch_size` rows are pending; a periodic
+    `flush` bounds how long a straggler waits.
+    """
+
+    def __init__(self, engine, batch_size: int = 500):
+        self.engine = engine
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending: List[dict] = []
+        self.written = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, alerts: List[dict], flush: bool = True):
+        """Buffer rows; `flush=False` never writes inline (the periodic flush does)"""
+        if not alerts:
+            return
+        with self._lock:
+            self._pending.extend(alerts)
+            full = len(self._pending) >= self.batch_size
+        if full and flush:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._write_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if rows:
+                try:
+                    with self.engine.begin() as connection:
+                        connection.execute(insert(Alert), rows)
+                except Exception:
+                    # Keep the batch for the next flush
+                    with self._lock:
+                        self._pending[:0] = rows
+                    raise
+                self.written += len(rows)
+            return len(rows)
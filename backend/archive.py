@@ -0,0 +1,328 @@
+"""
+Smart Money Tracker - Columnar Trade Archive
+Day-partitioned, memory-mapped column files for full-history trade scans
+"""
+
+import json
+import os
+import shutil
+from datetime import date, datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backtest import TradeArrays
+
+SECONDS_PER_DAY = 86400
+COLUMNS = {
+    "timestamp": np.int64,  # unix seconds
+    "wallet": np.int32,  # code into the wallet address dictionary
+    "token": np.int32,  # code into the token symbol dictionary
+    "amount": np.float64,
+    "price": np.float64,
+    "profit_loss": np.float64,
+}
+DICTIONARY_FILE = "dictionary.json"
+# Per-segment wallet index: distinct wallet codes and their row offsets
+WALLET_CODES = "wallet_codes.npy"
+WALLET_OFFSETS = "wallet_offsets.npy"
+
+
+def to_unix_seconds(values) -> np.ndarray:
+    """datetime64 / ISO strings / datetimes / numbers -> int64 unix seconds"""
+    values = np.asarray(values)
+    if values.dtype.kind in "iuf":
+        return values.astype(np.int64)
+    if values.dtype.kind == "O" and values.size and isinstance(values.flat[0], datetime):
+        values = np.array([v.replace(tzinfo=None) for v in values.flat], dtype="datetime64[s]")
+    return values.astype("datetime64[s]").astype(np.int64)
+
+
+def _day_seconds(day: date) -> int:
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+
+
+def _bound(value) -> Optional[int]:
+    """Range bound as unix seconds; naive datetimes are taken as UTC"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return int(value.replace(tzinfo=value.tzinfo or timezone.utc).timestamp())
+    if isinstance(value, date):
+        return _day_seconds(value)
+    return int(value)
+
+
+class _Dictionary:
+    """Append-only string -> int32 code mapping"""
+
+    def __init__(self, values: Sequence[str] = ()):
+        self.values: List[str] = list(values)
+        self.codes: Dict[str, int] = {v: i for i, v in enumerate(self.values)}
+
+    def encode(self, values: np.ndarray) -> np.ndarray:
+        # Encode each distinct value once, then broadcast back
+        unique, inverse = np.unique(values, return_inverse=True)
+        codes = np.empty(unique.size, dtype=np.int32)
+        for i, value in enumerate(unique.tolist()):
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.values)
+                self.values.append(value)
+            codes[i] = code
+        return codes[inverse]
+
+
+class Segment:
+    """
+    One immutable chunk of a day partition. Rows are sorted by
+    (wallet, timestamp) so one wallet's trades are a contiguous slice.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._columns: Dict[str, np.ndarray] = {}
+        self.wallet_codes = np.load(os.path.join(path, WALLET_CODES))
+        self.wallet_offsets = np.load(os.path.join(path, WALLET_OFFSETS))
+
+    def __len__(self) -> int:
+        return int(self.wallet_offsets[-1])
+
+    def column(self, name: str) -> np.ndarray:
+        array = self._columns.get(name)
+        if array is None:
+            array = self._columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return array
+
+    def wallet_slice(self, wallet: int) -> slice:
+        i = int(np.searchsorted(self.wallet_codes, wallet))
+        if i == len(self.wallet_codes) or self.wallet_codes[i] != wallet:
+            return slice(0, 0)
+        return slice(int(self.wallet_offsets[i]), int(self.wallet_offsets[i + 1]))
+
+    @staticmethod
+    def write(path: str, columns: Dict[str, np.ndarray]):
+        order = np.lexsort((columns["timestamp"], columns["wallet"]))
+        tmp = path + ".tmp"
+        os.makedirs(tmp)
+        for name, dtype in COLUMNS.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(columns[name][order], dtype=dtype))
+        wallets = columns["wallet"][order]
+        codes, starts = np.unique(wallets, return_index=True)
+        np.save(os.path.join(tmp, WALLET_CODES), codes.astype(np.int32))
+        np.save(os.path.join(tmp, WALLET_OFFSETS), np.append(starts, wallets.size).astype(np.int64))
+        # Readers never see a half-written segment
+        os.rename(tmp, path)
+
+
+class TradeArchive:
+    """
+    Columnar trade archive under `root`:
+
+        root/dictionary.json            wallet addresses and token symbols
+        root/2024-01-01/000000/*.npy    one typed array per column
+
+    Columns are memory-mapped on first use, so scans touch only the pages
+    of the columns, days and wallets they read. `append` buffers rows and
+    writes one segment per day on `flush`; `compact` merges each day's
+    segments back into one.
+    """
+
+    def __init__(self, root: str, buffer_rows: int = 5_000_000):
+        self.root = root
+        self.buffer_rows = buffer_rows
+        os.makedirs(root, exist_ok=True)
+        path = os.path.join(root, DICTIONARY_FILE)
+        stored = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                stored = json.load(f)
+        self.wallets = _Dictionary(stored.get("wallets", ()))
+        self.tokens = _Dictionary(stored.get("tokens", ()))
+        self._buffer: List[Dict[str, np.ndarray]] = []
+        self._buffered = 0
+        self._segments: Dict[str, List[Segment]] = {}
+
+    # Writing
+
+    def append(self, timestamp, wallet_address, token_symbol, amount, price, profit_loss):
+        """Add a batch of trades given as equal-length column arrays"""
+        self.append_encoded(
+            timestamp,
+            self.wallets.encode(np.char.lower(np.asarray(wallet_address, dtype=str))),
+            self.tokens.encode(np.asarray(token_symbol, dtype=str)),
+            amount, price, profit_loss,
+        )
+
+    def append_encoded(self, timestamp, wallet, token, amount, price, profit_loss):
+        """append() with wallet / token already given as dictionary codes"""
+        timestamp = to_unix_seconds(timestamp)
+        if timestamp.size == 0:
+            return
+        self._buffer.append({
+            "timestamp": timestamp,
+            "wallet": np.asarray(wallet, dtype=np.int32),
+            "token": np.asarray(token, dtype=np.int32),
+            "amount": np.nan_to_num(np.asarray(amount, dtype=np.float64)),
+            "price": np.nan_to_num(np.asarray(price, dtype=np.float64)),
+            "profit_loss": np.nan_to_num(np.asarray(profit_loss, dtype=np.float64)),
+        })
+        self._buffered += timestamp.size
+        if self._buffered >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows as one new segment per day they cover"""
+        if self._buffer:
+            columns = {name: np.concatenate([b[name] for b in self._buffer]) for name in COLUMNS}
+            self._buffer, self._buffered = [], 0
+            days = columns["timestamp"] // SECONDS_PER_DAY
+            order = np.argsort(days, kind="stable")
+            days = days[order]
+            bounds = np.flatnonzero(np.diff(days)) + 1
+            for first, chunk in zip(np.append(0, bounds), np.split(order, bounds)):
+                day = self._day_name(int(days[first]))
+                day_dir = os.path.join(self.root, day)
+                os.makedirs(day_dir, exist_ok=True)
+                Segment.write(os.path.join(day_dir, f"{self._next_segment(day_dir):06d}"),
+                              {name: values[chunk] for name, values in columns.items()})
+                self._segments.pop(day, None)
+        self._write_dictionary()
+
+    def compact(self):
+        """Merge every multi-segment day into a single segment"""
+        self.flush()
+        for day in self.days():
+            segments = self.segments(day)
+            if len(segments) < 2:
+                continue
+            columns = {
+                name: np.concatenate([np.asarray(s.column(name)) for s in segments]) for name in COLUMNS
+            }
+            day_dir = os.path.join(self.root, day)
+            merged = os.path.join(day_dir, f"{self._next_segment(day_dir):06d}")
+            Segment.write(merged, columns)
+            self._segments.pop(day, None)
+            for segment in segments:
+                shutil.rmtree(segment.path)
+
+    def _write_dictionary(self):
+        path = os.path.join(self.root, DICTIONARY_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"wallets": self.wallets.values, "tokens": self.tokens.values}, f)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _day_name(day_number: int) -> str:
+        return date.fromordinal(date(1970, 1, 1).toordinal() + day_number).isoformat()
+
+    @staticmethod
+    def _next_segment(day_dir: str) -> int:
+        existing = [int(name) for name in os.listdir(day_dir) if name.isdigit()]
+        return max(existing, default=-1) + 1
+
+    # Reading
+
+    def days(self, start: Optional[int] = None, end: Optional[int] = None) -> List[str]:
+        """Day partitions overlapping [start, end) unix seconds"""
+        days = sorted(name for name in os.listdir(self.root) if len(name) == 10 and name[4] == "-")
+        if start is not None:
+            first = self._day_name(start // SECONDS_PER_DAY)
+            days = [d for d in days if d >= first]
+        if end is not None:
+            last = self._day_name((end - 1) // SECONDS_PER_DAY)
+            days = [d for d in days if d <= last]
+        return days
+
+    def segments(self, day: str) -> List[Segment]:
+        segments = self._segments.get(day)
+        if segments is None:
+            day_dir = os.path.join(self.root, day)
+            names = sorted(name for name in os.listdir(day_dir) if name.isdigit())
+            segments = self._segments[day] = [Segment(os.path.join(day_dir, name)) for name in names]
+        return segments
+
+    def __len__(self) -> int:
+        return sum(len(s) for day in self.days() for s in self.segments(day))
+
+    def scan(
+        self,
+        columns: Sequence[str] = tuple(COLUMNS),
+        wallet_address: Optional[str] = None,
+        start=None,
+        end=None,
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Yield one dict of column arrays per segment, optionally limited to
+        one wallet and to timestamps in [start, end). Whole-segment reads
+        are zero-copy views of the memory-mapped files.
+        """
+        start, end = _bound(start), _bound(end)
+        wallet = None
+        if wallet_address is not None:
+            wallet = self.wallets.codes.get(wallet_address.lower())
+            if wallet is None:
+                return
+        for day in self.days(start, end):
+            for segment in self.segments(day):
+                rows = segment.wallet_slice(wallet) if wallet is not None else slice(0, len(segment))
+                if rows.stop <= rows.start:
+                    continue
+                chunk = {name: segment.column(name)[rows] for name in columns}
+                if start is not None or end is not None:
+                    ts = chunk["timestamp"] if "timestamp" in chunk else segment.column("timestamp")[rows]
+                    mask = np.ones(ts.size, dtype=bool)
+                    if start is not None:
+                        mask &= ts >= start
+                    if end is not None:
+                        mask &= ts < end
+                    if not mask.all():
+                        chunk = {name: values[mask] for name, values in chunk.items()}
+                if chunk and next(iter(chunk.values())).size:
+                    yield chunk
+
+    def wallet_trades(self, wallet_address: str, start=None, end=None) -> TradeArrays:
+        """One wallet's trades as backtest.TradeArrays, ordered by timestamp"""
+        chunks = list(self.scan(("timestamp", "amount", "price", "profit_loss"), wallet_address, start, end))
+        if not chunks:
+            empty = np.empty(0, dtype=np.float64)
+            return TradeArrays(np.empty(0, dtype=np.int64), empty, empty, empty)
+        columns = {name: np.concatenate([c[name] for c in chunks]) for name in chunks[0]}
+        order = np.argsort(columns["timestamp"], kind="stable")
+        return TradeArrays(*(columns[name][order] for name in ("timestamp", "amount", "price", "profit_loss")))
+
+    def profit_by_wallet(self, start=None, end=None) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """(addresses, total profit_loss, trade count) per wallet over a full scan"""
+        n = len(self.wallets.values)
+        profit = np.zeros(n)
+        counts = np.zeros(n, dtype=np.int64)
+        for chunk in self.scan(("wallet", "profit_loss", "timestamp"), start=start, end=end):
+            profit += np.bincount(chunk["wallet"], weights=chunk["profit_loss"], minlength=n)
+            counts += np.bincount(chunk["wallet"], minlength=n)
+        return self.wallets.values, profit, counts
+
+
+def export_trades(engine, archive: TradeArchive, batch_size: int = 100_000) -> int:
+    """Copy the Trade table into `archive` in batches, bypassing the ORM"""
+    from sqlalchemy import select
+
+    from init_db import Trade
+
+    query = select(Trade.timestamp, Trade.wallet_address, Trade.token_symbol,
+                   Trade.amount, Trade.price, Trade.profit_loss)
+    exported = 0
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+        for rows in result.partitions(batch_size):
+            timestamp, wallet_address, token_symbol, amount, price, profit_loss = zip(*rows)
+            archive.append(
+                np.array(timestamp, dtype="datetime64[s]"),
+                [a or "" for a in wallet_address],
+                [s or "" for s in token_symbol],
+                np.array(amount, dtype=np.float64),
+                np.array(price, dtype=np.float64),
+                np.array(profit_loss, dtype=np.float64),
+            )
+            exported += len(rows)
+    archive.flush()
+    return exported
@@ -0,0 +1,269 @@
+"""
+Smart Money Tracker - Authentication
+API-key verification against the users table behind a short-TTL cache,
+and per-tier token-bucket rate limiting sharded across locks
+"""
+
+import hashlib
+import hmac
+import math
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs
+
+from sqlalchemy import select
+from starlette.responses import JSONResponse
+from starlette.websockets import WebSocketClose
+
+from init_db import User
+
+# Tier -> (requests per second, burst); "anonymous" is per client address
+TIER_LIMITS: Dict[str, Tuple[float, int]] = {
+    "anonymous": (2.0, 30),
+    "free": (5.0, 60),
+    "pro": (25.0, 250),
+    "enterprise": (100.0, 1000),
+}
+DEFAULT_TIER = "free"
+
+PASSWORD_ITERATIONS = 600_000
+
+
+class Principal(NamedTuple):
+    user_id: int
+    tier: str
+
+
+def generate_api_key() -> str:
+    """64 hex characters, the width of users.api_key"""
+    return secrets.token_hex(32)
+
+
+def hash_password(password: str) -> str:
+    salt = secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), PASSWORD_ITERATIONS)
+    return f"pbkdf2_sha256${PASSWORD_ITERATIONS}${salt}${digest.hex()}"
+
+
+def verify_password(password: str, stored: Optional[str]) -> bool:
+    if not stored:
+        return False
+    try:
+        algorithm, iterations, salt, expected = stored.split("$")
+        iterations = int(iterations)
+    except ValueError:
+        return False
+    if algorithm != "pbkdf2_sha256" or iterations < 1:
+        return False
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), iterations)
+    return hmac.compare_digest(digest.hex(), expected)
+
+
+_MISS = object()
+
+
+class ApiKeyCache:
+    """
+    LRU of api key -> Principal. Unknown keys are cached too (as None),
+    for a shorter time, so a scraper cycling bad keys doesn't reach the
+    database on every request either.
+    """
+
+    def __init__(self, ttl: float = 60.0, negative_ttl: float = 5.0, max_keys: int = 100_000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Optional[Principal]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, api_key: str):
+        """The cached Principal (or None for a known-bad key), else _MISS"""
+        with self._lock:
+            entry = self._entries.get(api_key)
+            if entry is None:
+                return _MISS
+            if entry[0] <= time.monotonic():
+                del self._entries[api_key]
+                return _MISS
+            self._entries.move_to_end(api_key)
+            return entry[1]
+
+    def put(self, api_key: str, principal: Optional[Principal]):
+        ttl = self.ttl if principal is not None else self.negative_ttl
+        with self._lock:
+            self._entries[api_key] = (time.monotonic() + ttl, principal)
+            self._entries.move_to_end(api_key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, api_key: str):
+        with self._lock:
+            self._entries.pop(api_key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ApiKeyAuth:
+    """Resolves api keys to principals: cache first, then the users table"""
+
+    def __init__(self, async_engine, cache: ApiKeyCache):
+        self.engine = async_engine
+        self.cache = cache
+        self.lookups = 0
+
+    async def principal(self, api_key: str) -> Optional[Principal]:
+        principal = self.cache.get(api_key)
+        if principal is not _MISS:
+            return principal
+        self.lookups += 1
+        # users.api_key is unique, so this is an index lookup
+        query = select(User.id, User.subscription_tier, User.is_active).where(User.api_key == api_key)
+        async with self.engine.connect() as conn:
+            row = (await conn.execute(query)).first()
+        if row is None or row.is_active is False:
+            principal = None
+        else:
+            tier = row.subscription_tier if row.subscription_tier in TIER_LIMITS else DEFAULT_TIER
+            principal = Principal(row.id, tier)
+        self.cache.put(api_key, principal)
+        return principal
+
+
+class _BucketShard:
+    __slots__ = ("lock", "buckets")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> [tokens, last refill (monotonic)]
+        self.buckets: Dict[Hashable, list] = {}
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by (tier, client), spread over `shards` locks so
+    concurrent requests from different clients rarely contend. A shard
+    that grows past `max_per_shard` drops buckets that have refilled,
+    which are indistinguishable from new ones.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[float, int]] = TIER_LIMITS, shards: int = 64,
+                 max_per_shard: int = 10_000):
+        self.limits = limits
+        self.max_per_shard = max_per_shard
+        self._shards = [_BucketShard() for _ in range(shards)]
+
+    def acquire(self, tier: str, client: Hashable, cost: float = 1.0) -> float:
+        """Take `cost` tokens; returns 0.0 if allowed, else seconds to wait"""
+        rate, burst = self.limits[tier]
+        key = (tier, client)
+        shard = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with shard.lock:
+            bucket = shard.buckets.get(key)
+            if bucket is None:
+                if len(shard.buckets) >= self.max_per_shard:
+                    self._prune(shard, now)
+                bucket = shard.buckets[key] = [float(burst), now]
+            else:
+                bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return 0.0
+            return (cost - bucket[0]) / rate
+
+    def _prune(self, shard: _BucketShard, now: float):
+        full = [
+            key for key, (tokens, last) in shard.buckets.items()
+            if tokens + (now - last) * self.limits[key[0]][0] >= self.limits[key[0]][1]
+        ]
+        for key in full:
+            del shard.buckets[key]
+
+    def __len__(self) -> int:
+        return sum(len(shard.buckets) for shard in self._shards)
+
+
+def request_api_key(headers) -> Optional[str]:
+    """`Authorization: Bearer <key>` or `X-API-Key: <key>` from raw ASGI headers"""
+    for name, value in headers:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token.strip():
+                return token.strip()
+        elif name == b"x-api-key" and value:
+            return value.decode("latin-1").strip()
+    return None
+
+
+def websocket_api_key(scope) -> Optional[str]:
+    """
+    Header key of a websocket handshake, else its `api_key` query
+    parameter (browsers cannot set headers on WebSocket connections)
+    """
+    api_key = request_api_key(scope["headers"])
+    if api_key is None:
+        values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("api_key")
+        api_key = values[0].strip() if values and values[0].strip() else None
+    return api_key
+
+
+class AuthMiddleware:
+    """
+    Pure ASGI middleware for every http and websocket path under
+    `prefixes`: a presented api key must be valid (401, or close code
+    1008 for websockets, otherwise) and its tier's bucket is charged;
+    requests without a key are charged to the client address's
+    "anonymous" bucket. The principal (or None) is left in
+    request.state.principal. Over the limit answers 429 + Retry-After.
+    """
+
+    def __init__(self, app, auth: ApiKeyAuth, limiter: Optional[RateLimiter],
+                 prefixes: Tuple[str, ...] = ("/api/", "/ws/")):
+        self.app = app
+        self.auth = auth
+        self.limiter = limiter
+        self.prefixes = prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or not scope["path"].startswith(self.prefixes):
+            return await self.app(scope, receive, send)
+        websocket = scope["type"] == "websocket"
+
+        api_key = websocket_api_key(scope) if websocket else request_api_key(scope["headers"])
+        principal = None
+        if api_key is not None:
+            principal = await self.auth.principal(api_key)
+            if principal is None:
+                if websocket:
+                    return await WebSocketClose(code=1008, reason="Invalid API key")(scope, receive, send)
+                response = JSONResponse({"detail": "Invalid API key"}, status_code=401,
+                                        headers={"WWW-Authenticate": "Bearer"})
+                return await response(scope, receive, send)
+        scope.setdefault("state", {})["principal"] = principal
+
+        if self.limiter is not None:
+            if principal is not None:
+                tier, client = principal.tier, principal.user_id
+            else:
+                tier, client = "anonymous", (scope.get("client") or ("unknown",))[0]
+            retry_after = self.limiter.acquire(tier, client)
+            if retry_after and websocket:
+                return await WebSocketClose(code=1013, reason="Rate limit exceeded")(scope, receive, send)
+            if retry_after:
+                response = JSONResponse(
+                    {"detail": "Rate limit exceeded"}, status_code=429,
+                    headers={"Retry-After": str(math.ceil(retry_after)),
+                             "X-RateLimit-Limit": str(self.limiter.limits[tier][1])},
+                )
+                return await response(scope, receive, send)
+
+        await self.app(scope, receive, send)
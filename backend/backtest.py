@@ -0,0 +1,141 @@
+"""
+Smart Money Tracker - Backtest Engine
+Vectorized wallet performance metrics computed from Trade rows
+"""
+
+import asyncio
+from datetime import datetime
+from typing import NamedTuple, Optional
+import numpy as np
+from sqlalchemy import select
+
+from init_db import Trade
+
+EPOCH = datetime(1970, 1, 1)
+SECONDS_PER_DAY = 86400
+DAYS_PER_YEAR = 365.0
+# Above this many trades the async path computes metrics off the event loop
+INLINE_COMPUTE_ROWS = 10_000
+
+
+class TradeArrays(NamedTuple):
+    """Column arrays for one wallet's trades, ordered by timestamp"""
+    timestamps: np.ndarray  # int64 unix seconds
+    amount: np.ndarray
+    price: np.ndarray
+    profit_loss: np.ndarray
+
+
+def trades_query(wallet_address: str):
+    return (
+        select(Trade.timestamp, Trade.amount, Trade.price, Trade.profit_loss)
+        .where(Trade.wallet_address == wallet_address)
+        .order_by(Trade.timestamp)
+    )
+
+
+def load_trades(session, wallet_address: str) -> TradeArrays:
+    """Load a wallet's trades as column arrays (no ORM objects)"""
+    rows = session.connection().execute(trades_query(wallet_address)).all()
+    return trades_from_rows(rows)
+
+
+def trades_from_rows(rows) -> TradeArrays:
+    """Convert (timestamp, amount, price, profit_loss) rows to arrays"""
+    if not rows:
+        empty = np.empty(0, dtype=np.float64)
+        return TradeArrays(np.empty(0, dtype=np.int64), empty, empty, empty)
+
+    timestamps, amount, price, profit_loss = zip(*rows)
+    # None becomes NaT; such trades can't be placed in time and are dropped
+    timestamps = np.array(timestamps, dtype="datetime64[us]")
+    known = ~np.isnat(timestamps)
+    return TradeArrays(
+        timestamps=timestamps[known].astype("datetime64[s]").astype(np.int64),
+        amount=np.array(amount, dtype=np.float64)[known],
+        price=np.array(price, dtype=np.float64)[known],
+        profit_loss=np.array(profit_loss, dtype=np.float64)[known],
+    )
+
+
+def compute_metrics(trades: TradeArrays, capital: Optional[float] = None) -> dict:
+    """
+    Compute backtest metrics for one wallet.
+
+    Unless `capital` is given, the wallet is modelled as starting with
+    enough capital to fund its largest position; every trade's
+    profit_loss is added to that equity.
+    Sharpe is computed from daily returns (idle days count as zero return).
+    """
+    pnl = np.nan_to_num(trades.profit_loss)
+    total_trades = int(pnl.size)
+    if total_trades == 0:
+        return {
+            "annual_return_pct": 0.0,
+            "sharpe_ratio": 0.0,
+            "max_drawdown_pct": 0.0,
+            "win_rate": 0.0,
+            "total_trades": 0,
+        }
+
+    if capital is None:
+        notional = np.abs(np.nan_to_num(trades.amount * trades.price))
+        capital = float(notional.max())
+        if capital <= 0:
+            capital = float(np.abs(pnl).sum()) or 1.0
+
+    equity = capital + np.cumsum(pnl)
+
+    # Max drawdown against the running peak (starting capital included)
+    peak = np.maximum(np.maximum.accumulate(equity), capital)
+    drawdown = np.clip(equity / peak - 1.0, -1.0, None)
+    max_drawdown_pct = float(drawdown.min()) * 100
+
+    # Daily returns over the full span
+    timestamps = trades.timestamps
+    day = (timestamps - timestamps[0]) // SECONDS_PER_DAY
+    daily_pnl = np.bincount(day, weights=pnl)
+    day_end_equity = capital + np.cumsum(daily_pnl)
+    day_start_equity = np.concatenate(([capital], day_end_equity[:-1]))
+    daily_returns = np.divide(
+        daily_pnl, day_start_equity,
+        out=np.zeros_like(daily_pnl), where=day_start_equity > 0,
+    )
+    sharpe_ratio = 0.0
+    if daily_returns.size > 1:
+        std = daily_returns.std(ddof=1)
+        if std > 0:
+            sharpe_ratio = float(daily_returns.mean() / std * np.sqrt(DAYS_PER_YEAR))
+
+    span_days = max((timestamps[-1] - timestamps[0]) / SECONDS_PER_DAY, 1.0)
+    total_return = (equity[-1] - capital) / capital
+    annual_return_pct = float(total_return * DAYS_PER_YEAR / span_days) * 100
+
+    # Over closed trades only: buys and break-even rows realize nothing
+    closed = np.count_nonzero(pnl)
+    win_rate = float(np.count_nonzero(pnl > 0)) / closed * 100 if closed else 0.0
+
+    return {
+        "annual_return_pct": round(annual_return_pct, 2),
+        "sharpe_ratio": round(sharpe_ratio, 2),
+        "max_drawdown_pct": round(max_drawdown_pct, 2),
+        "win_rate": round(win_rate, 2),
+        "total_trades": total_trades,
+    }
+
+
+def run_wallet_backtest(session, wallet_id: int, wallet_address: str, grade: str) -> dict:
+    """Load a wallet's trades and return a BacktestResult-shaped dict"""
+    metrics = compute_metrics(load_trades(session, wallet_address))
+    return {"wallet_id": wallet_id, **metrics, "grade": grade}
+
+
+async def run_wallet_backtest_async(session, wallet_id: int, wallet_address: str, grade: str) -> dict:
+    """run_wallet_backtest on an AsyncSession"""
+    connection = await session.connection()
+    rows = (await connection.execute(trades_query(wallet_address))).all()
+    if len(rows) > INLINE_COMPUTE_ROWS:
+        metrics = await asyncio.to_thread(lambda: compute_metrics(trades_from_rows(rows)))
+    else:
+        metrics = compute_metrics(trades_from_rows(rows))
+    return {"wallet_id": wallet_id, **metrics, "grade": grade}
@@ -0,0 +1,79 @@
+"""
+Alert rule engine benchmark
+Matches batches of trades against a large rule set and reports
+throughput and per-batch latency percentiles (no database writes)
+
+Usage (from backend/):
+    python benchmarks/bench_alerts.py --rules 500000 --addresses 100000 --trades 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alerts import ALERT_TYPES, AlertEngine  # noqa: E402
+
+
+def build_engine(n_rules: int, n_addresses: int, seed: int) -> AlertEngine:
+    rng = np.random.default_rng(seed)
+    engine = AlertEngine()
+    addresses = rng.integers(0, n_addresses, n_rules)
+    types = rng.integers(0, len(ALERT_TYPES), n_rules)
+    thresholds = rng.lognormal(9.0, 1.5, n_rules)
+    for i in range(n_rules):
+        engine.add_rule(1 + i % 10_000, f"0x{int(addresses[i]):040x}", ALERT_TYPES[types[i]], float(thresholds[i]))
+    return engine
+
+
+def make_trades(n_trades: int, n_addresses: int, seed: int):
+    rng = np.random.default_rng(seed + 1)
+    now = datetime.now()
+    # Twice the watched address space: about half the trades match nothing
+    addresses = rng.integers(0, n_addresses * 2, n_trades)
+    return [{
+        "wallet_address": f"0x{int(addresses[i]):040x}",
+        "token_symbol": f"TKN{int(rng.integers(0, 200))}",
+        "action": "buy" if rng.random() < 0.5 else "sell",
+        "amount": float(rng.lognormal(0.0, 1.5)),
+        "price": float(rng.lognormal(7.0, 1.0)),
+        "profit_loss": float(rng.normal(100.0, 2000.0)),
+        "timestamp": now,
+    } for i in range(n_trades)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=200_000)
+    parser.add_argument("--addresses", type=int, default=50_000)
+    parser.add_argument("--trades", type=int, default=50_000)
+    parser.add_argument("--batch", type=int, default=500, help="trades per evaluate() call")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    engine = build_engine(args.rules, args.addresses, args.seed)
+    print(f"built {len(engine):,} rules in {time.perf_counter() - t0:.2f} s")
+    trades = make_trades(args.trades, args.addresses, args.seed)
+
+    timings, alerts = [], 0
+    started = time.perf_counter()
+    for i in range(0, len(trades), args.batch):
+        t0 = time.perf_counter()
+        alerts += len(engine.evaluate(trades[i:i + args.batch]))
+        timings.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99]) * 1000
+    print(f"{args.trades:,} trades -> {alerts:,} alerts in {elapsed:.2f} s "
+          f"({args.trades / elapsed:,.0f} trades/s)")
+    print(f"batch of {args.batch}: p50 {p50:.2f} ms  p95 {p95:.2f} ms  p99 {p99:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+API benchmark / load test
+Drives the FastAPI apps in-process over ASGI (no network) at several
+dataset sizes, sequentially and with concurrent clients, and reports
+throughput and p50/p95/p99 latency.
+
+Usage (from backend/, requires httpx):
+    python benchmarks/bench_api.py --sizes 100 10000 --output bench.json
+    python benchmarks/bench_api.py --baseline bench.json --threshold 0.2
+
+With --baseline the run exits non-zero when any scenario's p95 latency
+or throughput regresses by more than the threshold.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Benchmark against a throwaway SQLite database unless told otherwise
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+# Every simulated client shares one address; measure the handlers, not 429s
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+import httpx  # noqa: E402
+from sqlalchemy import delete, insert  # noqa: E402
+
+import main  # noqa: E402
+from auth import generate_api_key  # noqa: E402
+from cache import RowCache  # noqa: E402
+from dashboard import DashboardAggregates  # noqa: E402
+from init_db import Base, Trade, User  # noqa: E402
+from leaderboard import LeaderboardIndex  # noqa: E402
+from transaction_store import TransactionStore  # noqa: E402
+from wallet_store import WalletStore  # noqa: E402
+
+BACKTEST_WALLETS = 5
+BACKTEST_TRADES = 2_000
+# Wallet i belongs to user owner(i); every request carries its owner's api key
+USERS = 100
+
+
+def owner(wallet_id: int) -> int:
+    return 1 + wallet_id % USERS
+
+
+def load_serverless_app():
+    """api/index.py is not a package; load it by path"""
+    path = os.path.join(os.path.dirname(BACKEND_DIR), "api", "index.py")
+    spec = importlib.util.spec_from_file_location("serverless_index", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def populate(n_wallets: int, txs_per_wallet: int = 5, seed: int = 0) -> dict:
+    """
+    Replace the in-memory stores of backend/main.py with a dataset of
+    n_wallets; returns the api key of each user id
+    """
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    wallets = []
+    for i in range(1, n_wallets + 1):
+        wallets.append({
+            "id": i,
+            "user_id": owner(i),
+            "address": f"0x{i:040x}",
+            "name": f"Wallet {i}",
+            "balance_cents": int(rng.integers(1_000, 5_000_000)) * 100,
+            "pnl_24h": float(rng.normal(0, 5)),
+            "pnl_7d": float(rng.normal(0, 15)),
+            "pnl_30d": float(rng.normal(0, 40)),
+            "grade": "C",
+            "last_activity": "1 hour ago",
+            "tags": ["DeFi"] if i % 2 else ["Swing Trading"],
+            "created_at": now,
+        })
+    main.wallet_store = WalletStore(wallets)
+    main.dashboard = DashboardAggregates()
+    for wallet in wallets:
+        main.dashboard.add_wallet(wallet)
+
+    transactions = []
+    for wallet in wallets:
+        for j in range(txs_per_wallet):
+            transactions.append({
+                "id": len(transactions) + 1,
+                "wallet_id": wallet["id"],
+                "wallet_name": wallet["name"],
+                "tx_type": "BUY" if j % 2 else "SELL",
+                "token": "ETH",
+                "quantity": 1.5,
+                "value_cents": 450_000,
+                "timestamp": now - timedelta(minutes=int(rng.integers(0, 60 * 24 * 30))),
+            })
+    main.transaction_store = TransactionStore(transactions)
+    main.transaction_rows = RowCache(main.present_transaction)
+
+    main.leaderboard = LeaderboardIndex()
+    for wallet in wallets:
+        main.leaderboard.upsert(main.leaderboard_entry(wallet, {
+            "annual_return_pct": float(rng.normal(50, 80)),
+            "sharpe_ratio": float(rng.normal(1, 1)),
+            "max_drawdown_pct": float(-rng.uniform(0, 60)),
+            "win_rate": float(rng.uniform(30, 80)),
+            "total_trades": int(rng.integers(1, 2000)),
+        }))
+
+    main.response_cache.clear()
+
+    # A few wallets get real Trade rows so the backtest route does work
+    Base.metadata.create_all(bind=main.engine)
+    api_keys = {user_id: generate_api_key() for user_id in range(1, USERS + 1)}
+    main.api_key_auth.cache.clear()
+    with main.engine.begin() as conn:
+        conn.execute(delete(User))
+        conn.execute(insert(User), [
+            {"id": user_id, "email": f"bench{user_id}@example.com", "username": f"bench{user_id}",
+             "subscription_tier": "enterprise", "api_key": api_key}
+            for user_id, api_key in api_keys.items()
+        ])
+        conn.execute(delete(Trade))
+        rows = []
+        for w in range(1, min(BACKTEST_WALLETS, n_wallets) + 1):
+            for k in range(BACKTEST_TRADES):
+                rows.append({
+                    "wallet_address": f"0x{w:040x}",
+                    "amount": float(rng.uniform(0.1, 10)),
+                    "price": float(rng.uniform(100, 3000)),
+                    "profit_loss": float(rng.normal(20, 300)),
+                    "tx_hash": f"0x{w:08x}{k:056x}",
+                    "timestamp": now - timedelta(hours=k),
+                })
+        conn.execute(insert(Trade), rows)
+    return api_keys
+
+
+def scenarios(n_wallets: int):
+    """
+    (name, app, method, path factory, user factory) for every benchmarked
+    route; the user factory picks whose api key request i sends (None: no key)
+    """
+    backtest_ids = min(BACKTEST_WALLETS, n_wallets)
+    user = lambda i: 1 + i % USERS  # noqa: E731
+    wallet_owner = lambda i: owner(1 + i % n_wallets)  # noqa: E731
+    return [
+        ("wallets.list", "main", "GET", lambda i: "/api/wallets", user),
+        ("wallets.get", "main", "GET", lambda i: f"/api/wallets/{1 + i % n_wallets}", wallet_owner),
+        ("transactions.list", "main", "GET", lambda i: "/api/transactions?limit=20", user),
+        ("transactions.page500", "main", "GET", lambda i: "/api/transactions?limit=500", user),
+        ("transactions.wallet", "main", "GET", lambda i: f"/api/transactions/{1 + i % n_wallets}", wallet_owner),
+        ("leaderboard.top", "main", "GET", lambda i: "/api/leaderboard?sort_by=sharpe_ratio&limit=50", user),
+        ("leaderboard.rank", "main", "GET", lambda i: f"/api/leaderboard/rank/0x{1 + i % n_wallets:040x}", user),
+        ("backtest.get", "main", "GET", lambda i: f"/api/backtest/{1 + i % backtest_ids}",
+         lambda i: owner(1 + i % backtest_ids)),
+        ("dashboard", "main", "GET", lambda i: "/api/stats/dashboard", user),
+        ("serverless.health", "serverless", "GET", lambda i: "/health", None),
+        ("serverless.leaderboard", "serverless", "GET", lambda i: "/api/leaderboard", None),
+    ]
+
+
+async def run_scenario(client: httpx.AsyncClient, method: str, path_for, headers_for,
+                       requests: int, concurrency: int):
+    latencies = np.empty(requests)
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            t0 = time.perf_counter()
+            response = await client.request(method, path_for(i), headers=headers_for(i))
+            latencies[i] = time.perf_counter() - t0
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+    }
+
+
+async def run(args) -> dict:
+    apps = {"main": main.app, "serverless": load_serverless_app()}
+    clients = {
+        name: httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        for name, app in apps.items()
+    }
+    results = {}
+    try:
+        for n_wallets in args.sizes:
+            api_keys = populate(n_wallets)
+            for name, app_name, method, path_for, user_for in scenarios(n_wallets):
+                if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                    continue
+                client = clients[app_name]
+
+                def headers_for(i, user_for=user_for):
+                    return {"X-API-Key": api_keys[user_for(i)]} if user_for else None
+
+                for _ in range(args.warmup):
+                    await client.request(method, path_for(0), headers=headers_for(0))
+                for concurrency in args.concurrency:
+                    key = f"{name}|wallets={n_wallets}|c={concurrency}"
+                    results[key] = await run_scenario(client, method, path_for, headers_for,
+                                                      args.requests, concurrency)
+                    r = results[key]
+                    print(f"{key:<55} {r['throughput_rps']:>9.1f} rps  "
+                          f"p50 {r['p50_ms']:>7.2f}  p95 {r['p95_ms']:>7.2f}  p99 {r['p99_ms']:>7.2f} ms"
+                          + (f"  errors {r['errors']}" if r["errors"] else ""))
+    finally:
+        for client in clients.values():
+            await client.aclose()
+        # The app's shutdown hook never runs here; close the pooled
+        # aiosqlite connections or their threads keep the process alive
+        await main.async_engine.dispose()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """Return a list of human-readable regressions against a baseline run"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get("results", {}).get(key)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(f"{key}: p95 {previous['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{key}: throughput {previous['throughput_rps']:.1f} -> {current['throughput_rps']:.1f} rps"
+            )
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000],
+                        help="dataset sizes (number of wallets)")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16],
+                        help="concurrent in-process clients")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--only", nargs="*", help="scenario name prefixes to run")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nresults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nno regressions against baseline")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,90 @@
+"""
+Columnar trade archive benchmark
+Writes a synthetic archive, then times a full-history scan (profit per
+wallet), a single-wallet scan and a one-month range scan
+
+Usage (from backend/):
+    python benchmarks/bench_archive.py --trades 50000000 --wallets 100000
+    python benchmarks/bench_archive.py --root /data/archive --skip-write
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive import SECONDS_PER_DAY, TradeArchive  # noqa: E402
+
+END = 1_704_067_200  # 2024-01-01 UTC
+
+
+def write_archive(archive: TradeArchive, n_wallets: int, n_trades: int, days: int, seed: int, batch: int):
+    rng = np.random.default_rng(seed)
+    wallet_codes = archive.wallets.encode(np.array([f"0x{i:040x}" for i in range(n_wallets)]))
+    token_codes = archive.tokens.encode(np.array([f"TKN{i}" for i in range(500)]))
+    # Heavy-tailed activity: a few wallets make most of the trades
+    cdf = np.cumsum(rng.pareto(1.1, n_wallets) + 1.0)
+    cdf /= cdf[-1]
+    for start in range(0, n_trades, batch):
+        size = min(batch, n_trades - start)
+        archive.append_encoded(
+            END - days * SECONDS_PER_DAY + rng.integers(0, days * SECONDS_PER_DAY, size),
+            wallet_codes[np.searchsorted(cdf, rng.random(size))],
+            token_codes[rng.integers(0, token_codes.size, size)],
+            rng.lognormal(0.0, 1.5, size),
+            rng.lognormal(2.0, 3.0, size),
+            rng.normal(0.0, 100.0, size),
+        )
+    archive.compact()
+
+
+def timed(label: str, fn):
+    t0 = time.perf_counter()
+    result = fn()
+    print(f"{label:<28} {time.perf_counter() - t0:>8.3f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=50_000_000)
+    parser.add_argument("--wallets", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch", type=int, default=1_000_000)
+    parser.add_argument("--root", help="archive directory (default: a temporary one)")
+    parser.add_argument("--skip-write", action="store_true", help="reuse an existing archive at --root")
+    args = parser.parse_args()
+
+    root = args.root or tempfile.mkdtemp(prefix="trade-archive-")
+    try:
+        if not args.skip_write:
+            timed(f"write {args.trades:,} trades",
+                  lambda: write_archive(TradeArchive(root), args.wallets, args.trades,
+                                        args.days, args.seed, args.batch))
+
+        # Fresh instance: nothing mapped or cached yet
+        archive = TradeArchive(root)
+        print(f"archive holds {len(archive):,} trades over {len(archive.days())} days")
+        addresses, profit, counts = timed("full scan (profit/wallet)", archive.profit_by_wallet)
+        busiest = addresses[int(np.argmax(counts))]
+        trades = timed("busiest wallet scan", lambda: archive.wallet_trades(busiest))
+        print(f"  {busiest}: {trades.timestamps.size:,} trades")
+        last = archive.days()[-1]
+        end = int(np.datetime64(last, "s").astype(np.int64)) + SECONDS_PER_DAY
+        timed("30-day range scan", lambda: sum(
+            float(chunk["profit_loss"].sum())
+            for chunk in archive.scan(("profit_loss",), start=end - 30 * SECONDS_PER_DAY, end=end)))
+    finally:
+        if not args.root:
+            shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Backtest engine benchmark
+Times compute_metrics (and optionally the SQLite load path) across trade counts
+
+Usage (from backend/):
+    python benchmarks/bench_backtest.py
+    python benchmarks/bench_backtest.py --sizes 1000 10000 100000 --db
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import TradeArrays, compute_metrics, load_trades  # noqa: E402
+
+WALLET = "0xbench000000000000000000000000000000000001"
+
+
+def synthetic_trades(n: int, seed: int = 0) -> TradeArrays:
+    rng = np.random.default_rng(seed)
+    start = 1_700_000_000
+    timestamps = np.sort(rng.integers(start, start + 365 * 86400, n))
+    amount = rng.uniform(0.1, 100, n)
+    price = rng.uniform(100, 50000, n)
+    profit_loss = rng.normal(50, 1000, n)
+    return TradeArrays(timestamps, amount, price, profit_loss)
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+def bench_compute(sizes, repeat):
+    results = []
+    for n in sizes:
+        trades = synthetic_trades(n)
+        results.append((n, best_of(lambda: compute_metrics(trades), repeat)))
+    return results
+
+
+def bench_db(sizes, repeat):
+    from datetime import datetime
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import sessionmaker
+    from init_db import Base, Trade
+
+    results = []
+    for n in sizes:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        trades = synthetic_trades(n)
+        rows = [
+            {
+                "wallet_address": WALLET,
+                "amount": float(trades.amount[i]),
+                "price": float(trades.price[i]),
+                "profit_loss": float(trades.profit_loss[i]),
+                "tx_hash": f"0x{i:064x}",
+                "timestamp": datetime.utcfromtimestamp(int(trades.timestamps[i])),
+            }
+            for i in range(n)
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(Trade), rows)
+        session = sessionmaker(bind=engine)()
+        elapsed = best_of(lambda: compute_metrics(load_trades(session, WALLET)), repeat)
+        session.close()
+        results.append((n, elapsed))
+    return results
+
+
+def report(title, results):
+    print(f"\n{title}")
+    print(f"{'trades':>12} {'seconds':>12} {'us/trade':>10}")
+    for n, elapsed in results:
+        print(f"{n:>12,} {elapsed:>12.5f} {elapsed / n * 1e6:>10.3f}")
+    if len(results) > 1:
+        sizes = np.log([n for n, _ in results])
+        times = np.log([t for _, t in results])
+        slope = np.polyfit(sizes, times, 1)[0]
+        print(f"growth exponent (log-log slope): {slope:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", action="store_true",
+                        help="also time loading from an in-memory SQLite Trade table")
+    args = parser.parse_args()
+
+    report("compute_metrics", bench_compute(args.sizes, args.repeat))
+    if args.db:
+        db_sizes = [n for n in args.sizes if n <= 200_000]
+        report("load_trades + compute_metrics (SQLite)", bench_db(db_sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+OHLCV candle benchmark
+Loads synthetic history into a throwaway database, then times a full
+candle rebuild, incremental updates at ingestion batch sizes, and a
+chart-sized range query served from candles vs. aggregated from raw
+trades
+
+Usage (from backend/):
+    python benchmarks/bench_candles.py --trades 5000000 --days 90
+    python benchmarks/bench_candles.py --resolution 1m --queries 500
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from sqlalchemy import Integer, cast, func, select  # noqa: E402
+
+import init_db  # noqa: E402
+from candles import RESOLUTION_SECONDS, CandleStore, query_candles, rebuild_candles  # noqa: E402
+from database import engine  # noqa: E402
+from datagen import TOKEN_SYMBOLS, load_dataset  # noqa: E402
+from init_db import Trade  # noqa: E402
+
+
+def raw_range(token: str, seconds: int, start, end):
+    """The query candles replace: bucket the token's trades on every request (SQLite)"""
+    bucket = cast(func.strftime("%s", Trade.timestamp), Integer) // seconds * seconds
+    query = (
+        select(bucket.label("bucket"), func.max(Trade.price), func.min(Trade.price),
+               func.sum(Trade.amount), func.count())
+        .where(Trade.token_symbol == token, Trade.timestamp >= start, Trade.timestamp < end)
+        .group_by("bucket").order_by("bucket")
+    )
+    with engine.connect() as connection:
+        return connection.execute(query).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--wallets", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--resolution", default="1h", choices=list(RESOLUTION_SECONDS))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=1000, help="trades per incremental add")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    init_db.Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    load_dataset(engine, args.wallets, args.trades, seed=args.seed, days=args.days)
+    print(f"load {args.trades:,} trades over {args.days} days   {time.perf_counter() - started:8.1f} s")
+
+    started = time.perf_counter()
+    counts = rebuild_candles(engine)
+    print(f"rebuild candles                        {time.perf_counter() - started:8.1f} s  ({counts})")
+
+    with engine.connect() as connection:
+        rows = connection.execute(
+            # In time order, as live ingestion delivers them
+            select(Trade.token_symbol, Trade.price, Trade.amount, Trade.timestamp)
+            .order_by(Trade.timestamp).limit(200_000)
+        ).all()
+    trades = [row._asdict() for row in rows]
+    store = CandleStore(engine)
+    started = time.perf_counter()
+    for i in range(0, len(trades), args.batch):
+        store.add(trades[i:i + args.batch])
+    store.flush()
+    elapsed = time.perf_counter() - started
+    print(f"incremental add + flush                {elapsed:8.1f} s  ({len(trades) / elapsed:,.0f} trades/s)")
+
+    seconds = RESOLUTION_SECONDS[args.resolution]
+    with engine.connect() as connection:
+        end = connection.execute(select(func.max(Trade.timestamp))).scalar()
+    start = end - timedelta(seconds=seconds * 500)
+    token = TOKEN_SYMBOLS[0]
+    for name, run in (
+        ("raw trades GROUP BY", lambda: raw_range(token, seconds, start, end)),
+        ("candles range scan", lambda: query_candles(engine, token, seconds, start, end, 500)),
+    ):
+        started = time.perf_counter()
+        for _ in range(args.queries):
+            result = run()
+        elapsed = (time.perf_counter() - started) / args.queries
+        print(f"{name:<20} {args.resolution} x {len(result):<4}        {elapsed * 1e3:8.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
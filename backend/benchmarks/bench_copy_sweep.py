@@ -0,0 +1,79 @@
+"""
+Copy-trading sweep benchmark
+Loads synthetic history into a throwaway database, then times a full
+parameter sweep over the top wallets: reading trades, preparing every
+(delay, stop) variant, and simulating the combinations in the pool
+
+Usage (from backend/):
+    python benchmarks/bench_copy_sweep.py --trades 5000000 --top 500
+    python benchmarks/bench_copy_sweep.py --workers 1
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import init_db  # noqa: E402
+from copytrade import (CopySweep, CopySweepRunner, load_copy_universe, prepare_legs,  # noqa: E402
+                       rank_wallets, simulate, sweep_combinations, top_wallets)
+from database import engine  # noqa: E402
+from datagen import load_dataset  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--wallets", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--top", type=int, default=500, help="wallets to choose the followed ones from")
+    parser.add_argument("--workers", type=int, default=0, help="pool size (default: all cores)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    init_db.Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    load_dataset(engine, args.wallets, args.trades, seed=args.seed, days=args.days)
+    print(f"load {args.trades:,} trades over {args.days} days   {time.perf_counter() - started:8.1f} s")
+
+    combos = sweep_combinations({})
+    delays = sorted({combo["entry_delay_seconds"] for combo in combos})
+    stops = sorted({combo["stop_loss_pct"] for combo in combos})
+
+    started = time.perf_counter()
+    addresses = top_wallets(engine, args.top)
+    columns = load_copy_universe(engine, addresses)
+    print(f"read trades                            {time.perf_counter() - started:8.1f} s")
+
+    started = time.perf_counter()
+    arrays = prepare_legs(columns, rank_wallets(columns, len(addresses)), delays, stops)
+    print(f"grade + prepare {len(delays) * len(stops)} variants            {time.perf_counter() - started:8.1f} s  "
+          f"({arrays['rank'].size:,} copied buys)")
+
+    chunk = [combo for combo in combos if (combo["variant"], combo["follow_top"]) == (0, 500)]
+    started = time.perf_counter()
+    simulate(arrays, chunk)
+    per_combo = (time.perf_counter() - started) / len(chunk)
+    print(f"simulate (one process)                 {per_combo * 1e3:8.1f} ms/combination")
+
+    runner = CopySweepRunner(engine, max_workers=args.workers or None)
+    sweep = CopySweep(combos, args.top, None)
+    started = time.perf_counter()
+    runner.run(sweep)
+    elapsed = time.perf_counter() - started
+    print(f"full sweep, {runner.max_workers} workers                {elapsed:8.1f} s  "
+          f"({len(sweep.results):,}/{len(combos):,} combinations, {sweep.status})")
+    best = sweep.best("sharpe_ratio", 1)
+    if best:
+        print("best by sharpe_ratio:", {name: best[0][name] for name in (
+            "entry_delay_seconds", "stop_loss_pct", "follow_top", "sizing", "position_pct",
+            "sharpe_ratio", "annual_return_pct", "max_drawdown_pct")})
+
+
+if __name__ == "__main__":
+    main()
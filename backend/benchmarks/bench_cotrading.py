@@ -0,0 +1,85 @@
+"""
+Co-trading detector benchmark
+Loads synthetic history into a throwaway database, then times reading it
+back as columns, the vectorized backfill, and the streaming path that
+live ingestion uses
+
+Usage (from backend/):
+    python benchmarks/bench_cotrading.py --trades 5000000 --days 90
+    python benchmarks/bench_cotrading.py --window 60 --min-wallets 5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import numpy as np  # noqa: E402
+
+import init_db  # noqa: E402
+from backtest import EPOCH  # noqa: E402
+from cotrading import CoTradingDetector, load_trade_columns  # noqa: E402
+from database import engine  # noqa: E402
+from datagen import generate_trade_batches, load_dataset  # noqa: E402
+
+
+def streaming_trades(n_trades: int, n_wallets: int, days: int, seed: int):
+    """Trade dicts as ingestion would deliver them, in time order"""
+    _, batches = generate_trade_batches(n_wallets, n_trades, seed=seed, batch_size=n_trades, days=days)
+    batch = next(batches)
+    order = np.argsort(batch["timestamp"], kind="stable")
+    timestamps = batch["timestamp"][order].astype("datetime64[s]").astype(np.int64).tolist()
+    return [
+        {"timestamp": EPOCH + timedelta(seconds=ts), "token_address": token, "token_symbol": symbol,
+         "action": action, "wallet_address": wallet}
+        for ts, token, symbol, action, wallet in zip(
+            timestamps, batch["token_address"][order].tolist(), batch["token_symbol"][order].tolist(),
+            batch["action"][order].tolist(), batch["wallet_address"][order].tolist())
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--wallets", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--window", type=float, default=300.0, help="seconds")
+    parser.add_argument("--min-wallets", type=int, default=3)
+    parser.add_argument("--stream", type=int, default=200_000, help="trades for the streaming timing")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    init_db.Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    load_dataset(engine, args.wallets, args.trades, seed=args.seed, days=args.days)
+    print(f"load {args.trades:,} trades over {args.days} days   {time.perf_counter() - started:8.1f} s")
+
+    started = time.perf_counter()
+    columns = load_trade_columns(engine)
+    read = time.perf_counter() - started
+    print(f"read columns                           {read:8.1f} s  ({len(columns['keys']):,} token/side keys)")
+
+    detector = CoTradingDetector(args.window, args.min_wallets, max_signals=10**7)
+    started = time.perf_counter()
+    found = detector.backfill(columns)
+    detect = time.perf_counter() - started
+    print(f"backfill detect                        {detect:8.1f} s  ({found:,} signals, "
+          f"{args.trades / (read + detect):,.0f} trades/s end to end)")
+
+    trades = streaming_trades(args.stream, args.wallets, args.days, args.seed + 1)
+    live = CoTradingDetector(args.window, args.min_wallets)
+    started = time.perf_counter()
+    for i in range(0, len(trades), 1000):
+        live.process(trades[i:i + 1000])
+    elapsed = time.perf_counter() - started
+    print(f"streaming process                      {elapsed:8.1f} s  ({len(trades) / elapsed:,.0f} trades/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Wallet grading benchmark
+Times a full vectorized re-grade and single-wallet grading as the
+number of wallets grows
+
+Usage (from backend/):
+    python benchmarks/bench_grading.py --sizes 10000 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grading import GRADE_WEIGHTS, WalletGrader  # noqa: E402
+
+
+def population(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    columns = {
+        "annual_return_pct": rng.normal(50, 80, n),
+        "sharpe_ratio": rng.normal(1, 1, n),
+        "max_drawdown_pct": -rng.uniform(0, 60, n),
+        "win_rate": rng.uniform(30, 80, n),
+    }
+    return columns, rng.integers(0, 2000, n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--singles", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'wallets':>10} {'fit s':>8} {'single p50 us':>14} {'single p99 us':>14}  grade mix")
+    for n in args.sizes:
+        columns, total_trades = population(n)
+        grader = WalletGrader()
+        t0 = time.perf_counter()
+        grades = grader.fit(columns, total_trades)
+        fit = time.perf_counter() - t0
+
+        timings = np.empty(args.singles)
+        for i in range(args.singles):
+            stats = {metric: float(columns[metric][i % n]) for metric, _ in GRADE_WEIGHTS}
+            stats["total_trades"] = int(total_trades[i % n])
+            t0 = time.perf_counter()
+            grader.grade(stats)
+            timings[i] = time.perf_counter() - t0
+        p50, p99 = np.percentile(timings, [50, 99]) * 1e6
+        mix = ", ".join(f"{g} {c / n:.0%}" for g, c in zip(*np.unique(grades, return_counts=True)))
+        print(f"{n:>10,} {fit:>8.2f} {p50:>14.1f} {p99:>14.1f}  {mix}")
+
+
+if __name__ == "__main__":
+    main()
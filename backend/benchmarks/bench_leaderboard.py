@@ -0,0 +1,71 @@
+"""
+Leaderboard index benchmark
+Measures page / rank latency percentiles as the number of wallets grows
+
+Usage (from backend/):
+    python benchmarks/bench_leaderboard.py --sizes 100 10000 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard import LEADERBOARD_METRICS, LeaderboardIndex  # noqa: E402
+
+
+def build_index(n: int, seed: int = 0) -> LeaderboardIndex:
+    rng = random.Random(seed)
+    index = LeaderboardIndex()
+    for i in range(n):
+        index.upsert({
+            "address": f"0x{i:040x}",
+            "name": f"Wallet {i}",
+            "annual_return_pct": rng.uniform(-100, 500),
+            "sharpe_ratio": rng.uniform(-2, 5),
+            "max_drawdown_pct": rng.uniform(-90, 0),
+            "win_rate": rng.uniform(0, 100),
+            "total_trades": rng.randint(0, 5000),
+            "grade": "C",
+            "tags": [],
+        })
+    return index
+
+
+def percentiles(fn, iterations: int):
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn(i)
+        timings[i] = time.perf_counter() - t0
+    return np.percentile(timings, [50, 95, 99]) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'wallets':>10} {'operation':>10} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10}")
+    for n in args.sizes:
+        index = build_index(n)
+        metrics = LEADERBOARD_METRICS
+        ops = {
+            "top": lambda i: index.page(metrics[i % len(metrics)], args.limit),
+            "rank": lambda i: index.rank(f"0x{(i * 7919) % n:040x}", metrics[i % len(metrics)]),
+            "update": lambda i: index.update(f"0x{(i * 104729) % n:040x}", win_rate=float(i % 100)),
+        }
+        for name, fn in ops.items():
+            p50, p95, p99 = percentiles(fn, args.iterations)
+            print(f"{n:>10,} {name:>10} {p50:>10.1f} {p95:>10.1f} {p99:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
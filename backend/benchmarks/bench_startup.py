@@ -0,0 +1,78 @@
+"""
+Serverless cold-start benchmark
+Each run is a fresh interpreter (a cold container): it imports api/index.py
+and sends the first request through it, reporting import time and time to
+first response for the snapshot fast path, a path that falls through to
+FastAPI, and STARTUP_MODE=full
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py --runs 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "api", "index.py"
+)
+
+CHILD = r"""
+import asyncio, importlib.util, json, sys, time
+
+started = time.perf_counter()
+spec = importlib.util.spec_from_file_location("serverless_index", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+
+status = []
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+async def send(message):
+    if message["type"] == "http.response.start":
+        status.append(message["status"])
+scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+         "scheme": "http", "path": sys.argv[2], "raw_path": sys.argv[2].encode(), "root_path": "",
+         "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("localhost", 80)}
+asyncio.run(module.app(scope, receive, send))
+answered = time.perf_counter()
+print(json.dumps({"import_ms": (imported - started) * 1000, "first_response_ms": (answered - started) * 1000,
+                  "status": status[0], "fastapi_loaded": "fastapi" in sys.modules}))
+"""
+
+SCENARIOS = [
+    ("fast  /api/leaderboard", "/api/leaderboard", "fast"),
+    ("fast  /health", "/health", "fast"),
+    ("fall  /openapi.json", "/openapi.json", "fast"),
+    ("full  /api/leaderboard", "/api/leaderboard", "full"),
+]
+
+
+def run_once(path: str, mode: str) -> dict:
+    env = dict(os.environ, STARTUP_MODE=mode)
+    out = subprocess.run([sys.executable, "-c", CHILD, INDEX_PATH, path], env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="fresh processes per scenario")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<26}{'import p50':>12}{'first resp p50':>16}{'max':>10}  fastapi")
+    for name, path, mode in SCENARIOS:
+        results = [run_once(path, mode) for _ in range(args.runs)]
+        assert all(r["status"] == 200 for r in results), results
+        imports = [r["import_ms"] for r in results]
+        firsts = [r["first_response_ms"] for r in results]
+        print(f"{name:<26}{statistics.median(imports):>10.1f}ms{statistics.median(firsts):>14.1f}ms"
+              f"{max(firsts):>8.1f}ms  {'yes' if results[0]['fastapi_loaded'] else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Shared state log benchmark
+Times the per-request staleness check (change counter vs. polling the
+log table), append + apply latency, and how fast a second process
+replays the log when it catches up
+
+Usage (from backend/):
+    python benchmarks/bench_state.py --entries 20000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from sqlalchemy.engine import make_url  # noqa: E402
+
+import init_db  # noqa: E402
+from database import DATABASE_URL, engine  # noqa: E402
+from state_log import ChangeCounter, StateLog, default_counter_path  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=20_000)
+    parser.add_argument("--checks", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    init_db.Base.metadata.create_all(bind=engine)
+    counter_path = default_counter_path(make_url(DATABASE_URL))
+    applied = []
+    writer = StateLog(engine, lambda kind, payload, local: applied.append(payload["n"]),
+                      counter=ChangeCounter(counter_path))
+
+    started = time.perf_counter()
+    for n in range(args.entries):
+        writer.append("bench", {"n": n, "address": f"0x{n:040x}", "tags": ["a", "b"]})
+    elapsed = time.perf_counter() - started
+    print(f"append+apply        {elapsed / args.entries * 1e6:9.1f} us/entry  ({args.entries:,} entries)")
+
+    # A second worker: same database and counter, nothing applied yet
+    reader = StateLog(engine, lambda kind, payload, local: None, counter=ChangeCounter(counter_path))
+    started = time.perf_counter()
+    reader.sync(force=True)
+    elapsed = time.perf_counter() - started
+    print(f"catch-up replay     {args.entries / elapsed:12,.0f} entries/s")
+
+    started = time.perf_counter()
+    for _ in range(args.checks):
+        reader.stale()
+    elapsed = time.perf_counter() - started
+    print(f"stale() counter     {elapsed / args.checks * 1e9:9.1f} ns")
+
+    poller = StateLog(engine, lambda kind, payload, local: None, poll_interval=0.0)
+    poller.sync(force=True)
+    checks = max(1, args.checks // 100)
+    started = time.perf_counter()
+    for _ in range(checks):
+        poller.sync()
+    elapsed = time.perf_counter() - started
+    print(f"sync() polling      {elapsed / checks * 1e6:9.1f} us  (no counter: one query per check)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Wallet search benchmark
+Fills a WalletStore with synthetic wallets, then times bulk indexing,
+single adds and removes, and typeahead queries by address prefix,
+label words and tags
+
+Usage (from backend/):
+    python benchmarks/bench_wallet_search.py --wallets 1000000
+    python benchmarks/bench_wallet_search.py --queries 5000 --limit 50
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datagen import _hex_strings  # noqa: E402
+from wallet_store import WalletStore  # noqa: E402
+
+LABEL_WORDS = [
+    "DeFi", "Whale", "Smart", "Trader", "Alpha", "Hunter", "Degen", "Fund", "Capital", "Sniper",
+    "Early", "Insider", "Market", "Maker", "Yield", "Farmer", "NFT", "Flipper", "MEV", "Bot",
+]
+TAGS = [
+    "DeFi", "Arbitrage", "Swing Trading", "MEV", "NFT", "Airdrop", "Memecoin", "Bridge",
+    "Lending", "Staking", "Market Maker", "Insider", "Whale", "Bot", "Early Buyer", "Fund",
+]
+
+
+def make_wallets(count: int, users: int, seed: int):
+    rng = np.random.default_rng(seed)
+    addresses = _hex_strings(rng, count, 20)
+    words = rng.integers(0, len(LABEL_WORDS), (count, 2))
+    suffixes = rng.integers(0, 10_000, count)
+    # Skewed tag popularity, 0-3 tags per wallet
+    tag_p = 1.0 / np.arange(1, len(TAGS) + 1)
+    tag_p /= tag_p.sum()
+    tag_counts = rng.integers(0, 4, count)
+    user_ids = rng.integers(1, users + 1, count)
+    now = datetime.now()
+    for i in range(count):
+        yield {
+            "id": i + 1,
+            "user_id": int(user_ids[i]),
+            "address": str(addresses[i]),
+            "name": f"{LABEL_WORDS[words[i, 0]]} {LABEL_WORDS[words[i, 1]]} {suffixes[i]}",
+            "tags": [TAGS[t] for t in rng.choice(len(TAGS), tag_counts[i], replace=False, p=tag_p)],
+            "created_at": now,
+        }
+
+
+def timed(name: str, queries, run, limit: int):
+    started = time.perf_counter()
+    hits = sum(len(run(query, limit)) for query in queries)
+    elapsed = (time.perf_counter() - started) / len(queries)
+    print(f"{name:<34} {elapsed * 1e3:8.3f} ms/query  ({hits / len(queries):.1f} hits)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wallets", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    wallets = list(make_wallets(args.wallets, args.users, args.seed))
+    started = time.perf_counter()
+    store = WalletStore(wallets)
+    store.search("0x")
+    print(f"index {args.wallets:,} wallets                {time.perf_counter() - started:8.1f} s")
+
+    extra = list(make_wallets(1000, args.users, args.seed + 1))
+    started = time.perf_counter()
+    for wallet in extra:
+        wallet["id"] = None
+        store.add(wallet)
+        store.search(wallet["address"][:6])
+    for wallet in extra:
+        store.remove(wallet["id"])
+    elapsed = (time.perf_counter() - started) / len(extra)
+    print(f"add + search + remove              {elapsed * 1e3:8.3f} ms/wallet")
+
+    rng = np.random.default_rng(args.seed + 2)
+    sample = [wallets[i] for i in rng.integers(0, len(wallets), args.queries)]
+    words = [w.lower() for w in LABEL_WORDS]
+    timed("address prefix (6 chars)", [w["address"][:6] for w in sample],
+          lambda q, limit: store.search(q, limit=limit), args.limit)
+    timed("address prefix (full)", [w["address"] for w in sample],
+          lambda q, limit: store.search(q, limit=limit), args.limit)
+    timed("label, partial last word", [f"{words[i % 20]} {words[i * 7 % 20][:2]}" for i in range(args.queries)],
+          lambda q, limit: store.search(q, limit=limit), args.limit)
+    timed("label, exact name", [w["name"] for w in sample],
+          lambda q, limit: store.search(q, limit=limit), args.limit)
+    tag_pairs = [[TAGS[i % 16], TAGS[i * 5 % 16]] for i in range(args.queries)]
+    timed("two tags, match all", tag_pairs,
+          lambda q, limit: store.search(tags=q, limit=limit), args.limit)
+    timed("two tags, match any", tag_pairs,
+          lambda q, limit: store.search(tags=q, match_all=False, limit=limit), args.limit)
+    timed("rare tags AND + user", [[TAGS[15], TAGS[14], TAGS[13]]] * args.queries,
+          lambda q, limit: store.search(tags=q, user_id=1, limit=limit), args.limit)
+    timed("label + tag + user", [w for w in sample],
+          lambda w, limit: store.search(w["name"].split()[0], ["DeFi"], user_id=w["user_id"], limit=limit),
+          args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Smart Money Tracker - Response Cache
+Memory-bounded LRU + TTL cache of serialized JSON responses with
+ETag / Last-Modified validation and tag-based invalidation, plus the
+orjson encoding path shared by list endpoints
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from email.utils import format_datetime, parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+import numpy as np
+import orjson
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+def _default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return jsonable_encoder(value)
+
+
+def json_bytes(payload) -> bytes:
+    """Compact JSON via orjson; datetimes are ISO 8601 like jsonable_encoder"""
+    return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def json_response(body: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class RowCache:
+    """
+    Serialized JSON of immutable rows (keyed by row id), so a page is a
+    join of cached bytes rather than a fresh encode of every row.
+    """
+
+    def __init__(self, render: Callable[[dict], dict], max_rows: int = 100_000):
+        self.render = render
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._rows: "OrderedDict[Hashable, bytes]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def row(self, row: dict) -> bytes:
+        key = row["id"]
+        with self._lock:
+            body = self._rows.get(key)
+            if body is not None:
+                self._rows.move_to_end(key)
+                return body
+        body = json_bytes(self.render(row))
+        with self._lock:
+            self._rows[key] = body
+            while len(self._rows) > self.max_rows:
+                self._rows.popitem(last=False)
+        return body
+
+    def encode(self, rows: Iterable[dict]) -> bytes:
+        return b"[" + b",".join(self.row(row) for row in rows) + b"]"
+
+
+class CacheEntry:
+    __slots__ = ("body", "headers", "etag", "last_modified", "expires_at", "tags")
+
+    def __init__(self, body: bytes, headers: Dict[str, str], etag: str,
+                 last_modified: datetime, expires_at: float, tags: Set[str]):
+        self.body = body
+        self.headers = headers
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.tags = tags
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + 256
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class ResponseCache:
+    """
+    Serialized responses keyed by (route, params). Entries expire after
+    `ttl` seconds and the least recently used ones are evicted once the
+    total body size exceeds `max_bytes`. Each entry carries tags such as
+    "wallet:3" or "user:1" so writes can invalidate exactly what changed.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl: float = 5.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._by_tag: Dict[str, Set[Hashable]] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: Hashable, body: bytes, tags: Iterable[str] = (),
+            headers: Optional[Dict[str, str]] = None, ttl: Optional[float] = None) -> CacheEntry:
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        with self._lock:
+            previous = self._entries.get(key)
+            # Identical bytes keep their original Last-Modified
+            if previous is not None and previous.etag == etag:
+                last_modified = previous.last_modified
+            else:
+                last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+            if previous is not None:
+                self._drop(key)
+            entry = CacheEntry(body, headers or {}, etag, last_modified,
+                               time.monotonic() + (self.ttl if ttl is None else ttl), set(tags))
+            self._entries[key] = entry
+            self._bytes += entry.size
+            for tag in entry.tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+        return entry
+
+    def invalidate(self, *tags: str):
+        """Drop every entry carrying any of the given tags"""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._by_tag.get(tag, ())):
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+            self._bytes = 0
+
+    def respond(
+        self,
+        request: Request,
+        key: Hashable,
+        tags: Iterable[str],
+        build: Callable[[], Tuple[object, Dict[str, str]]],
+        ttl: Optional[float] = None,
+    ) -> Response:
+        """
+        Serve `key` from cache (or build, serialize and store it) and answer
+        conditional GETs with 304 Not Modified. `build` returns the JSON
+        payload and any extra response headers.
+        """
+        entry = self.get(key)
+        if entry is None:
+            payload, headers = build()
+            entry = self._store(key, payload, headers, tags, ttl)
+        return self._serve(request, entry)
+
+    async def respond_async(
+        self,
+        request: Request,
+        key: Hashable,
+        tags: Iterable[str],
+        build: Callable[[], Awaitable[Tuple[object, Dict[str, str]]]],
+        ttl: Optional[float] = None,
+    ) -> Response:
+        """respond() for routes whose payload is built by a coroutine"""
+        entry = self.get(key)
+        if entry is None:
+            payload, headers = await build()
+            entry = self._store(key, payload, headers, tags, ttl)
+        return self._serve(request, entry)
+
+    def _store(self, key, payload, headers, tags, ttl) -> CacheEntry:
+        body = json_bytes(payload)
+        return self.set(key, body, tags, headers, ttl)
+
+    @staticmethod
+    def _serve(request: Request, entry: CacheEntry) -> Response:
+        headers = {
+            **entry.headers,
+            "ETag": entry.etag,
+            "Last-Modified": format_datetime(entry.last_modified, usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if _etag_matches(if_none_match, entry.etag):
+                return Response(status_code=304, headers=headers)
+        elif "if-modified-since" in request.headers:
+            try:
+                since = parsedate_to_datetime(request.headers["if-modified-since"])
+                if since.tzinfo is not None and entry.last_modified <= since:
+                    return Response(status_code=304, headers=headers)
+            except (TypeError, ValueError):
+                pass
+        return json_response(entry.body, headers)
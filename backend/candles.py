@@ -0,0 +1,322 @@
+"""
+Smart Money Tracker - OHLCV Candles
+Per-token 1m / 1h / 1d candles: trades aggregate into 1m buckets, each
+resolution rolls up from the one below, and batches merge into the
+candles table with one upsert per flush
+"""
+
+import itertools
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import String, case, delete, insert, select, type_coerce, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from backtest import EPOCH
+from init_db import Candle, Trade
+
+# (name, bucket seconds), finest first; each rolls up from the one before
+RESOLUTIONS = (("1m", 60), ("1h", 3600), ("1d", 86400))
+RESOLUTION_SECONDS = dict(RESOLUTIONS)
+CANDLE_FIELDS = ("open", "high", "low", "close", "volume", "trades", "open_time", "close_time")
+# Column order of the row tuples written to the candles table
+ROW_COLUMNS = ("token_symbol", "resolution", "bucket") + CANDLE_FIELDS
+
+
+class CandleArrays(NamedTuple):
+    """Candles as columns; `token` is a code into a separate symbol list"""
+    token: np.ndarray  # int64
+    bucket: np.ndarray  # int64 unix seconds, start of the bucket
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    trades: np.ndarray  # int64
+    open_time: np.ndarray  # int64 unix seconds of the first and last trade
+    close_time: np.ndarray
+
+
+def from_trades(token, timestamps, price, amount) -> CandleArrays:
+    """Every trade as a one-trade candle in its own one-second bucket"""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    price = np.asarray(price, dtype=np.float64)
+    return CandleArrays(
+        np.asarray(token, dtype=np.int64), timestamps, price, price, price, price,
+        np.nan_to_num(np.asarray(amount, dtype=np.float64)), np.ones(timestamps.size, dtype=np.int64),
+        timestamps, timestamps,
+    )
+
+
+def concat(parts: Sequence[CandleArrays]) -> CandleArrays:
+    return CandleArrays(*(np.concatenate(columns) for columns in zip(*parts)))
+
+
+def rollup(candles: CandleArrays, seconds: int) -> CandleArrays:
+    """
+    Merge candles into `seconds`-wide buckets per token. Inputs may be
+    partial candles of the same bucket: open is taken from the earliest
+    open_time and close from the latest close_time, so merging is
+    associative and doesn't depend on the order trades arrived in (only
+    trades within the same second fall back to arrival order).
+    """
+    if candles.token.size == 0:
+        return candles
+    bucket = candles.bucket // seconds * seconds
+    by_open = np.lexsort((candles.open_time, bucket, candles.token))
+    by_close = np.lexsort((candles.close_time, bucket, candles.token))
+    token, bucket = candles.token[by_open], bucket[by_open]
+    starts = np.flatnonzero(np.r_[True, (token[1:] != token[:-1]) | (bucket[1:] != bucket[:-1])])
+    # Both orders group identically; they differ only within a group
+    first = by_open[starts]
+    last = by_close[np.r_[starts[1:], by_open.size] - 1]
+    return CandleArrays(
+        token[starts], bucket[starts],
+        candles.open[first],
+        np.maximum.reduceat(candles.high[by_open], starts),
+        np.minimum.reduceat(candles.low[by_open], starts),
+        candles.close[last],
+        np.add.reduceat(candles.volume[by_open], starts),
+        np.add.reduceat(candles.trades[by_open], starts),
+        candles.open_time[first],
+        candles.close_time[last],
+    )
+
+
+def cascade(minutes: CandleArrays) -> Dict[int, CandleArrays]:
+    """1m candles plus every coarser resolution, each rolled up from the last"""
+    levels = {RESOLUTIONS[0][1]: minutes}
+    finer = minutes
+    for _, seconds in RESOLUTIONS[1:]:
+        finer = levels[seconds] = rollup(finer, seconds)
+    return levels
+
+
+def candle_rows(symbols: Sequence[str], seconds: int, candles: CandleArrays) -> List[tuple]:
+    """Candle table rows for one resolution, as tuples in ROW_COLUMNS order"""
+    return list(zip(
+        np.asarray(symbols, dtype=object)[candles.token].tolist(), itertools.repeat(seconds),
+        candles.bucket.tolist(), *(getattr(candles, field).tolist() for field in CANDLE_FIELDS),
+    ))
+
+
+def _executemany(connection, stmt, rows: List[tuple]):
+    """
+    Execute `stmt` for every row, compiled once and handed to the driver
+    as plain tuples: per-row parameter processing otherwise costs more
+    than the writes.
+    """
+    compiled = stmt.compile(dialect=connection.dialect, column_keys=list(ROW_COLUMNS))
+    if compiled.positional:
+        order = [ROW_COLUMNS.index(name) for name in compiled.positiontup]
+        if order != list(range(len(ROW_COLUMNS))):
+            rows = [tuple(row[i] for i in order) for row in rows]
+    else:
+        rows = [dict(zip(ROW_COLUMNS, row)) for row in rows]
+    connection.exec_driver_sql(str(compiled), rows)
+
+
+def upsert_candles(connection, rows: List[tuple]):
+    """Merge rows into stored candles (the same rule as rollup), inserting new ones"""
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (pg_insert if dialect == "postgresql" else sqlite_insert)(Candle)
+        new = stmt.excluded
+        _executemany(connection, stmt.on_conflict_do_update(
+            index_elements=["token_symbol", "resolution", "bucket"],
+            set_={
+                "open": case((new.open_time < Candle.open_time, new.open), else_=Candle.open),
+                "open_time": case((new.open_time < Candle.open_time, new.open_time), else_=Candle.open_time),
+                "close": case((new.close_time >= Candle.close_time, new.close), else_=Candle.close),
+                "close_time": case((new.close_time >= Candle.close_time, new.close_time), else_=Candle.close_time),
+                "high": case((new.high > Candle.high, new.high), else_=Candle.high),
+                "low": case((new.low < Candle.low, new.low), else_=Candle.low),
+                "volume": Candle.volume + new.volume,
+                "trades": Candle.trades + new.trades,
+            },
+        ), rows)
+        return
+
+    # Generic fallback: read-merge-write one candle at a time
+    for row in (dict(zip(ROW_COLUMNS, row)) for row in rows):
+        key = (Candle.token_symbol == row["token_symbol"], Candle.resolution == row["resolution"],
+               Candle.bucket == row["bucket"])
+        old = connection.execute(select(*(getattr(Candle, f) for f in CANDLE_FIELDS)).where(*key)).first()
+        if old is None:
+            connection.execute(insert(Candle), [row])
+            continue
+        old = old._asdict()
+        merged = {
+            "high": max(old["high"], row["high"]),
+            "low": min(old["low"], row["low"]),
+            "volume": old["volume"] + row["volume"],
+            "trades": old["trades"] + row["trades"],
+        }
+        if row["open_time"] < old["open_time"]:
+            merged.update(open=row["open"], open_time=row["open_time"])
+        if row["close_time"] >= old["close_time"]:
+            merged.update(close=row["close"], close_time=row["close_time"])
+        connection.execute(update(Candle).where(*key).values(**merged))
+
+
+class CandleStore:
+    """
+    Keeps the candles table current as trades are ingested. add() turns a
+    batch into candles at every resolution and buffers them; flush()
+    rolls the buffer up once more (so a bucket hit by many batches is one
+    row) and upserts it, merging into the stored candle in SQL. `add`
+    flushes inline once `batch_size` candles are pending; a periodic
+    `flush` bounds how far the table lags behind.
+    """
+
+    def __init__(self, engine, batch_size: int = 5000):
+        self.engine = engine
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._codes: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._pending: Dict[int, List[CandleArrays]] = {seconds: [] for _, seconds in RESOLUTIONS}
+        self._count = 0
+        self.written = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, trades: List[dict], flush: bool = True):
+        """
+        Buffer Trade-shaped dicts; ones without a symbol or a price are
+        skipped. `flush=False` never writes inline (the periodic flush does).
+        """
+        with self._lock:
+            tokens, timestamps, prices, amounts = [], [], [], []
+            for trade in trades:
+                symbol, price = trade.get("token_symbol"), trade.get("price")
+                if not symbol or not price or price <= 0:
+                    continue
+                code = self._codes.get(symbol)
+                if code is None:
+                    code = self._codes[symbol] = len(self._symbols)
+                    self._symbols.append(symbol)
+                tokens.append(code)
+                timestamps.append((trade["timestamp"] - EPOCH).total_seconds())
+                prices.append(price)
+                amounts.append(trade.get("amount") or 0.0)
+            if not tokens:
+                return
+            minutes = rollup(from_trades(tokens, timestamps, prices, amounts), RESOLUTIONS[0][1])
+            for seconds, candles in cascade(minutes).items():
+                self._pending[seconds].append(candles)
+                self._count += candles.token.size
+            full = self._count >= self.batch_size
+        if full and flush:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._write_lock:
+            with self._lock:
+                pending, symbols = self._pending, list(self._symbols)
+                self._pending = {seconds: [] for _, seconds in RESOLUTIONS}
+                self._count = 0
+            rows = []
+            for seconds, parts in pending.items():
+                if parts:
+                    rows += candle_rows(symbols, seconds, rollup(concat(parts), seconds))
+            if rows:
+                try:
+                    with self.engine.begin() as connection:
+                        upsert_candles(connection, rows)
+                except Exception:
+                    # Keep the batch for the next flush
+                    with self._lock:
+                        for seconds, parts in pending.items():
+                            self._pending[seconds][:0] = parts
+                            self._count += sum(part.token.size for part in parts)
+                    raise
+                self.written += len(rows)
+            return len(rows)
+
+
+def _unix_seconds(value: datetime) -> int:
+    """Naive datetimes are taken as UTC, like stored trade timestamps"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return int((value - EPOCH).total_seconds())
+
+
+def query_candles(
+    engine,
+    token_symbol: str,
+    seconds: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 500,
+) -> List[dict]:
+    """
+    Candles for one token and resolution, oldest first: the first `limit`
+    from `start` if given, otherwise the latest `limit` up to `end`. One
+    range scan of the candles primary key.
+    """
+    query = select(Candle.bucket, *(getattr(Candle, field) for field in CANDLE_FIELDS[:6])).where(
+        Candle.token_symbol == token_symbol, Candle.resolution == seconds)
+    if start is not None:
+        query = query.where(Candle.bucket >= _unix_seconds(start) // seconds * seconds)
+    if end is not None:
+        query = query.where(Candle.bucket <= _unix_seconds(end))
+    if start is not None:
+        query = query.order_by(Candle.bucket).limit(limit)
+    else:
+        query = query.order_by(Candle.bucket.desc()).limit(limit)
+    with engine.connect() as connection:
+        rows = connection.execute(query).all()
+    if start is None:
+        rows.reverse()
+    return [
+        {
+            "time": EPOCH + timedelta(seconds=bucket),
+            "open": open_, "high": high, "low": low, "close": close,
+            "volume": volume, "trades": trades,
+        }
+        for bucket, open_, high, low, close, volume, trades in rows
+    ]
+
+
+def rebuild_candles(engine, batch_size: int = 100_000) -> Dict[str, int]:
+    """
+    Recompute every candle from the Trade table (paging by primary key)
+    and replace the table's contents. Returns the candle count per
+    resolution.
+    """
+    codes: Dict[str, int] = {}
+    parts = []
+    last_id = 0
+    query = (
+        select(Trade.id, Trade.token_symbol, type_coerce(Trade.timestamp, String), Trade.price, Trade.amount)
+        .where(Trade.token_symbol.isnot(None), Trade.price > 0, Trade.timestamp.isnot(None))
+    )
+    with engine.connect() as connection:
+        while True:
+            rows = connection.execute(query.where(Trade.id > last_id).order_by(Trade.id).limit(batch_size)).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            _, symbols, timestamps, prices, amounts = zip(*rows)
+            tokens = [codes.setdefault(symbol, len(codes)) for symbol in symbols]
+            seconds = np.array(timestamps, dtype="datetime64[us]").astype("datetime64[s]").astype(np.int64)
+            amounts = np.array([amount or 0.0 for amount in amounts], dtype=np.float64)
+            parts.append(rollup(from_trades(tokens, seconds, prices, amounts), RESOLUTIONS[0][1]))
+
+    symbols = list(codes)
+    levels = cascade(rollup(concat(parts), RESOLUTIONS[0][1])) if parts else {}
+    with engine.begin() as connection:
+        connection.execute(delete(Candle))
+        for seconds, candles in levels.items():
+            rows = candle_rows(symbols, seconds, candles)
+            for start in range(0, len(rows), batch_size):
+                _executemany(connection, insert(Candle), rows[start:start + batch_size])
+    return {name: int(levels[seconds].token.size) if levels else 0 for name, seconds in RESOLUTIONS}
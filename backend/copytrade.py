@@ -0,0 +1,578 @@
+"""
+Smart Money Tracker - Copy-trading Simulation
+Parameter sweeps that replay following the top-graded wallets (entry
+delay, position sizing, stop-loss, how many wallets to follow), evaluated
+in a process pool over shared memory-mapped arrays
+"""
+
+import heapq
+import itertools
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import String, select, type_coerce
+
+from backtest import TradeArrays, compute_metrics
+from grading import GRADE_CUTOFFS, WalletGrader
+from init_db import Trade, Wallet
+from jobs import (JOB_CANCELLED, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JobStore, QueueFullError,
+                  parse_job_time)
+
+# fixed: every copied buy gets position_pct of capital; conviction: that
+# scaled by the wallet's buy size relative to its own median buy
+SIZING_MODES = ("fixed", "conviction")
+CONVICTION_RANGE = (0.25, 4.0)
+STARTING_CAPITAL = 100_000.0
+MAX_COMBINATIONS = 10_000
+# Any result metric can rank a sweep (higher is better, as on the leaderboard)
+SWEEP_METRICS = ("annual_return_pct", "sharpe_ratio", "max_drawdown_pct", "win_rate", "total_pnl")
+DEFAULT_GRID = {
+    "entry_delays_seconds": [0, 60, 300, 900, 3600],
+    "stop_loss_pcts": [0.0, 5.0, 10.0, 20.0, 30.0],  # 0: no stop
+    "follow_top": [10, 50, 100, 500],
+    "sizing": list(SIZING_MODES),
+    "position_pcts": [1.0, 2.0, 5.0, 10.0, 20.0],
+}
+# Arrays a sweep shares with its workers, saved as .npy and memory-mapped
+SHARED_ARRAYS = ("rank", "conviction", "exit_time", "ret")
+
+
+def sweep_combinations(grid: dict) -> List[dict]:
+    """
+    Every parameter combination of `grid` (keys as DEFAULT_GRID; missing
+    or empty ones take the default). Raises ValueError on bad values.
+    """
+    grid = {name: sorted(set(grid.get(name) or default)) for name, default in DEFAULT_GRID.items()}
+    if any(delay < 0 for delay in grid["entry_delays_seconds"]):
+        raise ValueError("entry_delays_seconds must be >= 0")
+    if any(not 0 <= pct < 100 for pct in grid["stop_loss_pcts"]):
+        raise ValueError("stop_loss_pcts must be in [0, 100)")
+    if any(top < 1 for top in grid["follow_top"]):
+        raise ValueError("follow_top must be >= 1")
+    if not set(grid["sizing"]) <= set(SIZING_MODES):
+        raise ValueError(f"sizing must be among {', '.join(SIZING_MODES)}")
+    if any(not 0 < pct <= 100 for pct in grid["position_pcts"]):
+        raise ValueError("position_pcts must be in (0, 100]")
+    total = int(np.prod([len(values) for values in grid.values()]))
+    if total > MAX_COMBINATIONS:
+        raise ValueError(f"{total} combinations; at most {MAX_COMBINATIONS} per sweep")
+
+    stops = grid["stop_loss_pcts"]
+    return [
+        {
+            "entry_delay_seconds": delay,
+            "stop_loss_pct": stop,
+            "follow_top": top,
+            "sizing": sizing,
+            "position_pct": pct,
+            # Row of exit_time / ret holding this delay and stop
+            "variant": d * len(stops) + s,
+        }
+        for (d, delay), (s, stop), top, sizing, pct in itertools.product(
+            enumerate(grid["entry_delays_seconds"]), enumerate(stops),
+            grid["follow_top"], grid["sizing"], grid["position_pcts"])
+    ]
+
+
+def top_wallets(engine, limit: int) -> List[str]:
+    """Addresses of the `limit` best-ranked wallets in the Wallet table"""
+    query = (
+        select(Wallet.address)
+        .order_by(Wallet.rank.is_(None), Wallet.rank, Wallet.total_profit.desc())
+        .limit(limit)
+    )
+    with engine.connect() as conn:
+        return list(conn.execute(query).scalars())
+
+
+def load_copy_universe(engine, wallets: Sequence[str], since: Optional[datetime] = None,
+                       batch_size: int = 100_000) -> Dict[str, np.ndarray]:
+    """
+    Read every priced trade as column arrays, paging by primary key: the
+    followed wallets' trades are what gets copied, everyone's together
+    are the price timeline copies fill against. `wallet` is the index
+    into `wallets`, or -1 for anyone else.
+    """
+    wallet_codes = {address: i for i, address in enumerate(wallets)}
+    token_codes: Dict[str, int] = {}
+    timestamps, tokens, prices, amounts, pnls, buys, followed = [], [], [], [], [], [], []
+    last_id = 0
+    query = select(Trade.id, type_coerce(Trade.timestamp, String), Trade.token_address, Trade.token_symbol,
+                   Trade.action, Trade.wallet_address, Trade.price, Trade.amount, Trade.profit_loss)
+    if since is not None:
+        query = query.where(Trade.timestamp >= since)
+    with engine.connect() as conn:
+        while True:
+            rows = conn.execute(query.where(Trade.id > last_id).order_by(Trade.id).limit(batch_size)).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            for _, timestamp, token_address, token_symbol, action, wallet, price, amount, pnl in rows:
+                token = token_address or token_symbol
+                if not token or timestamp is None or not price or price <= 0:
+                    continue
+                code = token_codes.get(token)
+                if code is None:
+                    code = token_codes[token] = len(token_codes)
+                timestamps.append(timestamp)
+                tokens.append(code)
+                prices.append(price)
+                amounts.append(amount or 0.0)
+                pnls.append(pnl or 0.0)
+                buys.append((action or "").lower() == "buy")
+                followed.append(wallet_codes.get(wallet, -1))
+    return {
+        "timestamp": np.array(timestamps, dtype="datetime64[us]").astype("datetime64[s]").astype(np.int64),
+        "token": np.array(tokens, dtype=np.int64),
+        "price": np.array(prices, dtype=np.float64),
+        "amount": np.array(amounts, dtype=np.float64),
+        "profit_loss": np.array(pnls, dtype=np.float64),
+        "buy": np.array(buys, dtype=bool),
+        "wallet": np.array(followed, dtype=np.int64),
+    }
+
+
+def rank_wallets(columns: Dict[str, np.ndarray], n_wallets: int) -> np.ndarray:
+    """
+    Follow order per wallet code (0 is followed first): the wallets are
+    graded against each other from their own trades, best grade first,
+    ties kept in the order given. follow_top=N copies ranks below N.
+    """
+    rows = np.flatnonzero(columns["wallet"] >= 0)
+    rows = rows[np.lexsort((columns["timestamp"][rows], columns["wallet"][rows]))]
+    bounds = np.searchsorted(columns["wallet"][rows], np.arange(n_wallets + 1))
+    stats = [
+        compute_metrics(TradeArrays(*(columns[name][rows[start:end]]
+                                      for name in ("timestamp", "amount", "price", "profit_loss"))))
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+    metrics = {name: np.array([s[name] for s in stats], dtype=np.float64) for name in stats[0]} if stats else {}
+    grades = WalletGrader().fit(metrics, metrics["total_trades"]).tolist() if stats else []
+    grade_order = {grade: i for i, (grade, _) in enumerate(GRADE_CUTOFFS)}
+    key = np.array([grade_order.get(grade, len(GRADE_CUTOFFS)) for grade in grades], dtype=np.int64)
+    rank = np.empty(n_wallets, dtype=np.int64)
+    rank[np.argsort(key, kind="stable")] = np.arange(n_wallets)
+    return rank
+
+
+def _range_min_levels(values: np.ndarray, longest: int) -> List[np.ndarray]:
+    """Sparse table: levels[k][i] = min(values[i:i + 2**k]) for 2**k <= longest"""
+    levels = [values]
+    width = 1
+    while width * 2 <= longest:
+        previous = levels[-1]
+        levels.append(np.minimum(previous[:-width], previous[width:]))
+        width *= 2
+    return levels
+
+
+def _first_at_or_below(levels: List[np.ndarray], start: np.ndarray, stop: np.ndarray,
+                       threshold: np.ndarray) -> np.ndarray:
+    """
+    Per query, the first index in [start, stop) whose value is <= threshold,
+    or stop if none: skip the largest power-of-two blocks whose minimum is
+    still above it, one vectorized pass per level.
+    """
+    position = start.copy()
+    for k in range(len(levels) - 1, -1, -1):
+        width = 1 << k
+        fits = np.flatnonzero(position + width <= stop)
+        skip = fits[levels[k][position[fits]] > threshold[fits]]
+        position[skip] += width
+    return position
+
+
+def prepare_legs(columns: Dict[str, np.ndarray], rank: np.ndarray,
+                 delays: Sequence[float], stops: Sequence[float]) -> Dict[str, np.ndarray]:
+    """
+    Turn the followed wallets' trades into copied positions ("legs") under
+    every (entry delay, stop-loss) variant.
+
+    Each buy opens a leg that closes at the same wallet's next sell of the
+    token (or at the token's last price if it never sells). The copy fills
+    both ends at the first trade of that token by anyone at or after the
+    wallet's trade plus the delay. A stop-loss closes the leg early at the
+    first trade at or below entry * (1 - stop) while it is open.
+
+    Returns rank and conviction per leg, and exit_time / ret (return on
+    the position, NaN if it could never be entered) per variant row, in
+    sweep_combinations' variant order. Sizing and follow_top only scale
+    and filter legs, so they are left to the workers.
+    """
+    timestamp, token = columns["timestamp"], columns["token"]
+    if not np.any(columns["buy"] & (columns["wallet"] >= 0)):
+        shape = (len(delays) * len(stops), 0)
+        return {"rank": np.empty(0, dtype=np.int64), "conviction": np.empty(0),
+                "exit_time": np.empty(shape, dtype=np.int64), "ret": np.empty(shape)}
+
+    # Price timeline: every trade ordered by (token, time), as one sortable key
+    order = np.lexsort((timestamp, token))
+    line_time, line_price, line_token = timestamp[order], columns["price"][order], token[order]
+    base = int(timestamp.min())
+    span = int(timestamp.max()) - base + int(max(delays, default=0)) + 1
+    line_key = line_token * span + (line_time - base)
+    token_end = np.searchsorted(line_token, np.arange(int(token.max()) + 2))[1:]
+
+    def fill(tokens: np.ndarray, at: np.ndarray) -> np.ndarray:
+        """Timeline index of the first trade of each token at or after `at`"""
+        return np.searchsorted(line_key, tokens * span + (at - base).astype(np.int64), side="left")
+
+    # Followed trades by (wallet, token, time): a buy's exit is the next sell in its group
+    mine = np.flatnonzero(columns["wallet"] >= 0)
+    group = columns["wallet"][mine] * (int(token.max()) + 1) + token[mine]
+    by_group = np.lexsort((timestamp[mine], group))
+    mine, group = mine[by_group], group[by_group]
+    position = np.arange(mine.size)
+    sells = np.where(columns["buy"][mine], mine.size, position)
+    next_sell = np.minimum.accumulate(sells[::-1])[::-1]
+    buys = np.flatnonzero(columns["buy"][mine])
+    exit_at = next_sell[buys]
+    has_exit = exit_at < mine.size
+    has_exit[has_exit] = group[exit_at[has_exit]] == group[buys[has_exit]]
+    legs = mine[buys]
+    leg_token = token[legs]
+    leg_wallet = columns["wallet"][legs]
+    sell_time = np.where(has_exit, timestamp[mine[np.minimum(exit_at, mine.size - 1)]], 0)
+
+    # Conviction: notional against the wallet's median buy notional
+    notional = columns["amount"][legs] * columns["price"][legs]
+    by_wallet = np.lexsort((notional, leg_wallet))
+    counts = np.bincount(leg_wallet, minlength=rank.size)
+    middle = np.minimum(np.cumsum(counts) - counts + (counts - 1) // 2, legs.size - 1)
+    median = np.where(counts > 0, notional[by_wallet[np.maximum(middle, 0)]], 0.0)
+    conviction = np.clip(np.divide(notional, median[leg_wallet], out=np.ones_like(notional),
+                                   where=median[leg_wallet] > 0), *CONVICTION_RANGE)
+
+    last = token_end[leg_token] - 1
+    longest = 1
+    variants = []
+    for delay in delays:
+        entry = fill(leg_token, timestamp[legs] + delay)
+        enterable = entry <= last
+        entry = np.minimum(entry, last)
+        exit_ = np.where(has_exit, np.minimum(fill(leg_token, sell_time + delay), last), last)
+        exit_ = np.maximum(exit_, entry)
+        longest = max(longest, int((exit_ - entry).max(initial=0)))
+        variants.append((entry, exit_, enterable))
+
+    levels = _range_min_levels(line_price, longest)
+    exit_time = np.empty((len(delays) * len(stops), legs.size), dtype=np.int64)
+    ret = np.empty((len(delays) * len(stops), legs.size))
+    row = 0
+    for entry, exit_, enterable in variants:
+        entry_price = line_price[entry]
+        for stop in stops:
+            close = exit_
+            if stop > 0:
+                # Stopped at the first trade at or below the stop after entry
+                hit = _first_at_or_below(levels, entry + 1, exit_ + 1, entry_price * (1 - stop / 100))
+                close = np.minimum(hit, exit_)
+            exit_time[row] = line_time[close]
+            ret[row] = np.where(enterable, line_price[close] / entry_price - 1.0, np.nan)
+            row += 1
+    return {"rank": rank[leg_wallet], "conviction": conviction, "exit_time": exit_time, "ret": ret}
+
+
+def simulate(arrays: Dict[str, np.ndarray], combos: Sequence[dict], capital: float = STARTING_CAPITAL) -> List[dict]:
+    """
+    Metrics for combinations that share one variant and follow_top: the
+    copied legs are selected and ordered by exit once, then only sized.
+    Positions aren't limited by cash; P&L is booked when a leg closes.
+    """
+    variant, follow_top = combos[0]["variant"], combos[0]["follow_top"]
+    ret = arrays["ret"][variant]
+    legs = np.flatnonzero((arrays["rank"] < follow_top) & ~np.isnan(ret))
+    legs = legs[np.argsort(arrays["exit_time"][variant][legs], kind="stable")]
+    exit_time, ret, conviction = arrays["exit_time"][variant][legs], ret[legs], arrays["conviction"][legs]
+    results = []
+    for combo in combos:
+        notional = capital * combo["position_pct"] / 100
+        if combo["sizing"] == "conviction":
+            notional = notional * conviction
+        notional = np.broadcast_to(notional, ret.shape)
+        pnl = notional * ret
+        # amount is the notional itself, at a unit price
+        stats = compute_metrics(TradeArrays(exit_time, notional, np.ones_like(ret), pnl), capital=capital)
+        results.append({
+            **{name: value for name, value in combo.items() if name != "variant"},
+            **stats,
+            "total_pnl": round(float(pnl.sum()), 2),
+        })
+    return results
+
+
+# Per-process mapping of the current sweep's arrays, loaded lazily in each worker
+_worker_arrays = (None, None)
+
+
+def _simulate_chunk(directory: str, combos: List[dict]) -> List[dict]:
+    """Worker entry point: maps the sweep's shared arrays once per process"""
+    global _worker_arrays
+    if _worker_arrays[0] != directory:
+        _worker_arrays = (directory, {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in SHARED_ARRAYS
+        })
+    return simulate(_worker_arrays[1], combos)
+
+
+class CopySweep:
+    def __init__(self, combos: List[dict], wallets: int, since: Optional[datetime]):
+        self.id = uuid.uuid4().hex
+        self.combos = combos
+        self.total = len(combos)
+        self.wallets = wallets
+        self.since = since
+        self.status = JOB_QUEUED
+        self.results: List[dict] = []
+        self.followed = 0
+        self.legs = 0
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.futures = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CopySweep":
+        """A sweep run by another worker, as last stored by record()"""
+        sweep = cls([], data["wallets"], parse_job_time(data["since"]))
+        sweep.id = data["sweep_id"]
+        sweep.total = data["total"]
+        for name in ("status", "results", "followed", "legs", "error"):
+            setattr(sweep, name, data[name])
+        sweep.created_at = parse_job_time(data["created_at"])
+        sweep.finished_at = parse_job_time(data["finished_at"])
+        return sweep
+
+    def record(self) -> dict:
+        """Everything to_dict() needs, for the JobStore"""
+        with self._lock:
+            results = list(self.results)
+        return {
+            "sweep_id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "wallets": self.wallets,
+            "since": self.since,
+            "results": results,
+            "followed": self.followed,
+            "legs": self.legs,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    def add(self, results: List[dict]):
+        with self._lock:
+            self.results.extend(results)
+
+    def transition(self, status: str, *current: str) -> bool:
+        """Move to `status` only from one of the `current` statuses"""
+        with self._lock:
+            if self.status not in current:
+                return False
+            self.status = status
+            return True
+
+    def submit(self, pool: ProcessPoolExecutor, directory: str, chunks: List[List[dict]]) -> bool:
+        """
+        Fan the chunks out unless the sweep is no longer running. Holding
+        the lock cancel() takes means it sees every future submitted.
+        """
+        with self._lock:
+            if self.status != JOB_RUNNING:
+                return False
+            self.futures = [pool.submit(_simulate_chunk, directory, chunk) for chunk in chunks]
+            return True
+
+    def cancel(self) -> bool:
+        """Cancel a queued or running sweep and its chunks not started yet"""
+        if not self.transition(JOB_CANCELLED, JOB_QUEUED, JOB_RUNNING):
+            return False
+        with self._lock:
+            futures = list(self.futures)
+        for future in futures:
+            future.cancel()
+        return True
+
+    def best(self, sort_by: str = "sharpe_ratio", limit: int = 10) -> List[dict]:
+        with self._lock:
+            results = list(self.results)
+        return heapq.nlargest(limit, results, key=lambda result: result[sort_by])
+
+    def to_dict(self, sort_by: str = "sharpe_ratio", limit: int = 10) -> dict:
+        return {
+            "sweep_id": self.id,
+            "status": self.status,
+            "completed": len(self.results),
+            "total": self.total,
+            "wallets": self.followed or self.wallets,
+            "positions": self.legs,
+            "sort_by": sort_by,
+            "best": self.best(sort_by, limit),
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class CopySweepRunner:
+    """
+    Runs copy-trading sweeps in the background. Each sweep loads trades
+    once, prepares every (delay, stop) variant in this process, saves the
+    arrays for workers to memory-map, then fans combination chunks out to
+    a process pool; results are added to the sweep as chunks finish, so
+    its best configurations can be read while it runs.
+
+    With a JobStore, sweeps are also recorded in the database after every
+    chunk, so any worker can poll or cancel them; the running worker
+    stops once it sees a cancel made elsewhere.
+    """
+
+    def __init__(
+        self,
+        engine,
+        max_workers: Optional[int] = None,
+        max_active: int = 2,
+        max_finished: int = 64,
+        store: Optional[JobStore] = None,
+    ):
+        self.engine = engine
+        self.store = store
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_active = max_active
+        self.max_finished = max_finished
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._active: Dict[str, CopySweep] = {}
+        self._finished: "OrderedDict[str, CopySweep]" = OrderedDict()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def start(self, grid: dict, wallets: int = 500, since: Optional[datetime] = None) -> CopySweep:
+        """Validate `grid` (ValueError) and start a sweep over the top `wallets`"""
+        sweep = CopySweep(sweep_combinations(grid), wallets, since)
+        with self._lock:
+            if len(self._active) >= self.max_active:
+                raise QueueFullError("Too many copy-trading sweeps running")
+            self._active[sweep.id] = sweep
+        if self.store is not None:
+            try:
+                self.store.create(sweep.id, "copy_sweep", sweep.record())
+            except Exception:
+                with self._lock:
+                    self._active.pop(sweep.id, None)
+                raise
+        threading.Thread(target=self.run, args=(sweep,), name=f"copy-sweep-{sweep.id[:8]}", daemon=True).start()
+        return sweep
+
+    def run(self, sweep: CopySweep):
+        """Run a sweep to completion on the calling thread"""
+        directory = tempfile.mkdtemp(prefix="copy-sweep-")
+        try:
+            if not sweep.transition(JOB_RUNNING, JOB_QUEUED):
+                return
+            if not self._save(sweep):
+                sweep.cancel()  # through another worker
+                return
+            addresses = top_wallets(self.engine, sweep.wallets)
+            columns = load_copy_universe(self.engine, addresses, sweep.since)
+            sweep.followed = len(addresses)
+            delays = sorted({combo["entry_delay_seconds"] for combo in sweep.combos})
+            stops = sorted({combo["stop_loss_pct"] for combo in sweep.combos})
+            arrays = prepare_legs(columns, rank_wallets(columns, len(addresses)), delays, stops)
+            del columns
+            sweep.legs = int(arrays["rank"].size)
+            for name in SHARED_ARRAYS:
+                np.save(os.path.join(directory, f"{name}.npy"), arrays[name])
+            del arrays
+
+            chunks = {}
+            for combo in sweep.combos:
+                chunks.setdefault((combo["variant"], combo["follow_top"]), []).append(combo)
+            if not sweep.submit(self._get_pool(), directory, list(chunks.values())):
+                return
+            for future in as_completed(sweep.futures):
+                if sweep.status == JOB_CANCELLED:
+                    break
+                sweep.add(future.result())
+                if not self._save(sweep):
+                    sweep.cancel()  # through another worker
+                    break
+            sweep.transition(JOB_DONE, JOB_RUNNING)
+        except Exception as exc:
+            if isinstance(exc, BrokenProcessPool):
+                # A worker died; the next sweep gets a fresh pool
+                with self._lock:
+                    self._pool = None
+            if sweep.transition(JOB_FAILED, JOB_QUEUED, JOB_RUNNING):
+                sweep.error = str(exc) or type(exc).__name__
+        finally:
+            for future in sweep.futures:
+                future.cancel()
+            # Chunks already running still read the memory-mapped arrays
+            wait(sweep.futures)
+            shutil.rmtree(directory, ignore_errors=True)
+            with self._lock:
+                self._retire(sweep)
+            self._save(sweep)
+
+    def _save(self, sweep: CopySweep) -> bool:
+        """Record the sweep; False once it was finished (cancelled) elsewhere"""
+        return self.store is None or self.store.save(sweep.id, sweep.record())
+
+    def get(self, sweep_id: str) -> Optional[CopySweep]:
+        with self._lock:
+            sweep = self._active.get(sweep_id) or self._finished.get(sweep_id)
+        if sweep is None and self.store is not None:
+            data = self.store.load(sweep_id)
+            return CopySweep.from_dict(data) if data else None
+        return sweep
+
+    def cancel(self, sweep_id: str) -> Optional[CopySweep]:
+        """Cancel a sweep: chunks not started yet never run, finished ones are kept"""
+        with self._lock:
+            sweep = self._active.get(sweep_id)
+            if sweep is None:
+                sweep = self._finished.get(sweep_id)
+                if sweep is None and self.store is not None:
+                    data = self.store.cancel(sweep_id)
+                    return CopySweep.from_dict(data) if data else None
+                return sweep
+        if sweep.cancel():
+            self._save(sweep)
+        return sweep
+
+    def _retire(self, sweep: CopySweep):
+        """Move a sweep from the active set to the finished ring (lock held)"""
+        sweep.finished_at = datetime.now()
+        self._active.pop(sweep.id, None)
+        self._finished[sweep.id] = sweep
+        while len(self._finished) > self.max_finished:
+            self._finished.popitem(last=False)
+
+    def shutdown(self):
+        with self._lock:
+            active = list(self._active)
+        for sweep_id in active:
+            self.cancel(sweep_id)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
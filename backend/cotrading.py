@@ -0,0 +1,313 @@
+"""
+Smart Money Tracker - Co-trading Detection
+Sliding-window join of trades keyed by (token, side): clusters of distinct
+wallets buying or selling the same token within a time window, found as
+trades stream in and backfilled from the Trade table
+"""
+
+import itertools
+import threading
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import String, select, type_coerce
+
+from backtest import EPOCH
+from init_db import Trade
+
+SIDES = ("buy", "sell")
+# Past this many live (token, side) windows, idle ones are dropped
+MAX_WINDOWS = 100_000
+# Wallet addresses kept per signal; wallet_count stays exact beyond it
+MAX_SIGNAL_WALLETS = 100
+
+Key = Tuple[str, str]  # (token, side)
+
+
+class _Window:
+    """One (token, side) key's trades within the last `window` seconds"""
+    __slots__ = ("trades", "wallets", "signal")
+
+    def __init__(self):
+        self.trades: deque = deque()  # (timestamp, wallet), oldest first
+        self.wallets: Counter = Counter()
+        self.signal: Optional[dict] = None
+
+    def push(self, timestamp: float, wallet: Hashable, window: float) -> int:
+        """Add a trade, expire older ones; returns distinct wallets in the window"""
+        trades, wallets = self.trades, self.wallets
+        horizon = timestamp - window
+        while trades and trades[0][0] < horizon:
+            _, old = trades.popleft()
+            if wallets[old] == 1:
+                del wallets[old]
+            else:
+                wallets[old] -= 1
+        trades.append((timestamp, wallet))
+        wallets[wallet] += 1
+        return len(wallets)
+
+
+class CoTradingDetector:
+    """
+    A signal opens when at least `min_wallets` distinct wallets trade the
+    same token on the same side within `window_seconds`, and grows while
+    further clustered trades follow within a window of its last one. Each
+    trade touches only its own key's window, so cost per trade does not
+    depend on how many wallets or tokens are tracked.
+
+    Trades are expected roughly in time order per key; one arriving late
+    is still counted, but may expire a little after its true time.
+    """
+
+    def __init__(self, window_seconds: float = 300.0, min_wallets: int = 3, max_signals: int = 10_000):
+        self.window = float(window_seconds)
+        self.min_wallets = min_wallets
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._windows: Dict[Key, _Window] = {}
+        self._signals: deque = deque(maxlen=max_signals)
+
+    def __len__(self) -> int:
+        return len(self._signals)
+
+    def _observe(self, state: _Window, key: Key, wallet: str, timestamp: float, symbol: Optional[str]):
+        """Push one trade; returns the signal it opened or extended, if any"""
+        distinct = state.push(timestamp, wallet, self.window)
+        if distinct < self.min_wallets:
+            return None
+        signal = state.signal
+        if signal is None or timestamp - signal["_last"] > self.window:
+            signal = state.signal = {
+                "id": next(self._ids),
+                "token_address": key[0],
+                "token_symbol": symbol,
+                "side": key[1],
+                "wallets": {},
+                "wallet_count": 0,
+                "trade_count": 0,
+                "_first": state.trades[0][0],
+                "_last": timestamp,
+            }
+            self._signals.append(signal)
+            for _, member in state.trades:
+                self._join(signal, member)
+            signal["trade_count"] = len(state.trades)
+        else:
+            self._join(signal, wallet)
+            signal["trade_count"] += 1
+            signal["_last"] = max(signal["_last"], timestamp)
+        return signal
+
+    @staticmethod
+    def _join(signal: dict, wallet: str):
+        wallets = signal["wallets"]
+        if wallet in wallets:
+            return
+        signal["wallet_count"] += 1
+        if len(wallets) < MAX_SIGNAL_WALLETS:
+            wallets[wallet] = None
+
+    def process(self, trades: Iterable[dict]) -> List[dict]:
+        """
+        Feed ingested trades (Trade-shaped dicts); returns the signals
+        opened or extended, oldest first.
+        """
+        touched = {}
+        newest = None
+        with self._lock:
+            for trade in trades:
+                side = (trade.get("action") or "").lower()
+                token = trade.get("token_address") or trade.get("token_symbol")
+                if side not in SIDES or not token:
+                    continue
+                key = (token, side)
+                state = self._windows.get(key)
+                if state is None:
+                    state = self._windows[key] = _Window()
+                timestamp = (trade["timestamp"] - EPOCH).total_seconds()
+                newest = timestamp if newest is None else max(newest, timestamp)
+                signal = self._observe(state, key, trade["wallet_address"], timestamp, trade.get("token_symbol"))
+                if signal is not None:
+                    touched[signal["id"]] = signal
+            if newest is not None and len(self._windows) > MAX_WINDOWS:
+                self._expire(newest)
+            return [present_signal(signal) for signal in touched.values()]
+
+    def _expire(self, now: float):
+        """Drop windows whose trades have all aged out (their signal can't be extended)"""
+        idle = [key for key, state in self._windows.items() if state.trades[-1][0] < now - self.window]
+        for key in idle:
+            del self._windows[key]
+
+    def signals(
+        self,
+        token: Optional[str] = None,
+        side: Optional[str] = None,
+        min_wallets: Optional[int] = None,
+        since: Optional[datetime] = None,
+        limit: int = 50,
+    ) -> List[dict]:
+        """Newest signals first (by when they opened); `since` bounds the last trade"""
+        if since is not None and since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        since_ts = (since - EPOCH).total_seconds() if since is not None else None
+        with self._lock:
+            out = []
+            for signal in reversed(self._signals):
+                if token is not None and token not in (signal["token_address"], signal["token_symbol"]):
+                    continue
+                if side is not None and signal["side"] != side:
+                    continue
+                if min_wallets is not None and signal["wallet_count"] < min_wallets:
+                    continue
+                if since_ts is not None and signal["_last"] < since_ts:
+                    continue
+                out.append(present_signal(signal))
+                if len(out) == limit:
+                    break
+            return out
+
+    def backfill(self, columns: Dict[str, np.ndarray]) -> int:
+        """
+        Detect signals in historical trades given as column arrays:
+        timestamp (unix seconds), key (int code per token/side), wallet
+        (int code), plus the `keys` / `wallets` / `symbols` code tables.
+        Returns the number of signals added; ones overlapping a live
+        signal for the same key are merged into it instead.
+
+        A vectorized pass first counts trades (not wallets) in every
+        trade's window with one searchsorted over (key, time); only
+        windows holding at least `min_wallets` trades can qualify, and
+        only the trades inside those windows go through the exact
+        distinct-wallet pass above.
+        """
+        timestamp = np.asarray(columns["timestamp"], dtype=np.int64)
+        key = np.asarray(columns["key"], dtype=np.int64)
+        if timestamp.size == 0:
+            return 0
+        order = np.lexsort((timestamp, key))
+        timestamp, key, wallet = timestamp[order], key[order], np.asarray(columns["wallet"])[order]
+
+        # (key, time) as one sortable int64: key in the high bits
+        base = timestamp.min()
+        span = int(timestamp.max() - base) + int(self.window) + 1
+        composite = key * span + (timestamp - base)
+        left = np.searchsorted(composite, composite - int(np.ceil(self.window)), side="left")
+        candidate = (np.arange(composite.size) - left + 1) >= self.min_wallets
+        # Every trade inside a candidate's window: +1 at its start, -1 after its end
+        marks = np.zeros(composite.size + 1, dtype=np.int64)
+        np.add.at(marks, left[candidate], 1)
+        np.add.at(marks, np.flatnonzero(candidate) + 1, -1)
+        included = np.flatnonzero(np.cumsum(marks[:-1]) > 0)
+
+        keys, wallets, symbols = columns["keys"], columns["wallets"], columns["symbols"]
+        # Detect on scratch state so live trades aren't blocked meanwhile
+        scratch = CoTradingDetector(self.window, self.min_wallets, max_signals=self._signals.maxlen)
+        windows: Dict[int, _Window] = {}
+        for t, k, w in zip(timestamp[included].tolist(), key[included].tolist(), wallet[included].tolist()):
+            state = windows.get(k)
+            if state is None:
+                state = windows[k] = _Window()
+            scratch._observe(state, keys[k], wallets[w], float(t), symbols[k])
+
+        # Found key by key; history goes before live signals, in time order
+        history = sorted(scratch._signals, key=lambda s: (s["_first"], s["_last"]))
+        with self._lock:
+            history = self._merge_live(history)
+            for signal in history:
+                signal["id"] = next(self._ids)
+            self._signals = deque(history + list(self._signals), maxlen=self._signals.maxlen)
+        return len(history)
+
+    def _merge_live(self, history: List[dict]) -> List[dict]:
+        """
+        Fold historical signals into live ones for the same key that
+        overlap them in time (the same trades seen twice, e.g. replayed at
+        startup and backfilled); returns the signals that are new (lock held)
+        """
+        live: Dict[Key, List[dict]] = {}
+        for signal in self._signals:
+            live.setdefault((signal["token_address"], signal["side"]), []).append(signal)
+        new = []
+        for signal in history:
+            same = next((
+                other for other in live.get((signal["token_address"], signal["side"]), ())
+                if signal["_first"] <= other["_last"] and other["_first"] <= signal["_last"]
+            ), None)
+            if same is None:
+                new.append(signal)
+                continue
+            for wallet in signal["wallets"]:
+                if wallet not in same["wallets"] and len(same["wallets"]) < MAX_SIGNAL_WALLETS:
+                    same["wallets"][wallet] = None
+            same["wallet_count"] = max(same["wallet_count"], signal["wallet_count"], len(same["wallets"]))
+            same["trade_count"] = max(same["trade_count"], signal["trade_count"])
+            same["_first"] = min(same["_first"], signal["_first"])
+            same["_last"] = max(same["_last"], signal["_last"])
+        return new
+
+
+def present_signal(signal: dict) -> dict:
+    return {
+        "id": signal["id"],
+        "token_address": signal["token_address"],
+        "token_symbol": signal["token_symbol"],
+        "side": signal["side"],
+        "wallets": list(signal["wallets"]),
+        "wallet_count": signal["wallet_count"],
+        "trade_count": signal["trade_count"],
+        "first_trade_at": EPOCH + timedelta(seconds=signal["_first"]),
+        "last_trade_at": EPOCH + timedelta(seconds=signal["_last"]),
+    }
+
+
+def load_trade_columns(engine, since: Optional[datetime] = None, batch_size: int = 100_000) -> Dict[str, object]:
+    """
+    Read buys and sells from the Trade table as dictionary-encoded column
+    arrays for CoTradingDetector.backfill, paging by primary key.
+    Timestamps come back raw (ISO text on SQLite) and are parsed by NumPy
+    in one call rather than as a datetime per row.
+    """
+    key_codes: Dict[Key, int] = {}
+    wallet_codes: Dict[str, int] = {}
+    symbols: List[Optional[str]] = []
+    timestamps, keys, wallets = [], [], []
+    last_id = 0
+    query = select(Trade.id, type_coerce(Trade.timestamp, String), Trade.token_address, Trade.token_symbol,
+                   Trade.action, Trade.wallet_address)
+    if since is not None:
+        query = query.where(Trade.timestamp >= since)
+    with engine.connect() as conn:
+        while True:
+            rows = conn.execute(query.where(Trade.id > last_id).order_by(Trade.id).limit(batch_size)).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            for _, timestamp, token_address, token_symbol, action, wallet_address in rows:
+                side = (action or "").lower()
+                token = token_address or token_symbol
+                if side not in SIDES or not token or timestamp is None:
+                    continue
+                key = (token, side)
+                code = key_codes.get(key)
+                if code is None:
+                    code = key_codes[key] = len(key_codes)
+                    symbols.append(token_symbol)
+                keys.append(code)
+                wallet = wallet_codes.get(wallet_address)
+                if wallet is None:
+                    wallet = wallet_codes[wallet_address] = len(wallet_codes)
+                wallets.append(wallet)
+                timestamps.append(timestamp)
+    return {
+        "timestamp": np.array(timestamps, dtype="datetime64[us]").astype("datetime64[s]").astype(np.int64)
+        if timestamps else np.empty(0, dtype=np.int64),
+        "key": np.array(keys, dtype=np.int64),
+        "wallet": np.array(wallets, dtype=np.int64),
+        "keys": list(key_codes),
+        "wallets": list(wallet_codes),
+        "symbols": symbols,
+    }
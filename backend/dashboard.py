@@ -0,0 +1,106 @@
+"""
+Smart Money Tracker - Dashboard Aggregates
+Per-user running totals so the dashboard never re-scans wallets or trades
+"""
+
+import threading
+from datetime import date, datetime
+from typing import Dict, Optional
+
+from money import format_usd
+
+PNL_WINDOWS = ("pnl_24h", "pnl_7d", "pnl_30d")
+
+
+class UserTotals:
+    __slots__ = ("wallets", "balance_cents", "weighted_pnl", "day", "alerts_today", "transactions_today")
+
+    def __init__(self):
+        self.wallets = 0
+        # Integer cents: adding and removing wallets never drifts
+        self.balance_cents = 0
+        # Sum of balance (cents) * pnl per window; divided by balance on read
+        self.weighted_pnl = dict.fromkeys(PNL_WINDOWS, 0.0)
+        self.day: Optional[date] = None
+        self.alerts_today = 0
+        self.transactions_today = 0
+
+    def roll_day(self, today: date):
+        if self.day != today:
+            self.day = today
+            self.alerts_today = 0
+            self.transactions_today = 0
+
+
+class DashboardAggregates:
+    """
+    Running per-user aggregates updated on wallet add/remove/change and on
+    every transaction or alert, so reading a dashboard is O(1).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users: Dict[int, UserTotals] = {}
+
+    def _totals(self, user_id: int) -> UserTotals:
+        totals = self._users.get(user_id)
+        if totals is None:
+            totals = self._users[user_id] = UserTotals()
+        return totals
+
+    def _apply_wallet(self, wallet: dict, sign: int):
+        totals = self._totals(wallet["user_id"])
+        balance = wallet["balance_cents"]
+        totals.wallets += sign
+        totals.balance_cents += sign * balance
+        for window in PNL_WINDOWS:
+            totals.weighted_pnl[window] += sign * balance * (wallet[window] or 0.0)
+        if totals.wallets == 0:
+            # Reset exactly instead of accumulating float drift
+            totals.weighted_pnl = dict.fromkeys(PNL_WINDOWS, 0.0)
+
+    def add_wallet(self, wallet: dict):
+        with self._lock:
+            self._apply_wallet(wallet, 1)
+
+    def remove_wallet(self, wallet: dict):
+        with self._lock:
+            self._apply_wallet(wallet, -1)
+
+    def update_wallet(self, old: dict, new: dict):
+        """Swap a wallet's contribution (old is a snapshot before the change)"""
+        with self._lock:
+            self._apply_wallet(old, -1)
+            self._apply_wallet(new, 1)
+
+    def _record_event(self, user_id: int, timestamp: Optional[datetime], field: str):
+        today = date.today()
+        if timestamp is not None and timestamp.date() != today:
+            return
+        with self._lock:
+            totals = self._totals(user_id)
+            totals.roll_day(today)
+            setattr(totals, field, getattr(totals, field) + 1)
+
+    def record_transaction(self, user_id: int, timestamp: Optional[datetime] = None):
+        self._record_event(user_id, timestamp, "transactions_today")
+
+    def record_alert(self, user_id: int, timestamp: Optional[datetime] = None):
+        self._record_event(user_id, timestamp, "alerts_today")
+
+    def stats(self, user_id: int) -> dict:
+        with self._lock:
+            totals = self._totals(user_id)
+            totals.roll_day(date.today())
+            balance = totals.balance_cents
+            return {
+                "total_wallets": totals.wallets,
+                "total_value": format_usd(balance),
+                "total_value_cents": balance,
+                **{
+                    f"total_{window}": round(totals.weighted_pnl[window] / balance, 2) if balance > 0 else 0.0
+                    for window in PNL_WINDOWS
+                },
+                "alerts_today": totals.alerts_today,
+                "transactions_today": totals.transactions_today,
+            }
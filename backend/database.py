@@ -1,15 +1,102 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(DATABASE_URL)
+# Connection pool settings (DB_POOL_SIZE, DB_MAX_OVERFLOW, ...)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def pool_options(url) -> dict:
+    """Pool keyword arguments for create_engine / create_async_engine"""
+    if _is_memory_sqlite(url):
+        # In-memory SQLite uses a single shared connection; nothing to size
+        return {}
+    return {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+
+
+def enable_sqlite_wal(engine):
+    """
+    WAL lets every worker process read while one writes; busy_timeout
+    makes concurrent writers queue instead of failing with "database is
+    locked". synchronous=NORMAL is durable in WAL mode except on power loss.
+    """
+    if engine.dialect.name != "sqlite" or _is_memory_sqlite(engine.url):
+        return
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
+
+def async_database_url(database_url: str):
+    """Map a sync URL onto its asyncio driver (aiosqlite / asyncpg)"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    if backend == "postgresql":
+        # asyncpg has no sslmode parameter; it takes ssl= instead
+        query = dict(url.query)
+        sslmode = query.pop("sslmode", None)
+        if sslmode and "ssl" not in query:
+            query["ssl"] = sslmode
+        return url.set(drivername="postgresql+asyncpg", query=query)
+    return url
+
+
+engine = create_engine(DATABASE_URL, **pool_options(make_url(DATABASE_URL)))
+enable_sqlite_wal(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+ASYNC_DATABASE_URL = async_database_url(DATABASE_URL)
+_async_pool = pool_options(ASYNC_DATABASE_URL)
+if _async_pool and ASYNC_DATABASE_URL.get_backend_name() == "sqlite":
+    # aiosqlite defaults to NullPool for files; keep connections pooled
+    _async_pool["poolclass"] = AsyncAdaptedQueuePool
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_async_pool)
+enable_sqlite_wal(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+
+def get_db():
+    """FastAPI dependency yielding a request-scoped session"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    """FastAPI dependency yielding a request-scoped AsyncSession"""
+    async with AsyncSessionLocal() as session:
+        yield session
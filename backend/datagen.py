@@ -0,0 +1,204 @@
+"""
+Smart Money Tracker - Synthetic Dataset Generator
+Reproducible, production-scale wallets and trades loaded through bulk paths
+"""
+
+import csv
+import io
+from datetime import datetime
+from typing import Callable, Iterator, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+
+from init_db import Trade, Wallet
+
+TOKEN_SYMBOLS = ["ETH", "BTC", "SOL", "MATIC", "AVAX", "LINK", "UNI", "AAVE"]
+TRADE_COLUMNS = (
+    "wallet_id", "wallet_address", "token_symbol", "token_address", "action",
+    "amount", "price", "profit_loss", "tx_hash", "timestamp",
+)
+WALLET_COLUMNS = (
+    "id", "address", "label", "total_profit", "win_rate", "total_trades",
+    "rank", "is_monitored", "created_at", "updated_at",
+)
+
+
+def _hex_strings(rng: np.random.Generator, count: int, nbytes: int) -> np.ndarray:
+    """`count` random 0x-prefixed hex strings of `nbytes` bytes"""
+    raw = rng.bytes(count * nbytes).hex()
+    width = nbytes * 2
+    return np.array(["0x" + raw[i:i + width] for i in range(0, len(raw), width)])
+
+
+def _heavy_tailed_cdf(rng: np.random.Generator, count: int, alpha: float) -> np.ndarray:
+    """Cumulative Pareto weights, for sampling indexes with searchsorted"""
+    weights = rng.pareto(alpha, count) + 1.0
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+class Universe:
+    """Wallets and tokens with fixed, seed-derived attributes"""
+
+    def __init__(self, rng: np.random.Generator, n_wallets: int, n_tokens: int, first_wallet_id: int):
+        self.wallet_ids = np.arange(first_wallet_id, first_wallet_id + n_wallets)
+        self.wallet_addresses = _hex_strings(rng, n_wallets, 20)
+        # A few wallets do most of the trading; some are consistently better
+        self.wallet_cdf = _heavy_tailed_cdf(rng, n_wallets, alpha=1.1)
+        self.wallet_skill = rng.normal(0.0, 0.03, n_wallets)
+
+        symbols = TOKEN_SYMBOLS + [f"TKN{i}" for i in range(len(TOKEN_SYMBOLS), n_tokens)]
+        self.token_symbols = np.array(symbols[:n_tokens])
+        self.token_addresses = _hex_strings(rng, n_tokens, 20)
+        # Zipf-like token popularity, log-normal price levels
+        self.token_cdf = np.cumsum(1.0 / np.arange(1, n_tokens + 1) ** 1.2)
+        self.token_cdf /= self.token_cdf[-1]
+        self.token_price = np.exp(rng.normal(2.0, 3.0, n_tokens))
+
+
+def generate_trade_batches(
+    n_wallets: int,
+    n_trades: int,
+    seed: int = 42,
+    batch_size: int = 100_000,
+    n_tokens: int = 500,
+    days: int = 365,
+    end: Optional[datetime] = None,
+    first_wallet_id: int = 1,
+) -> Tuple[Universe, Iterator[dict]]:
+    """
+    Return the wallet/token universe and an iterator of column batches.
+    Every batch is a dict of NumPy arrays keyed by Trade column name.
+    """
+    rng = np.random.default_rng(seed)
+    universe = Universe(rng, n_wallets, n_tokens, first_wallet_id)
+    end = end or datetime(2024, 1, 1)
+    end_ts = int((end - datetime(1970, 1, 1)).total_seconds())
+    span = days * 86400
+
+    def batches():
+        for start in range(0, n_trades, batch_size):
+            size = min(batch_size, n_trades - start)
+            wallet = np.searchsorted(universe.wallet_cdf, rng.random(size))
+            token = np.searchsorted(universe.token_cdf, rng.random(size))
+            timestamps = np.sort(end_ts - span + rng.integers(0, span, size))
+            price = universe.token_price[token] * np.exp(rng.normal(0.0, 0.05, size))
+            amount = np.exp(rng.normal(0.0, 1.5, size)) * 1000.0 / universe.token_price[token]
+            profit_loss = amount * price * (universe.wallet_skill[wallet] + rng.normal(0.0, 0.1, size))
+            # tx_hash encodes seed and row number: unique and reproducible
+            tx_hash = np.char.add(f"0x{seed & 0xffffffff:08x}", np.char.zfill(
+                np.char.mod("%x", np.arange(start, start + size)), 56))
+            yield {
+                "wallet_index": wallet,
+                "wallet_id": universe.wallet_ids[wallet],
+                "wallet_address": universe.wallet_addresses[wallet],
+                "token_symbol": universe.token_symbols[token],
+                "token_address": universe.token_addresses[token],
+                "action": np.where(rng.random(size) < 0.5, "buy", "sell"),
+                "amount": np.round(amount, 6),
+                "price": np.round(price, 6),
+                "profit_loss": np.round(profit_loss, 2),
+                "tx_hash": tx_hash,
+                "timestamp": np.datetime_as_string(timestamps.astype("datetime64[s]"), unit="s"),
+            }
+
+    return universe, batches()
+
+
+def _copy_rows(raw_connection, table: str, columns, rows):
+    """PostgreSQL COPY ... FROM STDIN (CSV)"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def _executemany_rows(raw_connection, table: str, columns, rows):
+    """SQLite executemany on the DB-API connection (no ORM objects)"""
+    placeholders = ", ".join("?" for _ in columns)
+    raw_connection.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows
+    )
+
+
+def load_dataset(
+    engine,
+    n_wallets: int,
+    n_trades: int,
+    seed: int = 42,
+    batch_size: int = 100_000,
+    progress: Optional[Callable[[int, int], None]] = None,
+    **options,
+) -> dict:
+    """
+    Generate and bulk-load wallets and trades into `engine`.
+
+    PostgreSQL uses COPY; SQLite uses executemany with relaxed durability
+    for the duration of the load. Wallet stats (total_profit, win_rate,
+    total_trades, rank) are aggregated from the generated trades.
+    """
+    dialect = engine.dialect.name
+    write_rows = _copy_rows if dialect == "postgresql" else _executemany_rows
+
+    with engine.connect() as connection:
+        first_wallet_id = (connection.execute(select(func.max(Wallet.id))).scalar() or 0) + 1
+
+    universe, batches = generate_trade_batches(
+        n_wallets, n_trades, seed, batch_size, first_wallet_id=first_wallet_id, **options
+    )
+    total_profit = np.zeros(n_wallets)
+    wins = np.zeros(n_wallets, dtype=np.int64)
+    trade_counts = np.zeros(n_wallets, dtype=np.int64)
+
+    raw = engine.raw_connection()
+    try:
+        if dialect == "sqlite":
+            raw.execute("PRAGMA journal_mode=WAL")
+            raw.execute("PRAGMA synchronous=OFF")
+        loaded = 0
+        for batch in batches:
+            wallet = batch["wallet_index"]
+            total_profit += np.bincount(wallet, weights=batch["profit_loss"], minlength=n_wallets)
+            wins += np.bincount(wallet[batch["profit_loss"] > 0], minlength=n_wallets)
+            trade_counts += np.bincount(wallet, minlength=n_wallets)
+
+            # The format SQLAlchemy's SQLite DateTime writes and binds; SQLite
+            # compares these as text, so seconds-only values would sort apart
+            # from query parameters (and break keyset paging on ties)
+            timestamps = np.char.replace(np.datetime_as_string(
+                batch["timestamp"].astype("datetime64[us]"), unit="us"), "T", " ")
+            columns = [batch[c].tolist() for c in TRADE_COLUMNS[:-1]] + [timestamps.tolist()]
+            write_rows(raw, Trade.__tablename__, TRADE_COLUMNS, zip(*columns))
+            raw.commit()
+            loaded += len(wallet)
+            if progress:
+                progress(loaded, n_trades)
+
+        order = np.argsort(-total_profit, kind="stable")
+        rank = np.empty(n_wallets, dtype=np.int64)
+        rank[order] = np.arange(1, n_wallets + 1)
+        win_rate = np.round(np.divide(wins, trade_counts, out=np.zeros(n_wallets), where=trade_counts > 0), 4)
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f")
+        wallet_rows = zip(
+            universe.wallet_ids.tolist(),
+            universe.wallet_addresses.tolist(),
+            [f"Synthetic #{i}" for i in range(1, n_wallets + 1)],
+            np.round(total_profit, 2).tolist(),
+            win_rate.tolist(),
+            trade_counts.tolist(),
+            rank.tolist(),
+            [True] * n_wallets,
+            [now] * n_wallets,
+            [now] * n_wallets,
+        )
+        write_rows(raw, Wallet.__tablename__, WALLET_COLUMNS, wallet_rows)
+        raw.commit()
+        if dialect == "sqlite":
+            raw.execute("PRAGMA synchronous=FULL")
+    finally:
+        raw.close()
+
+    return {"wallets": n_wallets, "trades": n_trades, "seed": seed}
+
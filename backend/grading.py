@@ -0,0 +1,109 @@
+"""
+Smart Money Tracker - Wallet Grading
+Composite performance score and percentile grade cut-offs, computed for
+every wallet in one vectorized pass
+"""
+
+import threading
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+# Backtest metric -> weight in the composite score (higher is better for
+# all of them; drawdown is stored as a negative percentage)
+GRADE_WEIGHTS = (
+    ("annual_return_pct", 0.35),
+    ("sharpe_ratio", 0.30),
+    ("max_drawdown_pct", 0.20),
+    ("win_rate", 0.15),
+)
+# Grade -> lowest composite percentile that earns it
+GRADE_CUTOFFS = (("S", 0.90), ("A", 0.60))
+DEFAULT_GRADE = "C"
+# Too few trades to say anything; such wallets keep DEFAULT_GRADE
+MIN_GRADED_TRADES = 10
+
+
+def percentile_ranks(sorted_values: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Mid-rank percentile (0..1) of each value within sorted_values"""
+    if sorted_values.size == 0:
+        return np.full(np.shape(values), 0.5)
+    below = np.searchsorted(sorted_values, values, side="left")
+    at_or_below = np.searchsorted(sorted_values, values, side="right")
+    return (below + at_or_below) / (2.0 * sorted_values.size)
+
+
+def grades_from_percentiles(percentiles: np.ndarray) -> np.ndarray:
+    conditions = [percentiles >= cutoff for _, cutoff in GRADE_CUTOFFS]
+    return np.select(conditions, [grade for grade, _ in GRADE_CUTOFFS], DEFAULT_GRADE)
+
+
+class WalletGrader:
+    """
+    Grades wallets by the percentile of a weighted composite of their
+    per-metric percentile ranks. fit() re-grades a whole population and
+    keeps the sorted distributions, so grade() can place one wallet whose
+    stats changed against them in O(log n) until the next batch run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sorted: Dict[str, np.ndarray] = {}
+        self._sorted_scores = np.empty(0)
+
+    def __len__(self) -> int:
+        return int(self._sorted_scores.size)
+
+    def _scores(self, sorted_metrics: Dict[str, np.ndarray], columns: Dict[str, np.ndarray]) -> np.ndarray:
+        score = np.zeros(np.shape(columns[GRADE_WEIGHTS[0][0]]))
+        for metric, weight in GRADE_WEIGHTS:
+            score += weight * percentile_ranks(sorted_metrics[metric], columns[metric])
+        return score
+
+    def fit(self, columns: Dict[str, Sequence[float]], total_trades: Sequence[int]) -> np.ndarray:
+        """
+        Grade a population given one array per GRADE_WEIGHTS metric and the
+        wallets' trade counts. Returns an array of grade strings.
+        """
+        columns = {
+            metric: np.nan_to_num(np.asarray(columns[metric], dtype=np.float64))
+            for metric, _ in GRADE_WEIGHTS
+        }
+        eligible = np.asarray(total_trades) >= MIN_GRADED_TRADES
+        sorted_metrics = {}
+        scores = np.zeros(int(eligible.sum()))
+        for metric, weight in GRADE_WEIGHTS:
+            sorted_metrics[metric], ranks = self._self_ranks(columns[metric][eligible])
+            scores += weight * ranks
+        sorted_scores, score_ranks = self._self_ranks(scores)
+        with self._lock:
+            self._sorted, self._sorted_scores = sorted_metrics, sorted_scores
+
+        grades = np.full(eligible.size, DEFAULT_GRADE, dtype="<U8")
+        grades[eligible] = grades_from_percentiles(score_ranks)
+        return grades
+
+    @staticmethod
+    def _self_ranks(values: np.ndarray):
+        """Sorted copy of values and each value's percentile rank within them"""
+        # Sorted queries keep searchsorted sequential, unlike random lookups
+        order = np.argsort(values, kind="stable")
+        sorted_values = values[order]
+        ranks = np.empty(values.size)
+        ranks[order] = percentile_ranks(sorted_values, sorted_values)
+        return sorted_values, ranks
+
+    def grade(self, stats: Optional[dict]) -> Optional[str]:
+        """
+        Grade one wallet's stats against the last fitted population, or
+        None if nothing has been fitted yet.
+        """
+        if not stats or (stats.get("total_trades") or 0) < MIN_GRADED_TRADES:
+            return DEFAULT_GRADE
+        with self._lock:
+            sorted_metrics, sorted_scores = self._sorted, self._sorted_scores
+        if sorted_scores.size == 0:
+            return None
+        columns = {metric: np.float64(stats.get(metric) or 0.0) for metric, _ in GRADE_WEIGHTS}
+        score = self._scores(sorted_metrics, columns)
+        return str(grades_from_percentiles(percentile_ranks(sorted_scores, score)))
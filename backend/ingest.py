@@ -0,0 +1,268 @@
+"""
+Smart Money Tracker - Trade Ingestion
+Incremental NDJSON parsing and batched, de-duplicating Trade inserts
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from starlette.concurrency import run_in_threadpool
+
+from init_db import Trade
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_LINE_BYTES = 64 * 1024
+TRADE_ACTIONS = ("buy", "sell")
+# Columns parse_trade fills in, i.e. the shape of an ingested trade dict
+TRADE_FIELDS = (
+    "wallet_id", "wallet_address", "token_symbol", "token_address", "action",
+    "amount", "price", "profit_loss", "tx_hash", "timestamp",
+)
+# Rows per INSERT: at one bind parameter per field, 3000 rows stay under
+# PostgreSQL's 32767 parameters per statement
+MAX_INSERT_ROWS = 3000
+
+
+class InvalidTrade(ValueError):
+    pass
+
+
+def _parse_timestamp(value) -> datetime:
+    """Accept ISO-8601 strings or unix seconds; store naive UTC like utcnow()"""
+    if value is None:
+        return datetime.utcnow()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.fromtimestamp(value, tz=timezone.utc).replace(tzinfo=None)
+    if isinstance(value, str):
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    raise InvalidTrade("timestamp must be an ISO-8601 string or unix seconds")
+
+
+def _optional_float(data: dict, field: str) -> Optional[float]:
+    value = data.get(field)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise InvalidTrade(f"{field} must be a number")
+    return float(value)
+
+
+def _optional_str(data: dict, field: str, max_length: int) -> Optional[str]:
+    value = data.get(field)
+    if value is None:
+        return None
+    if not isinstance(value, str) or len(value) > max_length:
+        raise InvalidTrade(f"{field} must be a string of at most {max_length} chars")
+    return value
+
+
+def parse_trade(data) -> dict:
+    """Validate one decoded NDJSON object and map it to Trade columns"""
+    if not isinstance(data, dict):
+        raise InvalidTrade("trade must be a JSON object")
+    wallet_address = _optional_str(data, "wallet_address", 42)
+    tx_hash = _optional_str(data, "tx_hash", 66)
+    if not wallet_address or not tx_hash:
+        raise InvalidTrade("wallet_address and tx_hash are required")
+    action = data.get("action")
+    if action is not None:
+        action = str(action).lower()
+        if action not in TRADE_ACTIONS:
+            raise InvalidTrade("action must be 'buy' or 'sell'")
+    wallet_id = data.get("wallet_id")
+    if wallet_id is not None and (isinstance(wallet_id, bool) or not isinstance(wallet_id, int)):
+        raise InvalidTrade("wallet_id must be an integer")
+    try:
+        timestamp = _parse_timestamp(data.get("timestamp"))
+        return {
+            "wallet_id": wallet_id,
+            "wallet_address": wallet_address,
+            "token_symbol": _optional_str(data, "token_symbol", 20),
+            "token_address": _optional_str(data, "token_address", 42),
+            "action": action,
+            "amount": _optional_float(data, "amount"),
+            "price": _optional_float(data, "price"),
+            "profit_loss": _optional_float(data, "profit_loss"),
+            "tx_hash": tx_hash,
+            "timestamp": timestamp,
+        }
+    except (ValueError, OverflowError, OSError) as e:
+        raise InvalidTrade(str(e))
+
+
+def insert_trades(connection, rows: List[dict]) -> Dict[str, int]:
+    """
+    Insert rows with multi-row INSERTs of up to MAX_INSERT_ROWS, skipping
+    tx_hash conflicts. Returns tx_hash -> id for the rows that were
+    actually inserted.
+    """
+    inserted: Dict[str, int] = {}
+    for start in range(0, len(rows), MAX_INSERT_ROWS):
+        inserted.update(_insert_chunk(connection, rows[start:start + MAX_INSERT_ROWS]))
+    return inserted
+
+
+def _insert_chunk(connection, rows: List[dict]) -> Dict[str, int]:
+    if not rows:
+        return {}
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = (
+            dialect_insert(Trade)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["tx_hash"])
+            .returning(Trade.tx_hash, Trade.id)
+        )
+        return dict(connection.execute(stmt).all())
+
+    # Generic fallback: filter out hashes that already exist
+    hashes = [row["tx_hash"] for row in rows]
+    existing = set(connection.execute(
+        select(Trade.tx_hash).where(Trade.tx_hash.in_(hashes))
+    ).scalars())
+    new_rows = [row for row in rows if row["tx_hash"] not in existing]
+    if not new_rows:
+        return {}
+    connection.execute(insert(Trade), new_rows)
+    return dict(connection.execute(
+        select(Trade.tx_hash, Trade.id).where(Trade.tx_hash.in_([row["tx_hash"] for row in new_rows]))
+    ).all())
+
+
+def id_ranges(ids: Sequence[int]) -> List[Tuple[int, int]]:
+    """[5, 6, 7, 9] -> [(5, 7), (9, 9)]: a batch's trade ids, compactly"""
+    ranges: List[Tuple[int, int]] = []
+    for trade_id in sorted(ids):
+        if ranges and trade_id == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], trade_id)
+        else:
+            ranges.append((trade_id, trade_id))
+    return ranges
+
+
+def load_trades_by_id(connection, ranges: Sequence[Sequence[int]]) -> List[dict]:
+    """Trade rows (ingest-shaped dicts) with ids in the given ranges, in id order"""
+    if not ranges:
+        return []
+    columns = [Trade.id] + [getattr(Trade, name) for name in TRADE_FIELDS]
+    query = (
+        select(*columns)
+        .where(or_(*(Trade.id.between(first, last) for first, last in ranges)))
+        .order_by(Trade.id)
+    )
+    return [row._asdict() for row in connection.execute(query)]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES):
+    """
+    Split a byte stream into lines without buffering the whole body.
+    Over-long lines are yielded as None so they count as rejected.
+    """
+    buffer = b""
+    skipping = False
+    async for chunk in chunks:
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            if skipping:
+                # Tail of an over-long line that was already reported
+                skipping = False
+                continue
+            yield line if len(line) <= max_line_bytes else None
+        if len(buffer) > max_line_bytes:
+            if not skipping:
+                yield None
+            skipping = True
+            buffer = b""
+    if buffer and not skipping:
+        yield buffer
+
+
+class BatchStats:
+    def __init__(self, batch: int):
+        self.batch = batch
+        self.received = 0
+        self.accepted = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "batch": self.batch,
+            "received": self.received,
+            "accepted": self.accepted,
+            "rejected": self.duplicates + self.invalid,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+        }
+
+
+async def ingest_ndjson(
+    chunks: AsyncIterator[bytes],
+    engine,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_accepted: Optional[Callable[[List[dict]], None]] = None,
+) -> dict:
+    """
+    Stream NDJSON trades into the Trade table in batches of `batch_size`.
+    Only one batch is held in memory at a time; each batch is written in
+    its own transaction on the async `engine`, and `on_accepted` runs on
+    a threadpool worker with the committed rows (their ids filled in).
+    """
+    async def write(rows: List[dict]) -> List[dict]:
+        async with engine.begin() as connection:
+            inserted = await connection.run_sync(insert_trades, rows)
+        accepted = [{**row, "id": inserted[row["tx_hash"]]} for row in rows if row["tx_hash"] in inserted]
+        if accepted and on_accepted is not None:
+            await run_in_threadpool(on_accepted, accepted)
+        return accepted
+
+    batches: List[dict] = []
+    stats = BatchStats(1)
+    pending = {}
+
+    async def flush():
+        nonlocal stats, pending
+        rows = list(pending.values())
+        accepted = await write(rows) if rows else []
+        stats.accepted = len(accepted)
+        stats.duplicates += len(rows) - len(accepted)
+        batches.append(stats.to_dict())
+        stats = BatchStats(stats.batch + 1)
+        pending = {}
+
+    async for line in iter_lines(chunks):
+        if line is not None and not line.strip():
+            continue
+        stats.received += 1
+        try:
+            if line is None:
+                raise InvalidTrade("line too long")
+            row = parse_trade(json.loads(line))
+        except (InvalidTrade, ValueError):
+            stats.invalid += 1
+        else:
+            if row["tx_hash"] in pending:
+                stats.duplicates += 1
+            else:
+                pending[row["tx_hash"]] = row
+        if stats.received >= batch_size:
+            await flush()
+
+    if stats.received:
+        await flush()
+
+    return {
+        "batches": batches,
+        "received": sum(b["received"] for b in batches),
+        "accepted": sum(b["accepted"] for b in batches),
+        "rejected": sum(b["rejected"] for b in batches),
+    }
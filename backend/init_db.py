@@ -3,7 +3,7 @@
 創建所有表結構並添加測試數據
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text
+from sqlalchemy import create_engine, Column, Integer, BigInteger, String, Float, DateTime, Boolean, Text, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta
@@ -29,10 +29,14 @@ class Wallet(Base):
 
 class Trade(Base):
     __tablename__ = 'trades'
+    __table_args__ = (
+        # 按錢包分頁查詢交易 (wallet_address, timestamp) 複合索引
+        Index('ix_trades_wallet_address_timestamp', 'wallet_address', 'timestamp'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     wallet_id = Column(Integer, index=True)
-    wallet_address = Column(String(42), index=True)
+    wallet_address = Column(String(42))
     token_symbol = Column(String(20))
     token_address = Column(String(42))
     action = Column(String(10))  # 'buy' or 'sell'
@@ -49,7 +53,8 @@ class User(Base):
     email = Column(String(255), unique=True, index=True)
     username = Column(String(50), unique=True)
     subscription_tier = Column(String(20), default='free')  # free, pro, enterprise
-    api_key = Column(String(64), unique=True)
+    api_key = Column(String(64), unique=True)  # 唯一約束即索引，API Key 驗證走索引查詢
+    password_hash = Column(String(128))  # pbkdf2_sha256$迭代次數$鹽$摘要
     created_at = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
 
@@ -64,6 +69,54 @@ class Alert(Base):
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+class StateChange(Base):
+    # API 進程內存狀態的變更日誌：所有 worker 按 id 順序重放，保持一致
+    __tablename__ = 'state_changes'
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(32), nullable=False)  # 'wallet.add', 'trades', 'alert_rule.add', ...
+    payload = Column(Text, nullable=False)  # JSON
+    origin = Column(String(32))  # 寫入進程的 ID
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class StateCheckpoint(Base):
+    # state_changes 重放結果的快照：新啟動的 worker 從最新快照的位置繼續重放
+    __tablename__ = 'state_checkpoints'
+
+    position = Column(Integer, primary_key=True)  # 快照包含的最後一條 state_changes.id
+    schema = Column(String(32), nullable=False)  # 內存結構的版本，不符的快照不載入
+    data = Column(LargeBinary, nullable=False)  # pickle
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class Job(Base):
+    # 後台任務（回測、跟單參數掃描）的狀態與結果：任一 worker 都可查詢、取消
+    __tablename__ = 'jobs'
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(32), nullable=False)  # 'backtest', 'copy_sweep'
+    active_key = Column(String(64), unique=True)  # 未完成時的去重鍵（如 'backtest:42'），結束後置空
+    status = Column(String(16), nullable=False)
+    data = Column(Text, nullable=False)  # JSON：任務詳情與結果
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Candle(Base):
+    # 按代幣的 OHLCV K 線：1m 由交易增量合併，1h / 1d 由細粒度逐級匯總
+    __tablename__ = 'candles'
+    __table_args__ = {'sqlite_with_rowid': False}  # 主鍵即存儲順序，時間範圍查詢連續讀取
+
+    token_symbol = Column(String(20), primary_key=True)
+    resolution = Column(Integer, primary_key=True)  # 桶寬（秒）: 60, 3600, 86400
+    bucket = Column(BigInteger, primary_key=True)  # 桶起點 unix 秒 (UTC)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    volume = Column(Float, nullable=False, default=0.0)  # 成交數量合計
+    trades = Column(Integer, nullable=False, default=0)
+    open_time = Column(BigInteger, nullable=False)  # 首筆 / 末筆成交時間，亂序合併時決定開收盤
+    close_time = Column(BigInteger, nullable=False)
+
 def init_db():
     """初始化數據庫並創建所有表"""
 
@@ -214,7 +267,58 @@ def seed_test_data():
 
     session.close()
 
+def generate_large_dataset(engine, wallets, trades, seed, batch_size):
+    """大規模合成數據（負載與基準測試用），使用批量寫入"""
+    from datagen import load_dataset
+
+    def progress(loaded, total):
+        print(f"\r  • 已寫入 {loaded:,} / {total:,} 筆交易", end="", flush=True)
+
+    print(f"\n🏭 生成合成數據: {wallets:,} 個錢包, {trades:,} 筆交易 (seed={seed})")
+    load_dataset(engine, wallets, trades, seed=seed, batch_size=batch_size, progress=progress)
+    print("\n✅ 合成數據生成完成！")
+
+def export_archive(engine, root, batch_size):
+    """將 trades 表導出為按日分區的列式存檔（歷史掃描用）"""
+    from archive import TradeArchive, export_trades
+
+    print(f"\n🗄️  導出交易到列式存檔: {root}")
+    archive = TradeArchive(root)
+    exported = export_trades(engine, archive, batch_size)
+    archive.compact()
+    print(f"✅ 已導出 {exported:,} 筆交易 ({len(archive.days())} 個日分區)")
+
+def build_candles(engine, batch_size):
+    """由 trades 表重建全部 K 線（1m / 1h / 1d）"""
+    from candles import rebuild_candles
+
+    print("\n🕯️  重建 K 線...")
+    counts = rebuild_candles(engine, batch_size)
+    print("✅ 已寫入 " + ", ".join(f"{name}: {count:,}" for name, count in counts.items()) + " 根 K 線")
+
+def export_serverless_snapshot(engine, path):
+    """導出 Serverless 入口 (api/index.py) 使用的 JSON 快照"""
+    from snapshot import export_snapshot
+
+    print(f"\n📸 導出 Serverless 快照: {path}")
+    snapshot = export_snapshot(engine, path)
+    print(f"✅ 已導出 {len(snapshot['wallets'])} 個錢包, {len(snapshot['leaderboard'])} 筆排行榜")
+
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Smart Money Tracker 數據庫初始化")
+    parser.add_argument("--generate", action="store_true",
+                        help="生成大規模合成數據（取代測試數據）；同一 seed 需在空的 trades 表上執行")
+    parser.add_argument("--wallets", type=int, default=100_000, help="合成錢包數量")
+    parser.add_argument("--trades", type=int, default=1_000_000, help="合成交易數量")
+    parser.add_argument("--seed", type=int, default=42, help="隨機種子（相同 seed 生成相同數據）")
+    parser.add_argument("--batch-size", type=int, default=100_000, help="每批寫入的交易數")
+    parser.add_argument("--archive", metavar="DIR", help="完成後將 trades 表導出到列式存檔目錄")
+    parser.add_argument("--candles", action="store_true", help="完成後由 trades 表重建 K 線")
+    parser.add_argument("--snapshot", metavar="PATH", help="完成後導出 Serverless 快照（如 ../api/snapshot.json）")
+    args = parser.parse_args()
+
     print("""
     ╔══════════════════════════════════════════════════════════════╗
     ║   Smart Money Tracker - 數據庫初始化                        ║
@@ -224,8 +328,21 @@ if __name__ == "__main__":
     # 初始化數據庫
     engine = init_db()
 
-    # 添加測試數據
-    seed_test_data()
+    if args.generate:
+        # 生成大規模合成數據
+        generate_large_dataset(engine, args.wallets, args.trades, args.seed, args.batch_size)
+    else:
+        # 添加測試數據
+        seed_test_data()
+
+    if args.archive:
+        export_archive(engine, args.archive, args.batch_size)
+
+    if args.candles:
+        build_candles(engine, args.batch_size)
+
+    if args.snapshot:
+        export_serverless_snapshot(engine, args.snapshot)
 
     print("""
     ╔══════════════════════════════════════════════════════════════╗
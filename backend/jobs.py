@@ -0,0 +1,367 @@
+"""
+Smart Money Tracker - Backtest Job Queue
+Runs backtests in a process pool so they never block the event loop,
+with job state kept in the database for every worker to see
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+import orjson
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from init_db import Job
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+UNFINISHED = (JOB_QUEUED, JOB_RUNNING)
+
+
+class QueueFullError(Exception):
+    """Raised when the number of pending jobs reached the queue bound"""
+
+
+def parse_job_time(value) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+class JobStore:
+    """
+    Job state in the jobs table, so a job started by one worker process
+    can be polled and cancelled through any other. An unfinished job
+    holds its `active_key` (e.g. "backtest:<wallet id>"), whose unique
+    constraint de-duplicates submissions across workers; finishing
+    clears it. A key held longer than `stale_after` belongs to a job
+    whose worker died, and is taken over.
+    """
+
+    def __init__(self, engine, stale_after: float = 3600.0, keep_finished: float = 86400.0):
+        self.engine = engine
+        self.stale_after = stale_after
+        self.keep_finished = keep_finished
+
+    def create(self, job_id: str, kind: str, data: dict, active_key: Optional[str] = None) -> str:
+        """Store a new job; returns its id, or that of the unfinished job holding `active_key`"""
+        now = datetime.utcnow()
+        with self.engine.begin() as conn:
+            conn.execute(delete(Job).where(
+                Job.status.notin_(UNFINISHED), Job.updated_at < now - timedelta(seconds=self.keep_finished)
+            ))
+        while True:
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(insert(Job).values(
+                        id=job_id, kind=kind, active_key=active_key, status=data["status"],
+                        data=orjson.dumps(data).decode(), created_at=now, updated_at=now,
+                    ))
+                return job_id
+            except IntegrityError:
+                if active_key is None:
+                    raise
+            with self.engine.begin() as conn:
+                holder = conn.execute(
+                    select(Job.id, Job.updated_at).where(Job.active_key == active_key)
+                ).first()
+                if holder is not None and holder.updated_at >= now - timedelta(seconds=self.stale_after):
+                    return holder.id
+                if holder is not None:
+                    conn.execute(update(Job).where(Job.id == holder.id).values(
+                        status=JOB_FAILED, active_key=None, updated_at=now
+                    ))
+            # The holder finished (or was abandoned) in between: try again
+
+    def save(self, job_id: str, data: dict) -> bool:
+        """
+        Store an unfinished job's new state. False if the job has
+        already finished, e.g. was cancelled through another worker.
+        """
+        values = {"status": data["status"], "data": orjson.dumps(data).decode(), "updated_at": datetime.utcnow()}
+        if data["status"] not in UNFINISHED:
+            values["active_key"] = None
+        with self.engine.begin() as conn:
+            result = conn.execute(update(Job).where(Job.id == job_id, Job.status.in_(UNFINISHED)).values(**values))
+        return result.rowcount > 0
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """Mark an unfinished job cancelled; returns the job's state, None if unknown"""
+        with self.engine.begin() as conn:
+            conn.execute(update(Job).where(Job.id == job_id, Job.status.in_(UNFINISHED)).values(
+                status=JOB_CANCELLED, active_key=None, updated_at=datetime.utcnow()
+            ))
+        return self.load(job_id)
+
+    def status(self, job_id: str) -> Optional[str]:
+        with self.engine.connect() as conn:
+            return conn.execute(select(Job.status).where(Job.id == job_id)).scalar()
+
+    def load(self, job_id: str) -> Optional[dict]:
+        """A job's last stored state (its status column wins over the JSON's)"""
+        with self.engine.connect() as conn:
+            row = conn.execute(select(Job.status, Job.data, Job.updated_at).where(Job.id == job_id)).first()
+        if row is None:
+            return None
+        data = orjson.loads(row.data)
+        if row.status != data["status"]:
+            data["status"] = row.status
+            data["finished_at"] = data.get("finished_at") or row.updated_at.isoformat()
+        return data
+
+
+# Per-process session factory, created lazily inside each worker
+_worker_sessions = None
+
+
+def _execute_backtest(database_url: str, wallet_id: int, wallet_address: str, grade: str) -> dict:
+    """Worker entry point: runs in a pool process with its own engine"""
+    global _worker_sessions
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from backtest import run_wallet_backtest
+
+    if _worker_sessions is None:
+        _worker_sessions = sessionmaker(bind=create_engine(database_url))
+    with _worker_sessions() as session:
+        return run_wallet_backtest(session, wallet_id, wallet_address, grade)
+
+
+class BacktestJob:
+    def __init__(self, wallet_id: int):
+        self.id = uuid.uuid4().hex
+        self.wallet_id = wallet_id
+        self.status = JOB_QUEUED
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.future = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BacktestJob":
+        """A job run by another worker, as last stored"""
+        job = cls(data["wallet_id"])
+        job.id = data["job_id"]
+        job.status = data["status"]
+        job.result = data["result"]
+        job.error = data["error"]
+        job.created_at = parse_job_time(data["created_at"])
+        job.finished_at = parse_job_time(data["finished_at"])
+        return job
+
+    def to_dict(self) -> dict:
+        status = self.status
+        # Still running while its result is being stored
+        if status == JOB_QUEUED and self.future is not None and not self.future.cancelled() \
+                and (self.future.running() or self.future.done()):
+            status = JOB_RUNNING
+        return {
+            "job_id": self.id,
+            "wallet_id": self.wallet_id,
+            "status": status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class BacktestJobQueue:
+    """
+    Bounded backtest queue backed by a process pool.
+
+    Jobs are de-duplicated per wallet: while a wallet has an unfinished
+    job, further submissions return that same job. Finished jobs are kept
+    (up to max_finished) so clients can poll for results.
+
+    Results are stored by `on_complete(job, result)` on a single consumer
+    thread, not on the pool's callback thread; a job only turns done once
+    that returned, with whatever it returned as the result. If storing
+    raises, the job fails with that error.
+
+    With a JobStore, jobs are also recorded in the database: the
+    per-wallet de-duplication then spans every worker, and jobs queued
+    by other workers can be polled and cancelled here (they read as
+    queued until they finish).
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        max_workers: Optional[int] = None,
+        max_pending: int = 256,
+        max_finished: int = 1024,
+        on_complete: Optional[Callable[[BacktestJob, dict], dict]] = None,
+        store: Optional[JobStore] = None,
+    ):
+        self.database_url = database_url
+        self.store = store
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.on_complete = on_complete
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._active: Dict[str, BacktestJob] = {}
+        self._active_by_wallet: Dict[int, BacktestJob] = {}
+        self._finished: "OrderedDict[str, BacktestJob]" = OrderedDict()
+        self._completed: "queue.Queue[Optional[BacktestJob]]" = queue.Queue()
+        self._consumer: Optional[threading.Thread] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def submit(self, wallet_id: int, wallet_address: str, grade: str) -> BacktestJob:
+        with self._lock:
+            existing = self._active_by_wallet.get(wallet_id)
+            if existing is not None:
+                return existing
+            if len(self._active) >= self.max_pending:
+                raise QueueFullError("Backtest queue is full")
+        job = BacktestJob(wallet_id)
+        if self.store is not None:
+            holder = self.store.create(job.id, "backtest", job.to_dict(), active_key=f"backtest:{wallet_id}")
+            if holder != job.id:
+                return self.get(holder)
+
+        with self._lock:
+            # Without a store, another thread may have submitted meanwhile
+            existing = self._active_by_wallet.get(wallet_id)
+            if existing is not None:
+                return existing
+            args = (self.database_url, wallet_id, wallet_address, grade)
+            try:
+                try:
+                    job.future = self._get_pool().submit(_execute_backtest, *args)
+                except BrokenProcessPool:
+                    # A worker died; replace the pool rather than failing forever
+                    self._pool = None
+                    job.future = self._get_pool().submit(_execute_backtest, *args)
+            except Exception as exc:
+                job.status, job.error = JOB_FAILED, str(exc)
+                self._save(job)
+                raise
+            self._active[job.id] = job
+            self._active_by_wallet[wallet_id] = job
+        job.future.add_done_callback(lambda future: self._finish(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[BacktestJob]:
+        with self._lock:
+            job = self._active.get(job_id) or self._finished.get(job_id)
+        if job is None and self.store is not None:
+            data = self.store.load(job_id)
+            return BacktestJob.from_dict(data) if data else None
+        return job
+
+    def cancel(self, job_id: str) -> Optional[BacktestJob]:
+        """
+        Cancel a job. Queued jobs never start; a job that is already
+        running finishes in its worker but its result is discarded.
+        """
+        with self._lock:
+            job = self._active.get(job_id)
+            if job is None:
+                job = self._finished.get(job_id)
+                if job is None and self.store is not None:
+                    data = self.store.cancel(job_id)
+                    return BacktestJob.from_dict(data) if data else None
+                return job
+            job.status = JOB_CANCELLED
+            self._retire(job)
+        job.future.cancel()
+        self._save(job)
+        return job
+
+    def _save(self, job: BacktestJob):
+        if self.store is not None:
+            self.store.save(job.id, job.to_dict())
+
+    def _finish(self, job: BacktestJob):
+        """Future done-callback: settle failures here, hand results to the consumer"""
+        with self._lock:
+            if job.status == JOB_CANCELLED:
+                return
+            future = job.future
+            if future.cancelled():
+                job.status = JOB_CANCELLED
+            elif future.exception() is not None:
+                job.status = JOB_FAILED
+                job.error = str(future.exception())
+            elif self.on_complete is None and self.store is None:
+                job.status = JOB_DONE
+                job.result = future.result()
+            else:
+                if self._consumer is None:
+                    self._consumer = threading.Thread(target=self._store_results, name="backtest-results", daemon=True)
+                    self._consumer.start()
+                self._completed.put(job)
+                return
+            self._retire(job)
+        self._save(job)
+
+    def _store_results(self):
+        while True:
+            job = self._completed.get()
+            if job is None:
+                return
+            if job.status == JOB_CANCELLED:
+                continue
+            if self.store is not None and self.store.status(job.id) == JOB_CANCELLED:
+                # Cancelled through another worker
+                with self._lock:
+                    job.status = JOB_CANCELLED
+                    self._retire(job)
+                continue
+            try:
+                result = job.future.result()
+                if self.on_complete is not None:
+                    result = self.on_complete(job, result)
+            except Exception as exc:
+                result, error = None, f"Storing the result failed: {exc}"
+            else:
+                error = None
+            with self._lock:
+                if job.status == JOB_CANCELLED:
+                    continue
+                if error is None:
+                    job.status = JOB_DONE
+                    job.result = result
+                else:
+                    job.status = JOB_FAILED
+                    job.error = error
+                self._retire(job)
+            self._save(job)
+
+    def _retire(self, job: BacktestJob):
+        """Move a job from the active set to the finished ring (lock held)"""
+        job.finished_at = datetime.now()
+        self._active.pop(job.id, None)
+        if self._active_by_wallet.get(job.wallet_id) is job:
+            del self._active_by_wallet[job.wallet_id]
+        self._finished[job.id] = job
+        while len(self._finished) > self.max_finished:
+            self._finished.popitem(last=False)
+
+    def shutdown(self):
+        if self._consumer is not None:
+            self._completed.put(None)
+            self._consumer = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
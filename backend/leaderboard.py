@@ -0,0 +1,127 @@
+"""
+Smart Money Tracker - Leaderboard Index
+Sorted per-metric indexes maintained incrementally as wallet stats change
+"""
+
+import base64
+import json
+import threading
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+# Every BacktestResult metric can be used as sort_by (higher ranks first)
+LEADERBOARD_METRICS = (
+    "annual_return_pct",
+    "sharpe_ratio",
+    "max_drawdown_pct",
+    "win_rate",
+    "total_trades",
+)
+
+
+def encode_cursor(key: Tuple[float, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        neg_value, address = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(neg_value), str(address)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class LeaderboardIndex:
+    """
+    Keeps one SortedList per metric of (-value, address) keys, so a page is
+    an O(log n + limit) slice and a rank lookup is O(log n).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        self._indexes = {metric: SortedList() for metric in LEADERBOARD_METRICS}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(entry: dict, metric: str) -> Tuple[float, str]:
+        value = float(entry.get(metric) or 0.0)
+        if value != value:  # NaN sorts last
+            value = float("-inf")
+        return -value, entry["address"].lower()
+
+    def upsert(self, entry: dict):
+        """Insert or replace a wallet's entry (keyed by address)"""
+        address = entry["address"].lower()
+        with self._lock:
+            old = self._entries.get(address)
+            if old is not None:
+                for metric, index in self._indexes.items():
+                    index.remove(self._key(old, metric))
+            self._entries[address] = entry
+            for metric, index in self._indexes.items():
+                index.add(self._key(entry, metric))
+
+    def update(self, address: str, **fields):
+        """Update some fields of an existing entry (no-op if untracked)"""
+        with self._lock:
+            old = self._entries.get(address.lower())
+            if old is not None and not fields.keys() & self._indexes.keys():
+                # Nothing sorted changes; skip re-indexing
+                self._entries[address.lower()] = {**old, **fields}
+                return
+        if old is not None:
+            self.upsert({**old, **fields})
+
+    def get(self, address: str) -> Optional[dict]:
+        with self._lock:
+            return self._entries.get(address.lower())
+
+    def entries(self) -> List[dict]:
+        """Snapshot of every entry, in no particular order"""
+        with self._lock:
+            return list(self._entries.values())
+
+    def remove(self, address: str):
+        address = address.lower()
+        with self._lock:
+            old = self._entries.pop(address, None)
+            if old is not None:
+                for metric, index in self._indexes.items():
+                    index.remove(self._key(old, metric))
+
+    def page(
+        self,
+        sort_by: str,
+        limit: int,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Return up to `limit` ranked entries and the cursor for the next page.
+        A cursor (from a previous page) takes precedence over offset.
+        """
+        index = self._indexes[sort_by]
+        with self._lock:
+            start = index.bisect_right(decode_cursor(cursor)) if cursor else offset
+            keys = list(islice(index.islice(start), limit))
+            rows = [
+                {"rank": start + i + 1, **self._entries[address]}
+                for i, (_, address) in enumerate(keys)
+            ]
+            has_more = start + len(keys) < len(index)
+        next_cursor = encode_cursor(keys[-1]) if keys and has_more else None
+        return rows, next_cursor
+
+    def rank(self, address: str, sort_by: str) -> Optional[dict]:
+        """Return the entry for one address with its 1-based rank"""
+        with self._lock:
+            entry = self._entries.get(address.lower())
+            if entry is None:
+                return None
+            position = self._indexes[sort_by].index(self._key(entry, sort_by))
+            return {"rank": position + 1, "total": len(self._entries), **entry}
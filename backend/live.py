@@ -0,0 +1,145 @@
+"""
+Smart Money Tracker - Live Transaction Push
+Fan-out of new transactions to SSE / WebSocket subscribers with
+bounded per-connection buffers
+"""
+
+import asyncio
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from cache import json_bytes
+
+HEARTBEAT_SECONDS = 15.0
+
+
+class HubFullError(Exception):
+    """Raised when the hub is at its connection limit"""
+
+
+class LiveMessage:
+    """One event serialized once, in every wire format, for all subscribers"""
+    __slots__ = ("sse", "ws")
+
+    def __init__(self, event: str, payload, event_id: Optional[int] = None):
+        data = json_bytes(payload).decode()
+        head = f"id: {event_id}\n" if event_id is not None else ""
+        self.sse = f"{head}event: {event}\ndata: {data}\n\n"
+        self.ws = f'{{"event":"{event}","data":{data}}}'
+
+
+class Subscriber:
+    """
+    One connection's bounded outbox. When it is full the oldest message
+    is dropped and counted, so a slow client loses history rather than
+    holding up publishers; it is told how many it missed on its next read.
+    """
+
+    def __init__(self, wallet_ids: Iterable[int], user_id: Optional[int], max_buffer: int):
+        self.wallet_ids = frozenset(wallet_ids)
+        self.user_id = user_id
+        self._buffer: deque = deque(maxlen=max_buffer)
+        self._ready = asyncio.Event()
+        self.dropped = 0
+        self.closed = False
+        # Still indexed by the hub
+        self.registered = True
+
+    def offer(self, message: LiveMessage):
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(message)
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    async def drain(self, timeout: float = HEARTBEAT_SECONDS) -> Tuple[List[LiveMessage], int]:
+        """Wait up to `timeout` for messages; return them and the drop count"""
+        if not self._buffer and not self.closed:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return [], 0
+        self._ready.clear()
+        messages = list(self._buffer)
+        self._buffer.clear()
+        dropped, self.dropped = self.dropped, 0
+        return messages, dropped
+
+
+class LiveHub:
+    """
+    Subscribers indexed by wallet id and by user id (a user's whole
+    watchlist). Publishing looks up only the interested connections and
+    appends to their buffers without awaiting any of them.
+
+    publish() must run on the event loop; record paths running in the
+    threadpool use publish_threadsafe().
+    """
+
+    def __init__(self, max_buffer: int = 256, max_connections: int = 10_000):
+        self.max_buffer = max_buffer
+        self.max_connections = max_connections
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._by_wallet: Dict[int, Set[Subscriber]] = {}
+        self._by_user: Dict[int, Set[Subscriber]] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def subscribe(self, wallet_ids: Iterable[int] = (), user_id: Optional[int] = None) -> Subscriber:
+        if self._count >= self.max_connections:
+            raise HubFullError("too many live connections")
+        subscriber = Subscriber(wallet_ids, user_id, self.max_buffer)
+        for wallet_id in subscriber.wallet_ids:
+            self._by_wallet.setdefault(wallet_id, set()).add(subscriber)
+        if user_id is not None:
+            self._by_user.setdefault(user_id, set()).add(subscriber)
+        self._count += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        if not subscriber.registered:
+            return
+        subscriber.registered = False
+        for wallet_id in subscriber.wallet_ids:
+            self._discard(self._by_wallet, wallet_id, subscriber)
+        if subscriber.user_id is not None:
+            self._discard(self._by_user, subscriber.user_id, subscriber)
+        subscriber.close()
+        self._count -= 1
+
+    def close_all(self):
+        """Wake and close every connection (shutdown)"""
+        for subscribers in (*self._by_wallet.values(), *self._by_user.values()):
+            for subscriber in subscribers:
+                subscriber.registered = False
+                subscriber.close()
+        self._by_wallet.clear()
+        self._by_user.clear()
+        self._count = 0
+
+    @staticmethod
+    def _discard(index: Dict[int, Set[Subscriber]], key: int, subscriber: Subscriber):
+        subscribers = index.get(key)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del index[key]
+
+    def publish(self, events: List[Tuple[int, int, LiveMessage]]):
+        """Fan out (wallet_id, user_id, message) events to their subscribers"""
+        for wallet_id, user_id, message in events:
+            targets = self._by_wallet.get(wallet_id, set()) | self._by_user.get(user_id, set())
+            for subscriber in targets:
+                subscriber.offer(message)
+
+    def publish_threadsafe(self, events: List[Tuple[int, int, LiveMessage]]):
+        if events and self._loop is not None and self._count:
+            self._loop.call_soon_threadsafe(self.publish, events)
@@ -3,19 +3,70 @@ Smart Money Tracker - FastAPI Backend
 Main application entry point
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr
-from typing import List, Optional
-from datetime import datetime
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import numpy as np
+import os
+import time
 import uvicorn
 
+import init_db
+from alerts import ALERT_TYPES, AlertEngine, AlertWriter
+from auth import (ApiKeyAuth, ApiKeyCache, AuthMiddleware, RateLimiter, generate_api_key,
+                  hash_password, verify_password)
+from backtest import EPOCH, run_wallet_backtest_async
+from cache import ResponseCache, RowCache, json_bytes, json_response
+from candles import RESOLUTION_SECONDS as CANDLE_RESOLUTIONS, CandleStore, query_candles
+from copytrade import DEFAULT_GRID as COPY_SWEEP_GRID, SWEEP_METRICS, CopySweepRunner
+from cotrading import SIDES as COTRADING_SIDES, CoTradingDetector, load_trade_columns
+from dashboard import DashboardAggregates
+from grading import DEFAULT_GRADE, GRADE_WEIGHTS, MIN_GRADED_TRADES, WalletGrader
+from database import DATABASE_URL, SessionLocal, async_engine, engine, get_async_db
+from ingest import DEFAULT_BATCH_SIZE, id_ranges, ingest_ndjson, load_trades_by_id
+from jobs import BacktestJobQueue, JobStore, QueueFullError
+from leaderboard import LEADERBOARD_METRICS, LeaderboardIndex
+from live import HubFullError, LiveHub, LiveMessage
+from metrics import MetricsMiddleware, SamplingProfiler, default_metrics, instrument_engine
+from money import cents_to_usd, format_quantity, format_usd, to_cents
+from pnl_window import WINDOWS as PNL_WINDOWS, RollingPnL
+from state_log import ChangeCounter, StateLog, StateSyncMiddleware, default_counter_path
+from transaction_store import TransactionStore, query_trades_page_async
+from wallet_search import MAX_SEARCH_RESULTS as MAX_WALLET_SEARCH_RESULTS
+from wallet_store import WalletStore
+
 app = FastAPI(
     title="Smart Money Tracker API",
     description="API for tracking professional crypto trader wallets",
     version="1.0.0"
 )
 
+# API keys (Bearer or X-API-Key) resolved through a short-TTL cache and
+# per-tier rate limits on /api/*. Added before CORS so it runs inside it
+# and 401/429 answers still carry CORS headers.
+api_key_auth = ApiKeyAuth(async_engine, ApiKeyCache(ttl=float(os.getenv("API_KEY_CACHE_TTL", "60"))))
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+rate_limiter = RateLimiter() if RATE_LIMIT_ENABLED else None
+app.add_middleware(AuthMiddleware, auth=api_key_auth, limiter=rate_limiter)
+# Owner of the mock wallets below; account ids start at 1, so no real
+# user ever gets it
+DEMO_USER_ID = 0
+# Opt-in: requests without an api key act as this user (e.g. 0 to browse
+# the demo data). Unset, they get 401 on user-scoped routes. Only ids no
+# account can have (<= 0) are accepted.
+ANONYMOUS_USER_ID = int(os.environ["ANONYMOUS_USER_ID"]) if os.getenv("ANONYMOUS_USER_ID") else None
+if ANONYMOUS_USER_ID is not None and ANONYMOUS_USER_ID > 0:
+    raise RuntimeError("ANONYMOUS_USER_ID must not be a real user's id; use 0 or a negative id")
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -25,6 +76,75 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request / DB / backtest timings, exposed at /metrics. Setting
+# PROFILING_ENABLED lets a request opt into sampling with `X-Profile: 1`.
+metrics = default_metrics()
+profiler = SamplingProfiler() if os.getenv("PROFILING_ENABLED", "").lower() in ("1", "true", "yes") else None
+app.add_middleware(MetricsMiddleware, metrics=metrics, profiler=profiler)
+instrument_engine(metrics, engine, "sync")
+instrument_engine(metrics, async_engine.sync_engine, "async")
+STARTED_AT = datetime.now(timezone.utc)
+
+def create_schema(attempts: int = 5):
+    """
+    Create missing tables, indexes and columns. Workers starting together
+    race on the same DDL; the loser's "already exists" error is retried,
+    and the retry's existence checks then see the winner's objects.
+    """
+    for attempt in range(attempts):
+        try:
+            init_db.Base.metadata.create_all(bind=engine)
+            # create_all skips indexes on tables that already exist
+            for index in init_db.Trade.__table__.indexes:
+                index.create(bind=engine, checkfirst=True)
+            # ...or columns
+            if "password_hash" not in {column["name"] for column in inspect(engine).get_columns("users")}:
+                with engine.begin() as conn:
+                    conn.execute(text("ALTER TABLE users ADD COLUMN password_hash VARCHAR(128)"))
+            return
+        except DBAPIError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.05 * (attempt + 1))
+
+@app.on_event("startup")
+async def create_tables():
+    """Make sure the trade tables exist before serving"""
+    create_schema()
+
+    # Start from the newest checkpoint, then catch up on the changes
+    # logged after it
+    await run_in_threadpool(state_log.restore)
+    await run_in_threadpool(state_log.sync, True)
+
+    loop = asyncio.get_running_loop()
+    live_hub.bind(loop)
+    app.state.state_syncer = loop.create_task(sync_state_periodically())
+    app.state.pnl_refresher = loop.create_task(refresh_pnl_periodically())
+    app.state.alert_flusher = loop.create_task(flush_alerts_periodically())
+    app.state.candle_flusher = loop.create_task(flush_candles_periodically())
+    app.state.grader = loop.create_task(regrade_periodically())
+    if STATE_CHECKPOINT_SECONDS > 0:
+        app.state.checkpointer = loop.create_task(checkpoint_state_periodically())
+    if COTRADING_BACKFILL_DAYS > 0:
+        app.state.cotrading_backfill = loop.run_in_executor(None, backfill_cotrading, COTRADING_BACKFILL_DAYS)
+
+@app.on_event("shutdown")
+async def stop_background_work():
+    backtest_jobs.shutdown()
+    copy_sweeps.shutdown()
+    app.state.pnl_refresher.cancel()
+    app.state.alert_flusher.cancel()
+    app.state.candle_flusher.cancel()
+    app.state.grader.cancel()
+    app.state.state_syncer.cancel()
+    if STATE_CHECKPOINT_SECONDS > 0:
+        app.state.checkpointer.cancel()
+    live_hub.close_all()
+    await run_in_threadpool(alert_writer.flush)
+    await run_in_threadpool(candle_store.flush)
+    await async_engine.dispose()
+
 # ============================================
 # Data Models
 # ============================================
@@ -55,7 +175,8 @@ class Wallet(BaseModel):
     user_id: int
     address: str
     name: Optional[str]
-    balance: str
+    balance: str  # display, e.g. "$2,347,891"
+    balance_cents: int
     pnl_24h: float
     pnl_7d: float
     pnl_30d: float
@@ -70,10 +191,50 @@ class Transaction(BaseModel):
     wallet_name: str
     tx_type: str  # BUY, SELL, SWAP
     token: str
-    amount: str
-    value: str
+    quantity: float
+    value_cents: int
+    amount: str  # display, e.g. "15.5 ETH"
+    value: str  # display, e.g. "$42,350"
     timestamp: datetime
 
+class AlertRuleCreate(BaseModel):
+    wallet_address: str
+    alert_type: str  # large_trade, new_position, profit_milestone
+    threshold: float = 0.0  # USD: trade value or cumulative profit
+
+class AlertRule(AlertRuleCreate):
+    id: int
+    user_id: int
+    created_at: datetime
+
+class AlertOut(BaseModel):
+    id: int
+    wallet_address: str
+    alert_type: str
+    message: str
+    is_read: bool
+    created_at: datetime
+
+class CoTradingSignal(BaseModel):
+    id: int
+    token_address: str
+    token_symbol: Optional[str]
+    side: str  # buy, sell
+    wallets: List[str]  # first 100 wallets to join the cluster
+    wallet_count: int
+    trade_count: int
+    first_trade_at: datetime
+    last_trade_at: datetime
+
+class CopySweepCreate(BaseModel):
+    wallets: int = 500  # best-ranked wallets to choose the followed ones from
+    days: Optional[float] = None  # history to replay; default all of it
+    entry_delays_seconds: List[int] = COPY_SWEEP_GRID["entry_delays_seconds"]
+    stop_loss_pcts: List[float] = COPY_SWEEP_GRID["stop_loss_pcts"]  # 0: no stop
+    follow_top: List[int] = COPY_SWEEP_GRID["follow_top"]
+    sizing: List[str] = COPY_SWEEP_GRID["sizing"]  # fixed, conviction
+    position_pcts: List[float] = COPY_SWEEP_GRID["position_pcts"]
+
 class BacktestResult(BaseModel):
     wallet_id: int
     annual_return_pct: float
@@ -88,7 +249,6 @@ class BacktestResult(BaseModel):
 # ============================================
 
 # Mock data storage
-users_db = []
 wallets_db = []
 transactions_db = []
 
@@ -96,10 +256,10 @@ transactions_db = []
 mock_wallets = [
     {
         "id": 1,
-        "user_id": 1,
+        "user_id": DEMO_USER_ID,
         "address": "0x742d35Cc6634C0532925a3b844Bc9e7595f0a4B2",
         "name": "DeFi Whale",
-        "balance": "$2,347,891",
+        "balance_cents": to_cents("$2,347,891"),
         "pnl_24h": 12.4,
         "pnl_7d": 38.7,
         "pnl_30d": 156.3,
@@ -110,10 +270,10 @@ mock_wallets = [
     },
     {
         "id": 2,
-        "user_id": 1,
+        "user_id": DEMO_USER_ID,
         "address": "0x9f3c8E3C8d8E3f8e8C8D8E3F8E8C8D8E3F8E7E21",
         "name": "Smart Trader",
-        "balance": "$1,892,453",
+        "balance_cents": to_cents("$1,892,453"),
         "pnl_24h": 8.9,
         "pnl_7d": 25.2,
         "pnl_30d": 118.6,
@@ -131,8 +291,8 @@ mock_transactions = [
         "wallet_name": "DeFi Whale",
         "tx_type": "BUY",
         "token": "ETH",
-        "amount": "15.5 ETH",
-        "value": "$42,350",
+        "quantity": 15.5,
+        "value_cents": to_cents(42_350),
         "timestamp": datetime.now()
     },
     {
@@ -141,12 +301,432 @@ mock_transactions = [
         "wallet_name": "Smart Trader",
         "tx_type": "SELL",
         "token": "UNI",
-        "amount": "2,500 UNI",
-        "value": "$18,750",
+        "quantity": 2500.0,
+        "value_cents": to_cents(18_750),
         "timestamp": datetime.now()
     }
 ]
 
+# Indexed by id, address and user_id
+wallet_store = WalletStore(mock_wallets)
+
+# Money is stored as numbers; display strings are added only on the way out
+def present_wallet(wallet: dict) -> dict:
+    return {**wallet, "balance": format_usd(wallet["balance_cents"])}
+
+def present_transaction(tx: dict) -> dict:
+    return {
+        **tx,
+        "amount": format_quantity(tx["quantity"], tx["token"]),
+        "value": format_usd(tx["value_cents"])
+    }
+
+# Transactions never change once recorded, so each row is encoded once
+transaction_rows = RowCache(present_transaction, max_rows=int(os.getenv("TX_ROW_CACHE_SIZE", "100000")))
+
+# Serialized GET responses; writes invalidate by tag (wallet:<id>, user:<id>, leaderboard)
+response_cache = ResponseCache(
+    max_bytes=int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    ttl=float(os.getenv("CACHE_TTL_SECONDS", "5")),
+)
+
+def wallet_tags(wallet: dict) -> tuple:
+    """Cache tags touched by a change to this wallet"""
+    return (f"wallet:{wallet['id']}", f"user:{wallet['user_id']}")
+
+# Last known backtest stats for the mock wallets
+mock_backtest_stats = {
+    1: {
+        "annual_return_pct": 287.4,
+        "sharpe_ratio": 3.2,
+        "max_drawdown_pct": -12.5,
+        "win_rate": 78.3,
+        "total_trades": 342
+    },
+    2: {
+        "annual_return_pct": 215.8,
+        "sharpe_ratio": 2.8,
+        "max_drawdown_pct": -18.2,
+        "win_rate": 72.1,
+        "total_trades": 198
+    }
+}
+
+def leaderboard_entry(wallet: dict, stats: dict) -> dict:
+    """Build a leaderboard entry from a wallet and its backtest stats"""
+    return {
+        "address": wallet["address"],
+        "name": wallet["name"],
+        **{metric: stats.get(metric, 0) for metric in LEADERBOARD_METRICS},
+        "grade": stats.get("grade", wallet["grade"]),
+        "tags": wallet["tags"]
+    }
+
+leaderboard = LeaderboardIndex()
+for _wallet in wallet_store:
+    leaderboard.upsert(leaderboard_entry(_wallet, mock_backtest_stats.get(_wallet["id"], {})))
+
+# Percentile grades: every wallet re-graded on a schedule, single wallets
+# placed against the last run as soon as their backtest changes
+grader = WalletGrader()
+GRADE_REFRESH_SECONDS = int(os.getenv("GRADE_REFRESH_SECONDS", "300"))
+
+def apply_grade(address: str, grade: str):
+    leaderboard.update(address, grade=grade)
+    for wallet in wallet_store.get_by_address(address):
+        if wallet["grade"] != grade:
+            wallet["grade"] = grade
+            response_cache.invalidate(*wallet_tags(wallet))
+
+def regrade_wallets():
+    """Re-grade every leaderboard wallet in one vectorized pass"""
+    entries = leaderboard.entries()
+    if not entries:
+        return
+    columns = {
+        metric: np.fromiter((entry[metric] or 0.0 for entry in entries), dtype=np.float64, count=len(entries))
+        for metric, _ in GRADE_WEIGHTS
+    }
+    total_trades = np.fromiter((entry["total_trades"] or 0 for entry in entries), dtype=np.int64, count=len(entries))
+    grades = grader.fit(columns, total_trades).tolist()
+    changed = [(entry["address"], grade) for entry, grade in zip(entries, grades) if entry["grade"] != grade]
+    for address, grade in changed:
+        apply_grade(address, grade)
+    if changed:
+        response_cache.invalidate("leaderboard")
+
+async def regrade_periodically():
+    while True:
+        await asyncio.sleep(GRADE_REFRESH_SECONDS)
+        await run_in_threadpool(regrade_wallets)
+
+def record_backtest_result(result: dict) -> dict:
+    """
+    Feed a finished backtest into the leaderboard indexes and re-grade the
+    wallet. Too few trades to grade (e.g. none recorded yet) keeps the
+    previous grade and leaderboard stats rather than resetting them.
+    """
+    wallet = wallet_store.get(result["wallet_id"])
+    if wallet and (result.get("total_trades") or 0) < MIN_GRADED_TRADES:
+        result["grade"] = wallet["grade"]
+    elif wallet:
+        result["grade"] = grader.grade(result) or result["grade"]
+        leaderboard.upsert(leaderboard_entry(wallet, result))
+        apply_grade(wallet["address"], result["grade"])
+        response_cache.invalidate("leaderboard")
+    return result
+
+# Time-ordered per-wallet feed
+transaction_store = TransactionStore(mock_transactions)
+
+# Per-user running totals behind /api/stats/dashboard
+dashboard = DashboardAggregates()
+for _wallet in wallet_store:
+    dashboard.add_wallet(_wallet)
+for _tx in mock_transactions:
+    dashboard.record_transaction(wallet_store.get(_tx["wallet_id"])["user_id"], _tx["timestamp"])
+
+# Rolling 24h / 7d / 30d profit behind each wallet's pnl_* fields
+pnl_engine = RollingPnL()
+PNL_REFRESH_SECONDS = int(os.getenv("PNL_REFRESH_SECONDS", "60"))
+
+def apply_pnl_windows(wallet_ids, window_sums, window_volumes):
+    """
+    Write window profits onto wallets as % of balance, keeping the
+    dashboard in sync. Wallets without a known balance (e.g. added
+    through the API) use the notional they traded in the window instead.
+    Only wallets whose values changed are touched and have their cached
+    responses invalidated.
+    """
+    for wallet_id, sums, volumes in zip(wallet_ids, window_sums, window_volumes):
+        wallet = wallet_store.get(wallet_id)
+        if not wallet:
+            continue
+        balance = cents_to_usd(wallet["balance_cents"])
+        values = {}
+        for (window, _, _), profit, volume in zip(PNL_WINDOWS, sums, volumes):
+            base = balance if balance > 0 else volume
+            values[window] = round(profit / base * 100, 2) if base > 0 else 0.0
+        if all(wallet[window] == value for window, value in values.items()):
+            continue
+        old = dict(wallet)
+        wallet.update(values)
+        dashboard.update_wallet(old, wallet)
+        response_cache.invalidate(*wallet_tags(wallet))
+
+def refresh_pnl_windows():
+    """Expire old buckets and refresh every wallet with trade history"""
+    pnl_engine.advance()
+    wallet_ids, window_sums, window_volumes = pnl_engine.snapshot()
+    apply_pnl_windows(wallet_ids.tolist(), window_sums.tolist(), window_volumes.tolist())
+
+async def refresh_pnl_periodically():
+    while True:
+        await asyncio.sleep(PNL_REFRESH_SECONDS)
+        await run_in_threadpool(refresh_pnl_windows)
+
+def record_trades(trades: List[dict], local: bool = True):
+    """
+    Publish newly stored trades to the feeds of wallets tracking them.
+    Every worker evaluates alerts to keep rule state in step; only the
+    one that ingested the trades (`local`) writes the Alert rows and
+    candles.
+    """
+    pnl_wallets, pnl_times, pnl_values, pnl_volumes = [], [], [], []
+    live_events = []
+    cotrading.process(trades)
+    if local:
+        # Replay must not do I/O; the periodic flush writes the buffer
+        candle_store.add(trades, flush=False)
+    for trade in trades:
+        for wallet in wallet_store.get_by_address(trade["wallet_address"]):
+            pnl_wallets.append(wallet["id"])
+            pnl_times.append((trade["timestamp"] - EPOCH).total_seconds())
+            pnl_values.append(trade["profit_loss"] or 0.0)
+            token = trade["token_symbol"] or "?"
+            amount = trade["amount"] or 0.0
+            pnl_volumes.append(amount * (trade["price"] or 0.0))
+            tx = {
+                "id": transaction_store.allocate_id(),
+                "wallet_id": wallet["id"],
+                "wallet_name": wallet["name"],
+                "tx_type": (trade["action"] or "swap").upper(),
+                "token": token,
+                "quantity": amount,
+                "value_cents": to_cents(amount * (trade["price"] or 0.0)),
+                "timestamp": trade["timestamp"]
+            }
+            transaction_store.add(tx)
+            if len(live_hub):
+                message = LiveMessage("transaction", present_transaction(tx), tx["id"])
+                live_events.append((wallet["id"], wallet["user_id"], message))
+            dashboard.record_transaction(wallet["user_id"], trade["timestamp"])
+            response_cache.invalidate(*wallet_tags(wallet))
+
+    live_hub.publish_threadsafe(live_events)
+
+    if pnl_wallets:
+        pnl_engine.add_trades(pnl_wallets, pnl_times, pnl_values, pnl_volumes)
+        touched = list(dict.fromkeys(pnl_wallets))
+        apply_pnl_windows(touched, [pnl_engine.windows(w).values() for w in touched],
+                          [pnl_engine.volumes(w).values() for w in touched])
+
+    alerts = alert_engine.evaluate(trades)
+    if alerts:
+        if local:
+            alert_writer.add(alerts, flush=False)
+        for alert in alerts:
+            dashboard.record_alert(alert["user_id"], alert["created_at"])
+        response_cache.invalidate(*{f"user:{alert['user_id']}" for alert in alerts})
+
+# Clusters of wallets trading the same token on the same side within a window
+cotrading = CoTradingDetector(
+    window_seconds=float(os.getenv("COTRADING_WINDOW_SECONDS", "300")),
+    min_wallets=int(os.getenv("COTRADING_MIN_WALLETS", "3")),
+    max_signals=int(os.getenv("COTRADING_MAX_SIGNALS", "10000")),
+)
+COTRADING_BACKFILL_DAYS = float(os.getenv("COTRADING_BACKFILL_DAYS", "0"))
+
+def backfill_cotrading(days: float) -> int:
+    """Detect signals in the last `days` of stored trades (runs off the event loop at startup)"""
+    columns = load_trade_columns(engine, since=datetime.utcnow() - timedelta(days=days))
+    return cotrading.backfill(columns)
+
+# Per-token 1m / 1h / 1d OHLCV candles, merged into the candles table
+candle_store = CandleStore(engine, batch_size=int(os.getenv("CANDLE_BATCH_SIZE", "5000")))
+CANDLE_FLUSH_SECONDS = float(os.getenv("CANDLE_FLUSH_SECONDS", "1"))
+
+async def flush_candles_periodically():
+    while True:
+        await asyncio.sleep(CANDLE_FLUSH_SECONDS)
+        if len(candle_store):
+            await run_in_threadpool(candle_store.flush)
+
+# Live transaction push (SSE / WebSocket)
+live_hub = LiveHub(
+    max_buffer=int(os.getenv("LIVE_BUFFER_SIZE", "256")),
+    max_connections=int(os.getenv("LIVE_MAX_CONNECTIONS", "10000")),
+)
+
+# Users' alert rules, matched against every stored trade
+alert_engine = AlertEngine()
+alert_writer = AlertWriter(engine, batch_size=int(os.getenv("ALERT_BATCH_SIZE", "500")))
+ALERT_FLUSH_SECONDS = float(os.getenv("ALERT_FLUSH_SECONDS", "1"))
+
+async def flush_alerts_periodically():
+    while True:
+        await asyncio.sleep(ALERT_FLUSH_SECONDS)
+        if len(alert_writer):
+            await run_in_threadpool(alert_writer.flush)
+
+# Job state shared by every worker, so any of them can poll or cancel a job
+job_store = JobStore(engine)
+
+# Backtest jobs run in worker processes, never on the request thread
+backtest_jobs = BacktestJobQueue(
+    DATABASE_URL,
+    max_workers=int(os.getenv("BACKTEST_WORKERS", "0")) or None,
+    max_pending=int(os.getenv("BACKTEST_QUEUE_SIZE", "256")),
+    on_complete=lambda job, result: backtest_job_done(job, result),
+    store=job_store,
+)
+
+# Copy-trading parameter sweeps: trades loaded once, combinations simulated in a process pool
+copy_sweeps = CopySweepRunner(
+    engine,
+    max_workers=int(os.getenv("COPY_SWEEP_WORKERS", "0")) or None,
+    max_active=int(os.getenv("COPY_SWEEP_MAX_ACTIVE", "2")),
+    store=job_store,
+)
+
+def backtest_job_done(job, result: dict) -> dict:
+    """Store a job's result (runs on the queue's consumer thread); returns it re-graded"""
+    metrics.observe("backtest_duration_seconds", (("mode", "job"),),
+                    (datetime.now() - job.created_at).total_seconds())
+    return state_log.append("backtest", result)
+
+# ============================================
+# Shared State (multi-worker)
+# ============================================
+
+# The stores above live in each worker process. Every mutation goes
+# through state_log: appended to the state_changes table, then applied by
+# replaying the log in order here and in every other worker.
+
+def add_wallet(wallet: dict) -> dict:
+    wallet_id = wallet_store.allocate_id()
+    new_wallet = {
+        "id": wallet_id,
+        "user_id": wallet["user_id"],
+        "address": wallet["address"],
+        "name": wallet["name"] or f"Wallet {wallet_id}",
+        "balance_cents": 0,
+        "pnl_24h": 0.0,
+        "pnl_7d": 0.0,
+        "pnl_30d": 0.0,
+        "grade": DEFAULT_GRADE,
+        "last_activity": "Just added",
+        "tags": wallet["tags"],
+        "created_at": datetime.fromisoformat(wallet["created_at"])
+    }
+    # An address someone already tracks keeps its backtest stats and grade
+    ranked = leaderboard.get(new_wallet["address"])
+    if ranked is not None:
+        new_wallet["grade"] = ranked["grade"]
+    wallet_store.add(new_wallet)
+    dashboard.add_wallet(new_wallet)
+    if ranked is None:
+        leaderboard.upsert(leaderboard_entry(new_wallet, {}))
+    response_cache.invalidate(*wallet_tags(new_wallet), "leaderboard")
+    return new_wallet
+
+def remove_wallet(wallet_id: int) -> Optional[dict]:
+    wallet = wallet_store.remove(wallet_id)
+    if not wallet:
+        return None
+    # Another user may still track the same address
+    if not wallet_store.get_by_address(wallet["address"]):
+        leaderboard.remove(wallet["address"])
+    transaction_store.remove_wallet(wallet_id)
+    dashboard.remove_wallet(wallet)
+    pnl_engine.remove(wallet_id)
+    response_cache.invalidate(*wallet_tags(wallet), "leaderboard")
+    return wallet
+
+def load_logged_trades(payload: dict) -> dict:
+    """Resolve a "trades" entry's id ranges to the stored rows"""
+    if "ranges" in payload:
+        with engine.connect() as conn:
+            return {"trades": load_trades_by_id(conn, payload["ranges"])}
+    # Entries logged before trades were referenced by id carry the rows
+    for trade in payload["trades"]:
+        trade["timestamp"] = datetime.fromisoformat(trade["timestamp"])
+    return payload
+
+def add_alert_rule(rule: dict) -> dict:
+    return alert_engine.add_rule(rule["user_id"], rule["wallet_address"], rule["alert_type"],
+                                 rule["threshold"], created_at=datetime.fromisoformat(rule["created_at"]))
+
+STATE_HANDLERS = {
+    "wallet.add": lambda payload, local: add_wallet(payload),
+    "wallet.remove": lambda payload, local: remove_wallet(payload["id"]),
+    "trades": lambda payload, local: record_trades(payload["trades"], local),
+    "alert_rule.add": lambda payload, local: add_alert_rule(payload),
+    "alert_rule.remove": lambda payload, local: alert_engine.remove_rule(payload["id"]),
+    "backtest": lambda payload, local: record_backtest_result(payload),
+}
+
+# Entries that only reference rows stored elsewhere, loaded before apply
+STATE_LOADERS = {
+    "trades": load_logged_trades,
+}
+
+def apply_state_change(kind: str, payload: dict, local: bool):
+    return STATE_HANDLERS[kind](payload, local)
+
+def prepare_state_change(kind: str, payload: dict) -> dict:
+    loader = STATE_LOADERS.get(kind)
+    return loader(payload) if loader else payload
+
+# Everything the handlers above build; bump STATE_SCHEMA when any of these
+# stores changes shape, so older checkpoints are ignored
+STATE_SCHEMA = "1"
+
+def dump_stores() -> dict:
+    return {
+        "wallets": wallet_store,
+        "transactions": transaction_store,
+        "dashboard": dashboard,
+        "leaderboard": leaderboard,
+        "pnl": pnl_engine,
+        "alert_rules": alert_engine,
+        "cotrading": cotrading,
+    }
+
+def load_stores(stores: dict):
+    global wallet_store, transaction_store, transaction_rows, dashboard, leaderboard
+    global pnl_engine, alert_engine, cotrading
+    wallet_store = stores["wallets"]
+    transaction_store = stores["transactions"]
+    transaction_rows = RowCache(present_transaction, max_rows=transaction_rows.max_rows)
+    dashboard = stores["dashboard"]
+    leaderboard = stores["leaderboard"]
+    pnl_engine = stores["pnl"]
+    alert_engine = stores["alert_rules"]
+    cotrading = stores["cotrading"]
+    response_cache.clear()
+
+# Workers sharing a SQLite file also share a memory-mapped change counter
+# beside it (STATE_COUNTER_PATH); otherwise they poll every STATE_POLL_SECONDS
+_counter_path = os.getenv("STATE_COUNTER_PATH") or default_counter_path(make_url(DATABASE_URL))
+state_log = StateLog(
+    engine, apply_state_change,
+    counter=ChangeCounter(_counter_path) if _counter_path else None,
+    poll_interval=float(os.getenv("STATE_POLL_SECONDS", "0.5")),
+    prepare=prepare_state_change,
+    dump=dump_stores,
+    load=load_stores,
+    schema=STATE_SCHEMA,
+)
+app.add_middleware(StateSyncMiddleware, log=state_log)
+STATE_SYNC_SECONDS = float(os.getenv("STATE_SYNC_SECONDS", "0.25"))
+# A checkpoint every STATE_CHECKPOINT_SECONDS once the log has grown by
+# STATE_CHECKPOINT_ENTRIES; 0 disables them
+STATE_CHECKPOINT_SECONDS = float(os.getenv("STATE_CHECKPOINT_SECONDS", "300"))
+STATE_CHECKPOINT_ENTRIES = int(os.getenv("STATE_CHECKPOINT_ENTRIES", "1000"))
+
+async def sync_state_periodically():
+    """Keep idle workers current, so their live subscribers get other workers' trades"""
+    while True:
+        await asyncio.sleep(STATE_SYNC_SECONDS)
+        if state_log.stale():
+            await run_in_threadpool(state_log.sync)
+
+async def checkpoint_state_periodically():
+    while True:
+        await asyncio.sleep(STATE_CHECKPOINT_SECONDS)
+        await run_in_threadpool(state_log.checkpoint, STATE_CHECKPOINT_ENTRIES)
+
 # ============================================
 # API Routes
 # ============================================
@@ -160,217 +740,589 @@ def root():
         "version": "1.0.0"
     }
 
+@app.get("/health")
+def health():
+    """Liveness probe"""
+    now = datetime.now(timezone.utc)
+    return {
+        "status": "healthy",
+        "timestamp": now.isoformat(),
+        "uptime_seconds": round((now - STARTED_AT).total_seconds(), 1),
+        "state_log": {
+            "position": state_log.position,
+            "errors": state_log.errors,
+            "last_error": state_log.last_error,
+        }
+    }
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profiles/{profile_id}", include_in_schema=False)
+def get_profile(profile_id: str):
+    """Collapsed stacks of a request sampled with `X-Profile: 1`"""
+    profile = profiler.get(profile_id) if profiler else None
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(content=profile, media_type="text/plain")
+
 # ============================================
 # User Routes
 # ============================================
 
+def present_user(user: init_db.User) -> dict:
+    return {
+        "id": user.id,
+        "name": user.username,
+        "email": user.email,
+        "plan": user.subscription_tier or "free",
+        "created_at": user.created_at,
+    }
+
+def current_user_id(request: Request, user_id: Optional[int] = None) -> int:
+    """
+    The user a request acts for: the api key's owner, or ANONYMOUS_USER_ID
+    without a key. `user_id` is only checked against it, never trusted.
+    """
+    return principal_user_id(getattr(request.state, "principal", None), user_id)
+
+def principal_user_id(principal, user_id: Optional[int] = None) -> int:
+    """current_user_id for a principal AuthMiddleware left in the scope"""
+    if principal is not None:
+        owner = principal.user_id
+    elif ANONYMOUS_USER_ID is not None:
+        owner = ANONYMOUS_USER_ID
+    else:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    if user_id is not None and user_id != owner:
+        raise HTTPException(status_code=403, detail="Not allowed to act for another user")
+    return owner
+
+def owned_wallet(wallet_id: int, user_id: int) -> dict:
+    """The caller's wallet, or 404 (other users' wallets are not disclosed)"""
+    wallet = wallet_store.get(wallet_id)
+    if not wallet or wallet["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    return wallet
+
 @app.post("/api/auth/signup", response_model=User)
 def signup(user: UserCreate):
     """Create new user account"""
-    # Check if user already exists
-    if any(u["email"] == user.email for u in users_db):
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    new_user = {
-        "id": len(users_db) + 1,
-        "name": user.name,
-        "email": user.email,
-        "plan": "free",
-        "created_at": datetime.now()
-    }
-    users_db.append(new_user)
-    return new_user
+    with SessionLocal() as session:
+        # Check if user already exists (users.email is indexed)
+        if session.scalar(select(init_db.User.id).where(init_db.User.email == user.email)) is not None:
+            raise HTTPException(status_code=400, detail="Email already registered")
+
+        new_user = init_db.User(
+            email=user.email,
+            username=user.name,
+            subscription_tier="free",
+            api_key=generate_api_key(),
+            password_hash=hash_password(user.password),
+        )
+        session.add(new_user)
+        try:
+            session.commit()
+        except IntegrityError:
+            raise HTTPException(status_code=400, detail="Username already taken")
+        return present_user(new_user)
 
 @app.post("/api/auth/login")
 def login(credentials: UserLogin):
-    """User login"""
-    # Find user by email
-    user = next((u for u in users_db if u["email"] == credentials.email), None)
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-    
-    return {
-        "access_token": "mock_token_" + str(user["id"]),
-        "token_type": "bearer",
-        "user": user
-    }
+    """User login; the access token is the account's API key"""
+    with SessionLocal() as session:
+        user = session.scalar(select(init_db.User).where(init_db.User.email == credentials.email))
+        if not user or not user.is_active or not verify_password(credentials.password, user.password_hash):
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+
+        return {
+            "access_token": user.api_key,
+            "token_type": "bearer",
+            "user": present_user(user)
+        }
 
 @app.get("/api/users/me", response_model=User)
-def get_current_user():
+def get_current_user(request: Request):
     """Get current user profile"""
-    # Mock: return first user
-    if not users_db:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    return users_db[0]
+    principal = getattr(request.state, "principal", None)
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    with SessionLocal() as session:
+        user = session.get(init_db.User, principal.user_id)
+        if user is None:
+            raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+        return present_user(user)
 
 # ============================================
 # Wallet Routes
 # ============================================
 
 @app.get("/api/wallets", response_model=List[Wallet])
-def list_wallets(user_id: int = 1):
+def list_wallets(request: Request, user_id: int = Depends(current_user_id)):
     """List user's tracked wallets"""
-    user_wallets = [w for w in mock_wallets if w["user_id"] == user_id]
-    return user_wallets
+    return response_cache.respond(
+        request, ("wallets", user_id), [f"user:{user_id}"],
+        lambda: ([present_wallet(w) for w in wallet_store.list_by_user(user_id)], {})
+    )
 
 @app.post("/api/wallets", response_model=Wallet)
-def create_wallet(wallet: WalletCreate, user_id: int = 1):
+def create_wallet(wallet: WalletCreate, user_id: int = Depends(current_user_id)):
     """Add new wallet to track"""
-    new_wallet = {
-        "id": len(mock_wallets) + 1,
+    new_wallet = state_log.append("wallet.add", {
         "user_id": user_id,
         "address": wallet.address,
-        "name": wallet.name or f"Wallet {len(mock_wallets) + 1}",
-        "balance": "$0",
-        "pnl_24h": 0.0,
-        "pnl_7d": 0.0,
-        "pnl_30d": 0.0,
-        "grade": "C",
-        "last_activity": "Just added",
+        "name": wallet.name,
         "tags": wallet.tags,
         "created_at": datetime.now()
-    }
-    mock_wallets.append(new_wallet)
-    return new_wallet
+    })
+    return present_wallet(new_wallet)
+
+# Registered before /api/wallets/{wallet_id} so "search" is not read as an id
+@app.get("/api/wallets/search", response_model=List[Wallet])
+def search_wallets(
+    q: str = "",
+    tag: List[str] = Query([]),
+    match: str = "all",
+    limit: int = Query(20, ge=1, le=MAX_WALLET_SEARCH_RESULTS),
+    user_id: int = Depends(current_user_id)
+):
+    """Typeahead search of the user's wallets by address prefix or label words, filtered by tags (all or any)"""
+    if not q.strip() and not tag:
+        raise HTTPException(status_code=400, detail="Pass q and/or tag to search")
+    if match not in ("all", "any"):
+        raise HTTPException(status_code=400, detail="match must be one of all, any")
+    wallets = wallet_store.search(q, tag, match == "all", user_id, limit)
+    return [present_wallet(w) for w in wallets]
 
 @app.get("/api/wallets/{wallet_id}", response_model=Wallet)
-def get_wallet(wallet_id: int):
+def get_wallet(request: Request, wallet_id: int, user_id: int = Depends(current_user_id)):
     """Get wallet details"""
-    wallet = next((w for w in mock_wallets if w["id"] == wallet_id), None)
-    if not wallet:
-        raise HTTPException(status_code=404, detail="Wallet not found")
-    return wallet
+    wallet = owned_wallet(wallet_id, user_id)
+    return response_cache.respond(
+        request, ("wallet", wallet_id), [f"wallet:{wallet_id}"],
+        lambda: (present_wallet(wallet), {})
+    )
 
 @app.delete("/api/wallets/{wallet_id}")
-def delete_wallet(wallet_id: int):
+def delete_wallet(wallet_id: int, user_id: int = Depends(current_user_id)):
     """Remove wallet from tracking"""
-    global mock_wallets
-    wallet = next((w for w in mock_wallets if w["id"] == wallet_id), None)
-    if not wallet:
+    owned_wallet(wallet_id, user_id)
+    if not state_log.append("wallet.remove", {"id": wallet_id}):
         raise HTTPException(status_code=404, detail="Wallet not found")
-    
-    mock_wallets = [w for w in mock_wallets if w["id"] != wallet_id]
     return {"message": "Wallet removed successfully"}
 
 # ============================================
 # Transaction Routes
 # ============================================
 
+def cursor_headers(next_cursor: Optional[str], prev_cursor: Optional[str]) -> Dict[str, str]:
+    """Each paging header whose cursor exists; the last page still links back"""
+    headers = {}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if prev_cursor:
+        headers["X-Prev-Cursor"] = prev_cursor
+    return headers
+
+def transactions_page(wallet_ids: List[int], limit: int,
+                      before: Optional[str], after: Optional[str]) -> Response:
+    """
+    Keyset page of the wallets' transactions; cursors are returned in
+    response headers. Rows come pre-encoded from transaction_rows,
+    skipping response_model validation (the model still documents the shape).
+    """
+    try:
+        txs, next_cursor, prev_cursor = transaction_store.page(
+            wallet_ids, limit, before=before, after=after
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    headers = cursor_headers(next_cursor, prev_cursor)
+    return json_response(transaction_rows.encode(txs), headers)
+
+def live_subscription(principal, wallet_id: List[int], user_id: Optional[int]):
+    """
+    Subscribe to the caller's own wallets and, if `user_id` is passed, to
+    their whole watchlist
+    """
+    if not wallet_id and user_id is None:
+        raise HTTPException(status_code=400, detail="Pass wallet_id and/or user_id to subscribe")
+    owner = principal_user_id(principal, user_id)
+    for each in wallet_id:
+        owned_wallet(each, owner)
+    try:
+        return live_hub.subscribe(wallet_id, owner if user_id is not None else None)
+    except HubFullError:
+        raise HTTPException(status_code=503, detail="Too many live connections")
+
+@app.get("/api/transactions/stream")
+async def stream_transactions(
+    request: Request,
+    wallet_id: List[int] = Query([]),
+    user_id: Optional[int] = None
+):
+    """
+    Server-Sent Events feed of new transactions for the given wallets
+    and/or a user's whole watchlist. A `dropped` event reports messages
+    skipped because the client fell behind.
+    """
+    subscriber = live_subscription(getattr(request.state, "principal", None), wallet_id, user_id)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while not subscriber.closed:
+                messages, dropped = await subscriber.drain()
+                if await request.is_disconnected():
+                    break
+                chunk = "".join(message.sse for message in messages)
+                if dropped:
+                    chunk = f'event: dropped\ndata: {{"dropped":{dropped}}}\n\n' + chunk
+                # A comment line keeps idle connections (and proxies) alive
+                yield chunk or ": keep-alive\n\n"
+        finally:
+            live_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/ws/transactions")
+async def websocket_transactions(
+    websocket: WebSocket,
+    wallet_id: List[int] = Query([]),
+    user_id: Optional[int] = None
+):
+    """WebSocket variant of /api/transactions/stream"""
+    try:
+        subscriber = live_subscription(websocket.scope.get("state", {}).get("principal"), wallet_id, user_id)
+    except HTTPException as exc:
+        await websocket.close(code=1013 if exc.status_code == 503 else 1008, reason=exc.detail)
+        return
+    await websocket.accept()
+
+    async def watch_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            subscriber.close()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        while not subscriber.closed:
+            messages, dropped = await subscriber.drain()
+            if dropped:
+                await websocket.send_text(f'{{"event":"dropped","data":{{"dropped":{dropped}}}}}')
+            for message in messages:
+                await websocket.send_text(message.ws)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        watcher.cancel()
+        live_hub.unsubscribe(subscriber)
+
 @app.get("/api/transactions", response_model=List[Transaction])
-def list_transactions(wallet_id: Optional[int] = None, limit: int = 20):
-    """List recent transactions"""
-    txs = mock_transactions
-    if wallet_id:
-        txs = [tx for tx in txs if tx["wallet_id"] == wallet_id]
-    return txs[:limit]
+def list_transactions(
+    wallet_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=500),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    user_id: int = Depends(current_user_id)
+):
+    """List recent transactions of the user's wallets, newest first (pass X-Next-Cursor as before=)"""
+    if wallet_id is not None:
+        return transactions_page([owned_wallet(wallet_id, user_id)["id"]], limit, before, after)
+    wallet_ids = [w["id"] for w in wallet_store.list_by_user(user_id)]
+    return transactions_page(wallet_ids, limit, before, after)
 
 @app.get("/api/transactions/{wallet_id}", response_model=List[Transaction])
-def get_wallet_transactions(wallet_id: int, limit: int = 50):
-    """Get transactions for specific wallet"""
-    txs = [tx for tx in mock_transactions if tx["wallet_id"] == wallet_id]
-    return txs[:limit]
+def get_wallet_transactions(
+    wallet_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    user_id: int = Depends(current_user_id)
+):
+    """Get transactions for specific wallet, newest first"""
+    owned_wallet(wallet_id, user_id)
+    return transactions_page([wallet_id], limit, before, after)
+
+@app.get("/api/wallets/{wallet_id}/trades")
+async def get_wallet_trades(
+    wallet_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(current_user_id)
+):
+    """Get recorded trades for a wallet from the database, newest first"""
+    wallet = owned_wallet(wallet_id, user_id)
+    try:
+        trades, next_cursor, prev_cursor = await query_trades_page_async(
+            db, wallet["address"], limit, before=before, after=after
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    headers = cursor_headers(next_cursor, prev_cursor)
+    return json_response(json_bytes([
+        {
+            "id": t.id,
+            "wallet_address": t.wallet_address,
+            "token_symbol": t.token_symbol,
+            "token_address": t.token_address,
+            "action": t.action,
+            "amount": t.amount,
+            "price": t.price,
+            "profit_loss": t.profit_loss,
+            "tx_hash": t.tx_hash,
+            "timestamp": t.timestamp
+        }
+        for t in trades
+    ]), headers)
+
+@app.post("/api/trades/ingest")
+async def ingest_trades(request: Request, batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=5000)):
+    """
+    Bulk-ingest trades from a streamed NDJSON body (one trade per line).
+    Duplicate tx_hash values are skipped; counts are reported per batch.
+    """
+    return await ingest_ndjson(
+        request.stream(), async_engine, batch_size,
+        # Rows are committed already; the log only carries their ids
+        on_accepted=lambda rows: state_log.append("trades", {"ranges": id_ranges([row["id"] for row in rows])})
+    )
 
 # ============================================
 # Leaderboard Routes
 # ============================================
 
 @app.get("/api/leaderboard")
-def get_leaderboard(sort_by: str = "annual_return_pct", limit: int = 50):
-    """Get wallet performance leaderboard"""
-    leaderboard = [
-        {
-            "rank": 1,
-            "address": "0x742d35Cc6634C0532925a3b844Bc9e7595f0a4B2",
-            "name": "DeFi Whale",
-            "annual_return_pct": 287.4,
-            "sharpe_ratio": 3.2,
-            "max_drawdown_pct": -12.5,
-            "win_rate": 78.3,
-            "total_trades": 342,
-            "grade": "S",
-            "tags": ["DeFi", "Arbitrage", "High Freq"]
-        },
-        {
-            "rank": 2,
-            "address": "0x9f3c8E3C8d8E3f8e8C8D8E3F8E8C8D8E3F8E7E21",
-            "name": "Smart Trader",
-            "annual_return_pct": 215.8,
-            "sharpe_ratio": 2.8,
-            "max_drawdown_pct": -18.2,
-            "win_rate": 72.1,
-            "total_trades": 198,
-            "grade": "S",
-            "tags": ["Swing Trading", "Blue Chips"]
-        },
-        {
-            "rank": 3,
-            "address": "0x1a2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d7e8f9C9D4",
-            "name": "Yield Hunter",
-            "annual_return_pct": 189.3,
-            "sharpe_ratio": 2.5,
-            "max_drawdown_pct": -15.7,
-            "win_rate": 69.4,
-            "total_trades": 267,
-            "grade": "A",
-            "tags": ["Yield Farming", "Staking"]
-        }
-    ]
-    return leaderboard[:limit]
+def get_leaderboard(
+    request: Request,
+    sort_by: str = "annual_return_pct",
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None
+):
+    """Get wallet performance leaderboard (next page cursor in X-Next-Cursor)"""
+    if sort_by not in LEADERBOARD_METRICS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of {', '.join(LEADERBOARD_METRICS)}")
+    def build():
+        try:
+            rows, next_cursor = leaderboard.page(sort_by, limit, offset=offset, cursor=cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        return rows, {"X-Next-Cursor": next_cursor} if next_cursor else {}
+
+    return response_cache.respond(
+        request, ("leaderboard", sort_by, limit, offset, cursor), ["leaderboard"], build
+    )
+
+@app.get("/api/leaderboard/rank/{address}")
+def get_leaderboard_rank(address: str, sort_by: str = "annual_return_pct"):
+    """Get a single wallet's leaderboard rank"""
+    if sort_by not in LEADERBOARD_METRICS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of {', '.join(LEADERBOARD_METRICS)}")
+    entry = leaderboard.rank(address, sort_by)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Wallet not on leaderboard")
+    return entry
 
 # ============================================
 # Backtest Routes
 # ============================================
 
 @app.get("/api/backtest/{wallet_id}", response_model=BacktestResult)
-def get_backtest_result(wallet_id: int):
-    """Get backtest results for wallet"""
-    wallet = next((w for w in mock_wallets if w["id"] == wallet_id), None)
-    if not wallet:
-        raise HTTPException(status_code=404, detail="Wallet not found")
+async def get_backtest_result(request: Request, wallet_id: int, db: AsyncSession = Depends(get_async_db),
+                              user_id: int = Depends(current_user_id)):
+    """
+    Get backtest results for wallet. A read only: the leaderboard and the
+    wallet's grade are updated by POST /api/backtest/{wallet_id} jobs.
+    """
+    wallet = owned_wallet(wallet_id, user_id)
     
-    # Return mock backtest data
+    async def build():
+        with metrics.timer("backtest_duration_seconds", (("mode", "inline"),)):
+            result = await run_wallet_backtest_async(db, wallet_id, wallet["address"], wallet["grade"])
+        return result, {}
+
+    return await response_cache.respond_async(request, ("backtest", wallet_id), [f"wallet:{wallet_id}"], build)
+
+# Registered before /api/backtest/{wallet_id} so "sweeps" isn't taken for a wallet id
+@app.post("/api/backtest/sweeps", status_code=202)
+def start_copy_sweep(sweep: CopySweepCreate):
+    """Simulate copying the top-graded wallets under every parameter combination"""
+    if not 1 <= sweep.wallets <= 5000:
+        raise HTTPException(status_code=400, detail="wallets must be between 1 and 5000")
+    since = datetime.utcnow() - timedelta(days=sweep.days) if sweep.days else None
+    grid = sweep.model_dump(exclude={"wallets", "days"})
+    try:
+        job = copy_sweeps.start(grid, wallets=sweep.wallets, since=since)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Too many sweeps running",
+                            headers={"Retry-After": "30"})
     return {
-        "wallet_id": wallet_id,
-        "annual_return_pct": wallet["pnl_30d"] * 12 / 30,
-        "sharpe_ratio": 2.5,
-        "max_drawdown_pct": -15.0,
-        "win_rate": 68.5,
-        "total_trades": 150,
-        "grade": wallet["grade"]
+        "message": "Sweep started",
+        "sweep_id": job.id,
+        "status": job.status,
+        "total": len(job.combos),
     }
 
-@app.post("/api/backtest/{wallet_id}")
-def run_backtest(wallet_id: int):
-    """Run backtest for wallet"""
-    wallet = next((w for w in mock_wallets if w["id"] == wallet_id), None)
-    if not wallet:
-        raise HTTPException(status_code=404, detail="Wallet not found")
+@app.get("/api/backtest/sweeps/{sweep_id}")
+def get_copy_sweep(
+    sweep_id: str,
+    sort_by: str = "sharpe_ratio",
+    limit: int = Query(10, ge=1, le=1000)
+):
+    """Poll a sweep: progress and its best configurations so far"""
+    if sort_by not in SWEEP_METRICS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of {', '.join(SWEEP_METRICS)}")
+    job = copy_sweeps.get(sweep_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+    return job.to_dict(sort_by, limit)
+
+@app.delete("/api/backtest/sweeps/{sweep_id}")
+def cancel_copy_sweep(sweep_id: str):
+    """Cancel a sweep; results already in are kept"""
+    job = copy_sweeps.cancel(sweep_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+    return job.to_dict()
+
+@app.post("/api/backtest/{wallet_id}", status_code=202)
+def run_backtest(wallet_id: int, user_id: int = Depends(current_user_id)):
+    """Queue a backtest for wallet (requests for the same wallet share one job)"""
+    wallet = owned_wallet(wallet_id, user_id)
+    
+    try:
+        job = backtest_jobs.submit(wallet_id, wallet["address"], wallet["grade"])
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Backtest queue is full",
+                            headers={"Retry-After": "5"})
     
-    # Simulate backtest execution
     return {
         "message": "Backtest started",
         "wallet_id": wallet_id,
-        "status": "processing"
+        "job_id": job.id,
+        "status": job.to_dict()["status"]
     }
 
+@app.get("/api/backtest/jobs/{job_id}")
+def get_backtest_job(job_id: str):
+    """Poll backtest job status and result"""
+    job = backtest_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.delete("/api/backtest/jobs/{job_id}")
+def cancel_backtest_job(job_id: str):
+    """Cancel a queued or running backtest job"""
+    job = backtest_jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+# ============================================
+# Alert Routes
+# ============================================
+
+@app.get("/api/alerts/rules", response_model=List[AlertRule])
+def list_alert_rules(user_id: int = Depends(current_user_id)):
+    """List a user's alert rules"""
+    return alert_engine.list_rules(user_id)
+
+@app.post("/api/alerts/rules", response_model=AlertRule, status_code=201)
+def create_alert_rule(rule: AlertRuleCreate, user_id: int = Depends(current_user_id)):
+    """Subscribe to alerts for a wallet address"""
+    if rule.alert_type not in ALERT_TYPES:
+        raise HTTPException(status_code=400, detail=f"alert_type must be one of {', '.join(ALERT_TYPES)}")
+    return state_log.append("alert_rule.add", {
+        "user_id": user_id,
+        "wallet_address": rule.wallet_address,
+        "alert_type": rule.alert_type,
+        "threshold": rule.threshold,
+        "created_at": datetime.now()
+    })
+
+@app.delete("/api/alerts/rules/{rule_id}")
+def delete_alert_rule(rule_id: int, user_id: int = Depends(current_user_id)):
+    """Remove an alert rule"""
+    rule = alert_engine.get_rule(rule_id)
+    if not rule or rule["user_id"] != user_id or not state_log.append("alert_rule.remove", {"id": rule_id}):
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    return {"message": "Alert rule deleted successfully"}
+
+@app.get("/api/alerts", response_model=List[AlertOut])
+async def list_alerts(
+    limit: int = Query(50, ge=1, le=500),
+    unread: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(current_user_id)
+):
+    """Most recent alerts for a user"""
+    Alert = init_db.Alert
+    query = select(Alert).where(Alert.user_id == user_id)
+    if unread:
+        query = query.where(Alert.is_read.is_(False))
+    query = query.order_by(Alert.created_at.desc(), Alert.id.desc()).limit(limit)
+    return (await db.execute(query)).scalars().all()
+
+# ============================================
+# Signal Routes
+# ============================================
+
+@app.get("/api/signals/cotrading", response_model=List[CoTradingSignal])
+def list_cotrading_signals(
+    token: Optional[str] = None,
+    side: Optional[str] = None,
+    min_wallets: Optional[int] = Query(None, ge=2),
+    since: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Clusters of wallets buying or selling the same token together, newest first"""
+    if side is not None and side not in COTRADING_SIDES:
+        raise HTTPException(status_code=400, detail=f"side must be one of {', '.join(COTRADING_SIDES)}")
+    return cotrading.signals(token, side, min_wallets, since, limit)
+
+# ============================================
+# Price Routes
+# ============================================
+
+@app.get("/api/tokens/{token_symbol}/candles")
+def get_token_candles(
+    token_symbol: str,
+    resolution: str = "1h",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000)
+):
+    """OHLCV candles for a token, oldest first: from `start` if given, else the latest up to `end`"""
+    if resolution not in CANDLE_RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {', '.join(CANDLE_RESOLUTIONS)}")
+    return json_response(json_bytes(
+        query_candles(engine, token_symbol, CANDLE_RESOLUTIONS[resolution], start, end, limit)
+    ))
+
 # ============================================
 # Stats Routes
 # ============================================
 
 @app.get("/api/stats/dashboard")
-def get_dashboard_stats(user_id: int = 1):
+def get_dashboard_stats(request: Request, user_id: int = Depends(current_user_id)):
     """Get dashboard statistics"""
-    user_wallets = [w for w in mock_wallets if w["user_id"] == user_id]
-    
-    return {
-        "total_wallets": len(user_wallets),
-        "total_value": "$4,983,344",
-        "total_pnl_24h": 10.2,
-        "total_pnl_7d": 31.5,
-        "total_pnl_30d": 137.4,
-        "alerts_today": 4,
-        "transactions_today": 12
-    }
+    return response_cache.respond(
+        request, ("dashboard", user_id), [f"user:{user_id}"],
+        lambda: (dashboard.stats(user_id), {})
+    )
 
 # ============================================
 # Run Server
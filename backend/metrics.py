@@ -0,0 +1,286 @@
+"""
+Smart Money Tracker - Metrics
+Per-thread counters and latency histograms rendered as Prometheus text,
+ASGI request middleware, SQL timing hooks and an opt-in sampling profiler
+"""
+
+import sys
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+# Upper bounds in seconds (Prometheus `le` labels); +Inf is implicit
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Shard:
+    """One thread's private series; only its owner thread writes to it"""
+    __slots__ = ("values", "histograms")
+
+    def __init__(self):
+        self.values: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+
+class Metrics:
+    """
+    Counters, gauges and histograms without a lock on the write path:
+    every thread records into its own shard and render() sums the shards.
+    Gauges are kept as per-shard deltas, so an increment on one thread and
+    the matching decrement on another still add up.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[_Shard] = []
+        self._meta: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+
+    def describe(self, name: str, kind: str, help_text: str):
+        """Register a metric's TYPE (counter, gauge, histogram) and HELP"""
+        self._meta[name] = (kind, help_text)
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1.0):
+        values = self._shard().values
+        key = (name, labels)
+        values[key] = values.get(key, 0.0) + value
+
+    def dec(self, name: str, labels: Labels = (), value: float = 1.0):
+        self.inc(name, labels, -value)
+
+    def observe(self, name: str, labels: Labels, value: float):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        series = histograms.get(key)
+        if series is None:
+            series = histograms[key] = [0.0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def timer(self, name: str, labels: Labels = ()):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, labels, time.perf_counter() - started)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        values: Dict[Tuple[str, Labels], float] = {}
+        histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # Copy first: the owner thread may be adding keys meanwhile
+            for key, value in list(shard.values.items()):
+                values[key] = values.get(key, 0.0) + value
+            for key, series in list(shard.histograms.items()):
+                total = histograms.setdefault(key, [0.0] * len(series))
+                for i, count in enumerate(list(series)):
+                    total[i] += count
+
+        by_name: Dict[str, List[str]] = {}
+        for (name, labels), value in sorted(values.items()):
+            by_name.setdefault(name, []).append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), series in sorted(histograms.items()):
+            lines = by_name.setdefault(name, [])
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {_number(cumulative)}")
+            lines.append(f"{name}_sum{_labels(labels)} {series[-1]!r}")
+            lines.append(f"{name}_count{_labels(labels)} {_number(cumulative)}")
+
+        out = []
+        for name in [*self._meta, *sorted(by_name.keys() - self._meta.keys())]:
+            kind, help_text = self._meta.get(name, ("untyped", ""))
+            if help_text:
+                out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(by_name.get(name, ()))
+        return "\n".join(out) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampler for single requests. While a request opted in,
+    a background thread snapshots the stacks of busy threads every
+    `interval` seconds; results are kept as collapsed stacks (the
+    flamegraph.pl / speedscope input format) in a small ring.
+    """
+
+    IDLE_FUNCTIONS = frozenset({"wait", "select", "poll", "_worker", "get", "accept", "_recv", "run_forever"})
+
+    def __init__(self, interval: float = 0.005, keep: int = 32):
+        self.interval = interval
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._profiles: "OrderedDict[str, str]" = OrderedDict()
+
+    @contextmanager
+    def profile(self):
+        """Sample while the block runs; yields the profile id"""
+        profile_id = uuid.uuid4().hex[:16]
+        samples: Counter = Counter()
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(samples, stop), daemon=True)
+        sampler.start()
+        try:
+            yield profile_id
+        finally:
+            stop.set()
+            sampler.join()
+            text = "\n".join(f"{stack} {count}" for stack, count in samples.most_common())
+            with self._lock:
+                self._profiles[profile_id] = text
+                while len(self._profiles) > self.keep:
+                    self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[str]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def _sample(self, samples: Counter, stop: threading.Event):
+        me = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me or frame.f_code.co_name in self.IDLE_FUNCTIONS:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                samples[";".join(reversed(stack))] += 1
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request counts, errors, latency and
+    in-flight requests per route template (not raw path, so label
+    cardinality stays bounded). With a profiler attached, requests
+    carrying `X-Profile: 1` are sampled and answered with X-Profile-Id.
+    """
+
+    def __init__(self, app, metrics: Metrics, profiler: Optional[SamplingProfiler] = None):
+        self.app = app
+        self.metrics = metrics
+        self.profiler = profiler
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            for candidate in scope["app"].routes:
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    route = candidate.path
+                    break
+            route = self._routes[endpoint] = route or "unmatched"
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        metrics = self.metrics
+        method = scope["method"]
+        status = 500
+        profile_id = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profile_id is not None:
+                    message.setdefault("headers", []).append((b"x-profile-id", profile_id.encode()))
+            await send(message)
+
+        metrics.inc("http_requests_in_flight")
+        started = time.perf_counter()
+        try:
+            if self.profiler is not None and (b"x-profile", b"1") in scope["headers"]:
+                with self.profiler.profile() as profile_id:
+                    await self.app(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.dec("http_requests_in_flight")
+            route = self._route(scope)
+            metrics.inc("http_requests_total", (("method", method), ("route", route), ("status", str(status))))
+            if status >= 500:
+                metrics.inc("http_request_errors_total", (("method", method), ("route", route)))
+            metrics.observe("http_request_duration_seconds", (("method", method), ("route", route)), elapsed)
+
+
+def instrument_engine(metrics: Metrics, engine, name: str):
+    """Time every SQL statement run through `engine` (a sync Engine)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        metrics.observe("db_query_duration_seconds", (("engine", name), ("operation", operation)),
+                        time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        connection = context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+        metrics.inc("db_query_errors_total", (("engine", name),))
+
+
+def default_metrics() -> Metrics:
+    metrics = Metrics()
+    metrics.describe("http_requests_total", "counter", "HTTP requests by method, route and status")
+    metrics.describe("http_request_errors_total", "counter", "HTTP requests answered with a 5xx status")
+    metrics.describe("http_request_duration_seconds", "histogram", "HTTP request latency by route")
+    metrics.describe("http_requests_in_flight", "gauge", "HTTP requests currently being served")
+    metrics.describe("db_query_duration_seconds", "histogram", "SQL statement latency")
+    metrics.describe("db_query_errors_total", "counter", "SQL statements that raised")
+    metrics.describe("backtest_duration_seconds", "histogram", "Backtest latency (inline or queued job)")
+    return metrics
@@ -0,0 +1,59 @@
+"""
+Smart Money Tracker - Money
+USD amounts are held as integer cents and token amounts as (quantity,
+token) pairs; strings like "$2,347,891" or "15.5 ETH" are only produced
+at the API edge, through cached formatters
+"""
+
+import math
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from functools import lru_cache
+
+CENTS_PER_USD = 100
+
+
+def to_cents(value) -> int:
+    """USD as a number or display string ('$2,347,891') -> integer cents"""
+    if isinstance(value, int):
+        return value * CENTS_PER_USD
+    if isinstance(value, str):
+        value = value.replace("$", "").replace(",", "").strip() or "0"
+    try:
+        dollars = Decimal(str(value))
+    except InvalidOperation:
+        return 0
+    if not dollars.is_finite():
+        return 0
+    return int((dollars * CENTS_PER_USD).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def cents_to_usd(cents: int) -> float:
+    return cents / CENTS_PER_USD
+
+
+@lru_cache(maxsize=65536)
+def format_usd(cents: int) -> str:
+    """12345678 -> '$123,457' (whole dollars, as shown in the UI)"""
+    dollars = (abs(cents) + CENTS_PER_USD // 2) // CENTS_PER_USD
+    return f"{'-' if cents < 0 and dollars else ''}${dollars:,}"
+
+
+# Decimals kept for quantities >= 1; smaller ones keep this many significant digits
+QUANTITY_DECIMALS = 4
+MAX_QUANTITY_DECIMALS = 18
+
+
+@lru_cache(maxsize=65536)
+def format_quantity(quantity: float, token: str) -> str:
+    """(15.5, 'ETH') -> '15.5 ETH'; (50000, 'UNI') -> '50,000 UNI', never scientific"""
+    if not math.isfinite(quantity):
+        return f"{quantity} {token}"
+    decimals = QUANTITY_DECIMALS
+    if 0 < abs(quantity) < 1:
+        decimals = min(QUANTITY_DECIMALS - 1 - math.floor(math.log10(abs(quantity))), MAX_QUANTITY_DECIMALS)
+    text = f"{quantity:,.{decimals}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    if text in ("-0", ""):
+        text = "0"
+    return f"{text} {token}"
@@ -0,0 +1,182 @@
+"""
+Smart Money Tracker - Rolling PnL Windows
+Time-bucketed per-wallet profit and traded notional sums for the
+24h / 7d / 30d windows
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# (window, bucket size in seconds, number of buckets)
+WINDOWS = (
+    ("pnl_24h", 3600, 24),
+    ("pnl_7d", 6 * 3600, 28),
+    ("pnl_30d", 86400, 30),
+)
+# Trades stamped up to this far ahead of the wall clock count as "now";
+# anything later is dropped rather than allowed to move the windows
+MAX_CLOCK_SKEW_SECONDS = 300
+
+
+class _Ring:
+    """
+    Fixed-size ring of time buckets per wallet row plus a running sum of
+    the live buckets. Advancing the clock expires whole columns at once.
+    """
+
+    def __init__(self, capacity: int, bucket_seconds: int, n_buckets: int, now: float):
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+        self.buckets = np.zeros((capacity, n_buckets))
+        self.sums = np.zeros(capacity)
+        self.head = int(now // bucket_seconds)
+
+    def grow(self, capacity: int):
+        buckets = np.zeros((capacity, self.n_buckets))
+        buckets[:len(self.buckets)] = self.buckets
+        sums = np.zeros(capacity)
+        sums[:len(self.sums)] = self.sums
+        self.buckets, self.sums = buckets, sums
+
+    def clear_row(self, row: int):
+        self.buckets[row] = 0.0
+        self.sums[row] = 0.0
+
+    def advance(self, now: float):
+        head = int(now // self.bucket_seconds)
+        steps = head - self.head
+        if steps <= 0:
+            return
+        if steps >= self.n_buckets:
+            self.buckets[:] = 0.0
+            self.sums[:] = 0.0
+        else:
+            # Columns reused by the new buckets hold the expiring ones
+            cols = np.arange(self.head + 1, head + 1) % self.n_buckets
+            self.sums -= self.buckets[:, cols].sum(axis=1)
+            self.buckets[:, cols] = 0.0
+        self.head = head
+
+    def add(self, rows: np.ndarray, timestamps: np.ndarray, pnl: np.ndarray):
+        bucket = timestamps // self.bucket_seconds
+        age = self.head - bucket
+        live = (age >= 0) & (age < self.n_buckets)
+        rows, bucket, pnl = rows[live], bucket[live], pnl[live]
+        flat = rows * self.n_buckets + bucket % self.n_buckets
+        np.add.at(self.buckets.reshape(-1), flat, pnl)
+        self.sums += np.bincount(rows, weights=pnl, minlength=len(self.sums))
+
+
+class RollingPnL:
+    """
+    Rolling 24h / 7d / 30d profit and traded notional per wallet.
+
+    A trade only touches its bucket and the window sum, so reading a
+    wallet's windows is O(1). Late trades land in their own (older)
+    bucket as long as it is still inside the window.
+    """
+
+    def __init__(self, capacity: int = 1024, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        self._lock = threading.Lock()
+        self._rows: Dict[int, int] = {}
+        self._wallet_ids: List[Optional[int]] = [None] * capacity
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+        self._rings = [_Ring(capacity, seconds, n, now) for _, seconds, n in WINDOWS]
+        # Same buckets over trade notional, the denominator for returns
+        self._volume_rings = [_Ring(capacity, seconds, n, now) for _, seconds, n in WINDOWS]
+
+    def _row(self, wallet_id: int) -> int:
+        row = self._rows.get(wallet_id)
+        if row is not None:
+            return row
+        if not self._free:
+            capacity = len(self._wallet_ids)
+            for ring in self._rings + self._volume_rings:
+                ring.grow(capacity * 2)
+            self._wallet_ids.extend([None] * capacity)
+            self._free = list(range(capacity * 2 - 1, capacity - 1, -1))
+        row = self._free.pop()
+        self._rows[wallet_id] = row
+        self._wallet_ids[row] = wallet_id
+        return row
+
+    def __contains__(self, wallet_id: int) -> bool:
+        return wallet_id in self._rows
+
+    def advance(self, now: Optional[float] = None):
+        """Expire buckets that fell out of their window"""
+        now = time.time() if now is None else now
+        with self._lock:
+            for ring in self._rings + self._volume_rings:
+                ring.advance(now)
+
+    def add_trades(self, wallet_ids: Iterable[int], timestamps: Iterable[float], pnl: Iterable[float],
+                   volume: Optional[Iterable[float]] = None):
+        """
+        Add a batch of (wallet_id, unix seconds, profit_loss, notional)
+        trades in one vectorized update. The clock only follows the wall clock: trades a
+        little ahead of it (clock skew) land in the current bucket, and
+        trades beyond MAX_CLOCK_SKEW_SECONDS are ignored.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        pnl = np.nan_to_num(np.asarray(pnl, dtype=np.float64))
+        volume = np.zeros_like(pnl) if volume is None else np.nan_to_num(np.abs(np.asarray(volume, dtype=np.float64)))
+        if timestamps.size == 0:
+            return
+        with self._lock:
+            rows = np.fromiter((self._row(w) for w in wallet_ids), dtype=np.int64, count=timestamps.size)
+            now = time.time()
+            timestamps = np.where(timestamps - now <= MAX_CLOCK_SKEW_SECONDS,
+                                  np.minimum(timestamps, int(now)), np.iinfo(np.int64).max)
+            for ring, volume_ring in zip(self._rings, self._volume_rings):
+                ring.advance(now)
+                ring.add(rows, timestamps, pnl)
+                volume_ring.advance(now)
+                volume_ring.add(rows, timestamps, volume)
+
+    def resync(self):
+        """Recompute every wallet's window sums from its buckets in one pass"""
+        with self._lock:
+            for ring in self._rings + self._volume_rings:
+                ring.sums = ring.buckets.sum(axis=1)
+
+    def remove(self, wallet_id: int):
+        with self._lock:
+            row = self._rows.pop(wallet_id, None)
+            if row is None:
+                return
+            for ring in self._rings + self._volume_rings:
+                ring.clear_row(row)
+            self._wallet_ids[row] = None
+            self._free.append(row)
+
+    def windows(self, wallet_id: int) -> Dict[str, float]:
+        """Profit summed over each window for one wallet, O(1)"""
+        with self._lock:
+            row = self._rows.get(wallet_id)
+            return {
+                name: float(ring.sums[row]) if row is not None else 0.0
+                for (name, _, _), ring in zip(WINDOWS, self._rings)
+            }
+
+    def volumes(self, wallet_id: int) -> Dict[str, float]:
+        """Trade notional summed over each window for one wallet, O(1)"""
+        with self._lock:
+            row = self._rows.get(wallet_id)
+            return {
+                name: float(ring.sums[row]) if row is not None else 0.0
+                for (name, _, _), ring in zip(WINDOWS, self._volume_rings)
+            }
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """All tracked wallet ids and (n, 3) arrays of their profit and notional sums"""
+        with self._lock:
+            wallet_ids = np.fromiter(self._rows.keys(), dtype=np.int64, count=len(self._rows))
+            rows = np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+            sums = np.column_stack([ring.sums[rows] for ring in self._rings])
+            volumes = np.column_stack([ring.sums[rows] for ring in self._volume_rings])
+        return wallet_ids, sums, volumes
@@ -0,0 +1,67 @@
+"""
+Smart Money Tracker - Serverless Snapshot
+Writes the JSON snapshot api/index.py serves its read-only endpoints
+from, so the serverless function never needs a database connection or
+an ORM import on a cold start
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from init_db import Wallet
+
+LEADERBOARD_SIZE = 100
+WALLETS_SIZE = 100
+
+
+def build_snapshot(engine, wallets: int = WALLETS_SIZE, leaderboard: int = LEADERBOARD_SIZE) -> dict:
+    query = (
+        select(Wallet.address, Wallet.label, Wallet.total_profit, Wallet.win_rate, Wallet.total_trades)
+        .order_by(Wallet.rank.is_(None), Wallet.rank, Wallet.total_profit.desc())
+        .limit(max(wallets, leaderboard))
+    )
+    with engine.connect() as conn:
+        rows = conn.execute(query).all()
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "wallets": [
+            {
+                "address": row.address,
+                "label": row.label,
+                "total_pnl": row.total_profit or 0.0,
+                "win_rate": row.win_rate or 0.0,
+                "total_trades": row.total_trades or 0,
+            }
+            for row in rows[:wallets]
+        ],
+        "leaderboard": [
+            {
+                "rank": rank,
+                "address": row.address[:10],
+                "pnl": row.total_profit or 0.0,
+                "win_rate": round((row.win_rate or 0.0) * 100),
+            }
+            for rank, row in enumerate(rows[:leaderboard], start=1)
+        ],
+    }
+
+
+def export_snapshot(engine, path: str, **limits) -> dict:
+    """Build the snapshot and replace `path` atomically"""
+    snapshot = build_snapshot(engine, **limits)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(snapshot, f, indent=2)
+            f.write("\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return snapshot
@@ -0,0 +1,296 @@
+"""
+Smart Money Tracker - Shared State Log
+Ordered log of in-memory store mutations kept in the database and
+replayed by every worker process, checkpoints of the replayed state for
+workers to start from, and a memory-mapped change counter that lets a
+worker tell in one read whether it is behind
+"""
+
+import io
+import mmap
+import os
+import pickle
+import threading
+import time
+import uuid
+from typing import Callable, NamedTuple, Optional
+
+import orjson
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from cache import json_bytes
+from init_db import StateChange, StateCheckpoint
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; workers fall back to polling
+    fcntl = None
+
+# apply(kind, payload, local) -> result; `local` is True only in the
+# process that appended the entry
+Apply = Callable[[str, dict, bool], object]
+# prepare(kind, payload) -> payload; loads what an entry references
+Prepare = Callable[[str, dict], dict]
+# dump() -> everything apply() builds; load(state) installs a dump
+Dump = Callable[[], object]
+Load = Callable[[object], None]
+
+_LOCK_TYPE = type(threading.Lock())
+
+
+class _StatePickler(pickle.Pickler):
+    """Pickles the stores' locks as fresh, unlocked ones"""
+
+    def reducer_override(self, obj):
+        if type(obj) is _LOCK_TYPE:
+            return threading.Lock, ()
+        return NotImplemented
+
+
+def dump_state(state) -> bytes:
+    buffer = io.BytesIO()
+    _StatePickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(state)
+    return buffer.getvalue()
+
+
+class ChangeCounter:
+    """
+    A 64-bit counter in a small shared file, mapped into every worker.
+    Writers bump it under flock after each commit; readers compare one
+    aligned 8-byte load against the value they last synced at, with no
+    lock and no system call.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(self._fd).st_size < 8:
+            os.ftruncate(self._fd, 8)
+        self._map = mmap.mmap(self._fd, 8)
+
+    def read(self) -> int:
+        return int.from_bytes(self._map[:8], "little")
+
+    def bump(self) -> int:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            value = self.read() + 1
+            self._map[:8] = value.to_bytes(8, "little")
+            return value
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+def default_counter_path(database_url) -> Optional[str]:
+    """`<db file>-version` beside a SQLite file (like its -wal / -shm), else None"""
+    if fcntl is None or database_url.get_backend_name() != "sqlite":
+        return None
+    if database_url.database in (None, "", ":memory:"):
+        return None
+    return os.path.abspath(database_url.database) + "-version"
+
+
+class _Failed(NamedTuple):
+    """An entry whose handler raised, kept for the process that appended it"""
+    error: Exception
+
+
+class StateLog:
+    """
+    Every mutation of the per-process stores is appended to the
+    state_changes table and then applied by replaying the log in id
+    order, in this process and in every other worker. Handlers are
+    deterministic given the log, so ids, indexes and aggregates come out
+    identical everywhere and a worker never reads its own write out of
+    order with someone else's.
+
+    Replay only takes this process's lock; reads of the stores take none.
+    With a ChangeCounter, a worker with nothing to catch up on pays one
+    shared-memory read per sync(); without one (no shared filesystem,
+    e.g. Postgres across hosts) it polls at most every `poll_interval`.
+
+    Ids are contiguous on SQLite (one writer at a time). On databases
+    where a later id can commit first, replay stops at a hole and skips
+    it only after `gap_timeout`, when it must be a rolled-back insert.
+
+    Entries should be small references (e.g. trade id ranges), resolved
+    by `prepare`, which may do I/O: if it raises, nothing was applied and
+    the entry is retried on the next sync. `apply` must only touch memory
+    and runs at most once per entry: the position moves past an entry
+    before it is applied, so a handler that raises partway is counted in
+    `errors` (and re-raised to the appending caller) instead of being
+    applied twice or blocking every later entry.
+
+    Given `dump` and `load`, checkpoint() stores the replayed state with
+    its position in state_checkpoints, and a starting worker restore()s
+    the newest one whose `schema` matches instead of replaying from the
+    first entry. Bump the schema whenever the dumped stores change shape.
+    """
+
+    def __init__(self, engine, apply: Apply, counter: Optional[ChangeCounter] = None,
+                 poll_interval: float = 0.5, gap_timeout: float = 5.0, batch: int = 1000,
+                 prepare: Optional[Prepare] = None, dump: Optional[Dump] = None,
+                 load: Optional[Load] = None, schema: str = "1"):
+        self.engine = engine
+        self.apply = apply
+        self.prepare = prepare
+        self.dump = dump
+        self.load = load
+        self.schema = schema
+        self.counter = counter
+        self.poll_interval = poll_interval
+        self.gap_timeout = gap_timeout
+        self.batch = batch
+        self.origin = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._position = 0
+        self._seen = None  # counter value (or poll time) at the last sync
+        self._gap_since: Optional[float] = None
+        self._results = {}
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def position(self) -> int:
+        """Id of the last applied entry"""
+        return self._position
+
+    def stale(self) -> bool:
+        if self.counter is not None:
+            return self.counter.read() != self._seen
+        return self._seen is None or time.monotonic() - self._seen >= self.poll_interval
+
+    def append(self, kind: str, payload: dict):
+        """Log a mutation, apply everything up to it and return its apply() result"""
+        row = {"kind": kind, "payload": json_bytes(payload).decode(), "origin": self.origin}
+        with self.engine.begin() as conn:
+            entry_id = conn.execute(insert(StateChange).values(**row)).inserted_primary_key[0]
+        if self.counter is not None:
+            self.counter.bump()
+        while True:
+            self.sync(force=True)
+            if self._position >= entry_id:
+                result = self._results.pop(entry_id, None)
+                if isinstance(result, _Failed):
+                    raise result.error
+                return result
+            time.sleep(0.005)
+
+    def sync(self, force: bool = False) -> int:
+        """Replay entries this process hasn't applied yet; returns how many"""
+        if not force and not self.stale():
+            return 0
+        applied = 0
+        with self._lock:
+            while True:
+                seen = self.counter.read() if self.counter is not None else time.monotonic()
+                query = (
+                    select(StateChange.id, StateChange.kind, StateChange.payload, StateChange.origin)
+                    .where(StateChange.id > self._position)
+                    .order_by(StateChange.id)
+                    .limit(self.batch)
+                )
+                with self.engine.connect() as conn:
+                    entries = conn.execute(query).all()
+                for entry in entries:
+                    if entry.id != self._position + 1 and not self._gap_expired():
+                        break
+                    self._gap_since = None
+                    local = entry.origin == self.origin
+                    payload = orjson.loads(entry.payload)
+                    if self.prepare is not None:
+                        payload = self.prepare(entry.kind, payload)
+                    self._position = entry.id
+                    try:
+                        result = self.apply(entry.kind, payload, local)
+                    except Exception as exc:
+                        self.errors += 1
+                        self.last_error = f"{entry.kind} #{entry.id}: {exc!r}"
+                        result = _Failed(exc)
+                    if local:
+                        self._results[entry.id] = result
+                    applied += 1
+                else:
+                    self._seen = seen
+                    if len(entries) == self.batch:
+                        continue
+                return applied
+
+    def restore(self) -> int:
+        """
+        Start from the newest matching checkpoint (call before the first
+        sync, on stores in their initial state); returns its position
+        """
+        if self.load is None:
+            return self._position
+        query = (
+            select(StateCheckpoint.position, StateCheckpoint.data)
+            .where(StateCheckpoint.schema == self.schema, StateCheckpoint.position > self._position)
+            .order_by(StateCheckpoint.position.desc())
+            .limit(1)
+        )
+        with self.engine.connect() as conn:
+            row = conn.execute(query).first()
+        if row is None:
+            return self._position
+        with self._lock:
+            self.load(pickle.loads(row.data))
+            self._position = row.position
+        return self._position
+
+    def checkpoint(self, min_entries: int = 1) -> Optional[int]:
+        """
+        Store the replayed state if it is at least `min_entries` past the
+        newest checkpoint; returns the position stored, or None. Replay
+        waits while the stores are pickled.
+        """
+        if self.dump is None:
+            return None
+        with self.engine.connect() as conn:
+            latest = conn.execute(
+                select(func.max(StateCheckpoint.position)).where(StateCheckpoint.schema == self.schema)
+            ).scalar() or 0
+        with self._lock:
+            position = self._position
+            if position - latest < min_entries:
+                return None
+            try:
+                data = dump_state(self.dump())
+            except RuntimeError:
+                # A store changed size mid-dump outside the log (e.g. a
+                # periodic refresh); the next checkpoint will catch it
+                return None
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(insert(StateCheckpoint).values(position=position, schema=self.schema, data=data))
+                conn.execute(delete(StateCheckpoint).where(StateCheckpoint.position < position))
+        except IntegrityError:
+            return None  # another worker stored this position first
+        return position
+
+    def _gap_expired(self) -> bool:
+        now = time.monotonic()
+        if self._gap_since is None:
+            self._gap_since = now
+        return now - self._gap_since >= self.gap_timeout
+
+
+class StateSyncMiddleware:
+    """Pure ASGI middleware: catch up on other workers' writes before serving `prefix`"""
+
+    def __init__(self, app, log: StateLog, prefix: str = "/api/"):
+        self.app = app
+        self.log = log
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket") and scope["path"].startswith(self.prefix) \
+                and self.log.stale():
+            await run_in_threadpool(self.log.sync)
+        await self.app(scope, receive, send)
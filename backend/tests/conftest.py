@@ -0,0 +1,43 @@
+"""
+Test setup: the backend's flat modules on sys.path and main.py pointed at
+a throwaway SQLite database, before anything imports it
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ["RATE_LIMIT_ENABLED"] = "0"
+os.environ["CACHE_TTL_SECONDS"] = "0"
+os.environ["STATE_CHECKPOINT_SECONDS"] = "0"
+os.environ.pop("ANONYMOUS_USER_ID", None)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def _signup(client, name: str) -> dict:
+    email = f"{name}@example.com"
+    client.post("/api/auth/signup", json={"name": name, "email": email, "password": "secret"})
+    login = client.post("/api/auth/login", json={"email": email, "password": "secret"}).json()
+    return {"id": login["user"]["id"], "key": login["access_token"],
+            "headers": {"X-API-Key": login["access_token"]}}
+
+
+@pytest.fixture(scope="session")
+def users(client):
+    """Two signed-up users: {"ann": {"id", "key", "headers"}, "bob": ...}"""
+    return {name: _signup(client, name) for name in ("ann", "bob")}
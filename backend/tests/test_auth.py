@@ -0,0 +1,90 @@
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+import main
+
+ANN_ADDRESS = "0x" + "a1" * 20
+BOB_ADDRESS = "0x" + "b2" * 20
+
+
+@pytest.fixture(scope="module")
+def wallets(client, users):
+    """One wallet each for ann and bob"""
+    return {
+        name: client.post("/api/wallets", json={"address": address, "name": f"{name}'s"},
+                          headers=users[name]["headers"]).json()
+        for name, address in (("ann", ANN_ADDRESS), ("bob", BOB_ADDRESS))
+    }
+
+
+@pytest.mark.parametrize("method, path", [
+    ("GET", "/api/wallets"),
+    ("POST", "/api/wallets"),
+    ("GET", "/api/wallets/1"),
+    ("GET", "/api/transactions"),
+    ("GET", "/api/transactions/1"),
+    ("GET", "/api/backtest/1"),
+    ("POST", "/api/backtest/1"),
+    ("GET", "/api/alerts"),
+    ("GET", "/api/stats/dashboard"),
+    ("GET", "/api/users/me"),
+])
+def test_keyless_requests_are_refused(client, method, path):
+    response = client.request(method, path, json={"address": ANN_ADDRESS} if method == "POST" else None)
+    assert response.status_code == 401
+
+
+def test_invalid_key_is_refused(client):
+    assert client.get("/api/wallets", headers={"X-API-Key": "0" * 64}).status_code == 401
+
+
+def test_anonymous_access_is_opt_in(client, monkeypatch):
+    monkeypatch.setattr(main, "ANONYMOUS_USER_ID", main.DEMO_USER_ID)
+    demo = client.get("/api/wallets")
+    assert demo.status_code == 200
+    assert {wallet["user_id"] for wallet in demo.json()} == {main.DEMO_USER_ID}
+
+
+def test_own_wallets_only(client, users, wallets):
+    ann, bob = users["ann"], users["bob"]
+    assert [w["id"] for w in client.get("/api/wallets", headers=ann["headers"]).json()] == [wallets["ann"]["id"]]
+    assert client.get(f"/api/wallets/{wallets['ann']['id']}", headers=ann["headers"]).status_code == 200
+    for path in (f"/api/wallets/{wallets['bob']['id']}", f"/api/wallets/{wallets['bob']['id']}/trades",
+                 f"/api/transactions/{wallets['bob']['id']}", f"/api/transactions?wallet_id={wallets['bob']['id']}",
+                 f"/api/backtest/{wallets['bob']['id']}"):
+        assert client.get(path, headers=ann["headers"]).status_code == 404, path
+    assert client.post(f"/api/backtest/{wallets['bob']['id']}", headers=ann["headers"]).status_code == 404
+    assert client.delete(f"/api/wallets/{wallets['bob']['id']}", headers=ann["headers"]).status_code == 404
+    assert client.get(f"/api/wallets/{wallets['bob']['id']}", headers=bob["headers"]).status_code == 200
+
+
+def test_acting_for_another_user_is_forbidden(client, users):
+    ann, bob = users["ann"], users["bob"]
+    assert client.get(f"/api/wallets?user_id={bob['id']}", headers=ann["headers"]).status_code == 403
+    assert client.get(f"/api/stats/dashboard?user_id={bob['id']}", headers=ann["headers"]).status_code == 403
+    assert client.get(f"/api/transactions/stream?user_id={bob['id']}", headers=ann["headers"]).status_code == 403
+    assert client.get(f"/api/wallets?user_id={ann['id']}", headers=ann["headers"]).status_code == 200
+
+
+def test_transactions_list_only_own_wallets(client, users, wallets):
+    own = {wallets["ann"]["id"]}
+    rows = client.get("/api/transactions?limit=500", headers=users["ann"]["headers"]).json()
+    assert {row["wallet_id"] for row in rows} <= own
+
+
+def close_code(client, path: str, headers=None) -> int:
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect(path, headers=headers or {}):
+            pass
+    return closed.value.code
+
+
+def test_websocket_is_authenticated(client, users, wallets):
+    ann = users["ann"]
+    bob_wallet = wallets["bob"]["id"]
+    assert close_code(client, f"/ws/transactions?wallet_id={wallets['ann']['id']}") == 1008
+    assert close_code(client, f"/ws/transactions?wallet_id={wallets['ann']['id']}&api_key={'0' * 64}") == 1008
+    assert close_code(client, f"/ws/transactions?wallet_id={bob_wallet}", ann["headers"]) == 1008
+    assert close_code(client, f"/ws/transactions?user_id={users['bob']['id']}", ann["headers"]) == 1008
+    with client.websocket_connect(f"/ws/transactions?wallet_id={wallets['ann']['id']}&api_key={ann['key']}"):
+        pass
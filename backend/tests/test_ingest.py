@@ -0,0 +1,58 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from ingest import MAX_INSERT_ROWS, TRADE_FIELDS, insert_trades
+from init_db import Base, Trade
+
+START = datetime(2024, 1, 1)
+
+
+def trade_row(n: int) -> dict:
+    return {**{field: None for field in TRADE_FIELDS},
+            "wallet_address": "0x" + "c3" * 20, "tx_hash": f"0x{n:064x}",
+            "timestamp": START + timedelta(seconds=n)}
+
+
+def ndjson(trades) -> bytes:
+    return b"".join(json.dumps(trade).encode() + b"\n" for trade in trades)
+
+
+def test_insert_trades_skips_existing_hashes_across_chunks():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        assert len(insert_trades(connection, [trade_row(n) for n in range(4000)])) == 4000
+    rows = [trade_row(n) for n in range(7000)]
+    assert len(rows) > 2 * MAX_INSERT_ROWS
+    with engine.begin() as connection:
+        inserted = insert_trades(connection, rows)
+    assert set(inserted) == {f"0x{n:064x}" for n in range(4000, 7000)}
+    with engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(Trade)).scalar() == 7000
+
+
+def test_ingest_counts_duplicates_and_invalid_lines(client, users):
+    headers = users["ann"]["headers"]
+    trades = [{"wallet_address": "0x" + "d4" * 20, "tx_hash": f"0x{'d4' * 30}{n:04x}",
+               "action": "buy", "amount": 1, "price": 2, "timestamp": 1_700_000_000 + n}
+              for n in range(10)]
+    body = ndjson(trades + trades[:3]) + b"not json\n" + ndjson([{"tx_hash": "0x1"}, {**trades[0], "action": "hold"}])
+    report = client.post("/api/trades/ingest?batch_size=4", content=body, headers=headers).json()
+    assert (report["received"], report["accepted"], report["rejected"]) == (16, 10, 6)
+    assert [b["received"] for b in report["batches"]] == [4, 4, 4, 4]
+    assert sum(b["duplicates"] for b in report["batches"]) == 3
+    assert sum(b["invalid"] for b in report["batches"]) == 3
+
+    again = client.post("/api/trades/ingest", content=ndjson(trades), headers=headers).json()
+    assert (again["accepted"], again["batches"][0]["duplicates"]) == (0, 10)
+
+
+@pytest.mark.parametrize("batch_size", [0, 5001])
+def test_ingest_batch_size_is_bounded(client, users, batch_size):
+    response = client.post(f"/api/trades/ingest?batch_size={batch_size}", content=b"",
+                           headers=users["ann"]["headers"])
+    assert response.status_code == 422
+
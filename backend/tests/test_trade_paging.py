@@ -0,0 +1,65 @@
+from collections import Counter
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from datagen import load_dataset
+from init_db import Base, Trade
+from transaction_store import encode_cursor, query_trades_page
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('paging')}/trades.db")
+    Base.metadata.create_all(engine)
+    # Two days of trades for 20 wallets: many share a timestamp to the second
+    load_dataset(engine, 20, 20_000, batch_size=5_000, days=2)
+    yield engine
+    engine.dispose()
+
+
+def busiest_wallet(session) -> str:
+    return session.scalar(
+        select(Trade.wallet_address).group_by(Trade.wallet_address).order_by(func.count().desc()).limit(1)
+    )
+
+
+def test_generated_timestamps_have_microseconds(engine):
+    with engine.connect() as conn:
+        stored = conn.exec_driver_sql("SELECT timestamp FROM trades LIMIT 1").scalar()
+    assert len(stored) == len("2024-01-01 00:00:00.000000")
+
+
+def test_paging_back_returns_every_trade_once(engine):
+    with Session(engine) as session:
+        address = busiest_wallet(session)
+        expected = session.scalars(
+            select(Trade.id).where(Trade.wallet_address == address).order_by(Trade.timestamp.desc(), Trade.id.desc())
+        ).all()
+        ids, cursor = [], None
+        while True:
+            trades, next_cursor, _ = query_trades_page(session, address, 50, before=cursor)
+            if not trades:
+                break
+            ids.extend(trade.id for trade in trades)
+            cursor = next_cursor
+    assert not [i for i, n in Counter(ids).items() if n > 1]
+    assert ids == expected
+
+
+def test_paging_forward_returns_every_trade_once(engine):
+    with Session(engine) as session:
+        address = busiest_wallet(session)
+        expected = session.scalars(
+            select(Trade.id).where(Trade.wallet_address == address).order_by(Trade.timestamp, Trade.id)
+        ).all()
+        oldest = session.get(Trade, expected[0])
+        ids, cursor = [oldest.id], encode_cursor((oldest.timestamp, oldest.id))
+        while True:
+            trades, _, prev_cursor = query_trades_page(session, address, 50, after=cursor)
+            if not trades:
+                break
+            ids.extend(trade.id for trade in reversed(trades))
+            cursor = prev_cursor
+    assert ids == expected
@@ -0,0 +1,72 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from transaction_store import TransactionStore, decode_cursor, encode_cursor
+
+
+def raw_cursor(timestamp: str, tx_id) -> str:
+    return base64.urlsafe_b64encode(json.dumps([timestamp, tx_id]).encode()).decode()
+
+
+def test_cursor_round_trip():
+    key = (datetime(2024, 3, 1, 12, 30, 15, 250000), 42)
+    assert decode_cursor(encode_cursor(key)) == key
+
+
+def test_cursor_with_offset_is_naive_utc():
+    assert decode_cursor(raw_cursor("2024-03-01T14:30:00+02:00", 7)) == (datetime(2024, 3, 1, 12, 30), 7)
+    assert decode_cursor(raw_cursor("2024-03-01T12:30:00Z", 7)) == (datetime(2024, 3, 1, 12, 30), 7)
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", raw_cursor("yesterday", 1), raw_cursor("2024-01-01", "x"),
+                                    base64.urlsafe_b64encode(b"[1]").decode()])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.fixture
+def store():
+    rng = np.random.default_rng(7)
+    start = datetime(2024, 1, 1)
+    # Few distinct timestamps, so pages often split a run of equal ones
+    return TransactionStore({
+        "id": i + 1,
+        "wallet_id": int(rng.integers(1, 6)),
+        "timestamp": start + timedelta(seconds=int(rng.integers(0, 40))),
+    } for i in range(500))
+
+
+def page_through(store, wallet_ids, limit):
+    ids, cursor = [], None
+    while True:
+        rows, next_cursor, prev_cursor = store.page(wallet_ids, limit, before=cursor)
+        if not rows:
+            return ids
+        ids.extend(row["id"] for row in rows)
+        cursor = next_cursor
+
+
+@pytest.mark.parametrize("wallet_ids", [None, [3], [1, 4, 5]])
+def test_pages_cover_every_transaction_once(store, wallet_ids):
+    wanted = [tx for tx in store._by_id.values() if wallet_ids is None or tx["wallet_id"] in wallet_ids]
+    expected = [tx["id"] for tx in sorted(wanted, key=lambda tx: (tx["timestamp"], tx["id"]), reverse=True)]
+    assert page_through(store, wallet_ids, 13) == expected
+
+
+def test_after_returns_the_newer_page(store):
+    first, next_cursor, _ = store.page([1, 2], 10)
+    second, _, prev_cursor = store.page([1, 2], 10, before=next_cursor)
+    assert store.page([1, 2], 10, after=prev_cursor)[0] == first
+    assert second and not {row["id"] for row in first} & {row["id"] for row in second}
+
+
+def test_offset_cursor_pages_like_its_utc_equivalent(store):
+    rows, next_cursor, _ = store.page(None, 20)
+    timestamp, tx_id = decode_cursor(next_cursor)
+    shifted = raw_cursor((timestamp + timedelta(hours=5)).isoformat() + "+05:00", tx_id)
+    assert store.page(None, 20, before=shifted) == store.page(None, 20, before=next_cursor)
@@ -0,0 +1,183 @@
+"""
+Smart Money Tracker - Transaction Store
+Per-wallet, time-ordered transaction feed with keyset pagination
+"""
+
+import base64
+import json
+import threading
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+from sqlalchemy import and_, or_, select
+
+from init_db import Trade
+
+Key = Tuple[datetime, int]
+
+
+def encode_cursor(key: Key) -> str:
+    timestamp, tx_id = key
+    return base64.urlsafe_b64encode(json.dumps([timestamp.isoformat(), tx_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Key:
+    """
+    Inverse of encode_cursor. Keys are naive UTC, so an offset-carrying
+    (hand-made) cursor is converted rather than compared against them.
+    """
+    try:
+        timestamp, tx_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        timestamp = datetime.fromisoformat(timestamp)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        return timestamp, int(tx_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def _page(index: SortedList, limit: int, before: Optional[Key], after: Optional[Key]) -> List[Key]:
+    """Newest-first keys strictly older than `before` or newer than `after`"""
+    if after is not None:
+        # The `limit` keys immediately newer than the cursor, returned newest first
+        start = index.bisect_right(after)
+        return list(index.islice(start, min(start + limit, len(index)), reverse=True))
+    stop = index.bisect_left(before) if before is not None else len(index)
+    return list(islice(index.islice(0, stop, reverse=True), limit))
+
+
+class TransactionStore:
+    """
+    Transactions kept in SortedLists of (timestamp, id) keys, one per
+    wallet plus a global one, so each page is an O(log n + limit) seek
+    instead of a filter over every transaction.
+    """
+
+    def __init__(self, transactions: Iterable[dict] = ()):
+        self._lock = threading.Lock()
+        self._by_id: Dict[int, dict] = {}
+        self._all = SortedList()
+        self._by_wallet: Dict[int, SortedList] = {}
+        self._next_id = 1
+        for tx in transactions:
+            self.add(tx)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def allocate_id(self) -> int:
+        with self._lock:
+            tx_id = self._next_id
+            self._next_id += 1
+            return tx_id
+
+    def add(self, tx: dict):
+        key = (tx["timestamp"], tx["id"])
+        with self._lock:
+            self._next_id = max(self._next_id, tx["id"] + 1)
+            self._by_id[tx["id"]] = tx
+            self._all.add(key)
+            self._by_wallet.setdefault(tx["wallet_id"], SortedList()).add(key)
+
+    def remove_wallet(self, wallet_id: int):
+        """Drop every transaction of a wallet"""
+        with self._lock:
+            keys = self._by_wallet.pop(wallet_id, ())
+            for key in keys:
+                self._all.remove(key)
+                del self._by_id[key[1]]
+
+    def page(
+        self,
+        wallet_ids: Optional[Iterable[int]] = None,
+        limit: int = 20,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str], Optional[str]]:
+        """
+        Return newest-first transactions of the given wallets (all of them
+        when None) plus (next, prev) cursors: pass `next` as `before` to
+        scroll back in time, `prev` as `after` to fetch newer transactions.
+        Several wallets are paged one by one and merged, so a page costs
+        O(wallets * (log n + limit)).
+        """
+        before_key = decode_cursor(before) if before else None
+        after_key = decode_cursor(after) if after else None
+        with self._lock:
+            if wallet_ids is None:
+                keys = _page(self._all, limit, before_key, after_key)
+            else:
+                keys = sorted((
+                    key
+                    for wallet_id in set(wallet_ids) if wallet_id in self._by_wallet
+                    for key in _page(self._by_wallet[wallet_id], limit, before_key, after_key)
+                ), reverse=True)
+                # `after` pages keep the keys closest to the cursor, i.e. the oldest
+                keys = keys[-limit:] if after_key is not None else keys[:limit]
+            rows = [self._by_id[tx_id] for _, tx_id in keys]
+        if not keys:
+            return rows, None, None
+        return rows, encode_cursor(keys[-1]), encode_cursor(keys[0])
+
+
+def _trades_page_query(wallet_address: str, limit: int, before: Optional[str], after: Optional[str]):
+    query = select(Trade).where(Trade.wallet_address == wallet_address)
+    if after:
+        timestamp, trade_id = decode_cursor(after)
+        query = query.where(or_(
+            Trade.timestamp > timestamp,
+            and_(Trade.timestamp == timestamp, Trade.id > trade_id),
+        )).order_by(Trade.timestamp, Trade.id)
+    else:
+        if before:
+            timestamp, trade_id = decode_cursor(before)
+            query = query.where(or_(
+                Trade.timestamp < timestamp,
+                and_(Trade.timestamp == timestamp, Trade.id < trade_id),
+            ))
+        query = query.order_by(Trade.timestamp.desc(), Trade.id.desc())
+    return query.limit(limit)
+
+
+def _trades_page_result(trades, after: Optional[str]):
+    trades = list(trades)
+    if after:
+        trades.reverse()
+    if not trades:
+        return trades, None, None
+    first, last = trades[0], trades[-1]
+    return (
+        trades,
+        encode_cursor((last.timestamp, last.id)),
+        encode_cursor((first.timestamp, first.id)),
+    )
+
+
+def query_trades_page(
+    session,
+    wallet_address: str,
+    limit: int = 50,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+):
+    """
+    Keyset page of Trade rows for one wallet, newest first, with (next,
+    prev) cursors. The (wallet_address, timestamp, id) predicate is
+    served by the ix_trades_wallet_address_timestamp composite index.
+    """
+    query = _trades_page_query(wallet_address, limit, before, after)
+    return _trades_page_result(session.execute(query).scalars(), after)
+
+
+async def query_trades_page_async(
+    session,
+    wallet_address: str,
+    limit: int = 50,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+):
+    """query_trades_page on an AsyncSession"""
+    query = _trades_page_query(wallet_address, limit, before, after)
+    return _trades_page_result((await session.execute(query)).scalars(), after)
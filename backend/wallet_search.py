@@ -0,0 +1,208 @@
+"""
+Smart Money Tracker - Wallet Search
+In-memory typeahead index over wallet address prefix, label words and tags
+"""
+
+import re
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+MAX_SEARCH_RESULTS = 100
+ADDRESS_QUERY = re.compile(r"0x[0-9a-f]*")
+LABEL_WORD = re.compile(r"\w+")
+
+IdSet = Dict[int, None]
+
+
+def label_words(label: Optional[str]) -> List[str]:
+    """Lowercased words of a label, without duplicates"""
+    return list(dict.fromkeys(LABEL_WORD.findall((label or "").lower())))
+
+
+def normalize_tag(tag: str) -> str:
+    return tag.strip().lower()
+
+
+class PrefixKeys:
+    """
+    Sorted keys for prefix range scans.
+
+    New keys are buffered and merged on the next scan: a handful are
+    insorted, larger batches (bulk loads, log replay) are appended and
+    re-sorted once, which timsort does as a single merge of two runs.
+    """
+
+    INSORT_LIMIT = 64
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._pending: List[str] = []
+
+    def add(self, key: str):
+        self._pending.append(key)
+
+    def discard(self, key: str):
+        self._sync()
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+
+    def _sync(self):
+        if not self._pending:
+            return
+        if len(self._pending) <= self.INSORT_LIMIT:
+            for key in self._pending:
+                insort(self._keys, key)
+        else:
+            self._keys.extend(self._pending)
+            self._keys.sort()
+        self._pending.clear()
+
+    def count(self, prefix: str) -> int:
+        """Number of keys starting with `prefix`, by two bisections"""
+        self._sync()
+        return bisect_left(self._keys, prefix + "\U0010ffff") - bisect_left(self._keys, prefix)
+
+    def scan(self, prefix: str) -> Iterator[str]:
+        """Keys starting with `prefix`, in order; call under the owner's lock"""
+        self._sync()
+        keys = self._keys
+        for i in range(bisect_left(keys, prefix), len(keys)):
+            if not keys[i].startswith(prefix):
+                return
+            yield keys[i]
+
+
+class Constraint:
+    """
+    One search condition: its estimated match count, a way to enumerate
+    the matching ids and a membership test. The smallest constraint
+    drives the search and the others filter it.
+    """
+
+    def __init__(self, size: int, ids: Callable[[], Iterable[int]], matches: Callable[[int], bool]):
+        self.size = size
+        self.ids = ids
+        self.matches = matches
+
+
+class WalletSearchIndex:
+    """
+    Address, label and tag indexes over a WalletStore's wallets.
+
+    Addresses use the store's case-insensitive address index plus a
+    sorted key list for prefix scans. Label words map to wallet ids and
+    are themselves prefix-scanned, so the last word of a typeahead query
+    can be partial. Tags are an inverted index (tag -> ids); multi-tag
+    queries are set intersections (match all) or unions (match any).
+    Callers hold the store's lock for every method.
+    """
+
+    def __init__(self, by_id: Dict[int, dict], by_address: Dict[str, IdSet], by_user: Dict[int, IdSet]):
+        self._by_id = by_id
+        self._by_address = by_address
+        self._by_user = by_user
+        self._addresses = PrefixKeys()
+        self._by_word: Dict[str, IdSet] = {}
+        self._words = PrefixKeys()
+        self._by_tag: Dict[str, IdSet] = {}
+
+    def add(self, wallet: dict):
+        """Index a wallet the store has just added"""
+        wallet_id = wallet["id"]
+        address = wallet["address"].lower()
+        if len(self._by_address[address]) == 1:
+            self._addresses.add(address)
+        for word in label_words(wallet.get("name")):
+            ids = self._by_word.get(word)
+            if ids is None:
+                ids = self._by_word[word] = {}
+                self._words.add(word)
+            ids[wallet_id] = None
+        for tag in wallet.get("tags") or ():
+            self._by_tag.setdefault(normalize_tag(tag), {})[wallet_id] = None
+
+    def remove(self, wallet: dict):
+        """Unindex a wallet the store has just removed"""
+        wallet_id = wallet["id"]
+        address = wallet["address"].lower()
+        if address not in self._by_address:
+            self._addresses.discard(address)
+        for word in label_words(wallet.get("name")):
+            ids = self._by_word[word]
+            del ids[wallet_id]
+            if not ids:
+                del self._by_word[word]
+                self._words.discard(word)
+        for tag in set(map(normalize_tag, wallet.get("tags") or ())):
+            ids = self._by_tag[tag]
+            del ids[wallet_id]
+            if not ids:
+                del self._by_tag[tag]
+
+    def _address_constraint(self, prefix: str) -> Constraint:
+        def ids():
+            for address in self._addresses.scan(prefix):
+                yield from self._by_address[address]
+
+        return Constraint(
+            self._addresses.count(prefix), ids,
+            lambda i: self._by_id[i]["address"].lower().startswith(prefix)
+        )
+
+    def _word_constraint(self, prefix: str) -> Constraint:
+        def ids():
+            for word in self._words.scan(prefix):
+                yield from self._by_word[word]
+
+        def matches(i):
+            return any(word.startswith(prefix) for word in label_words(self._by_id[i].get("name")))
+
+        size = sum(len(self._by_word[word]) for word in self._words.scan(prefix))
+        return Constraint(size, ids, matches)
+
+    def _tags_constraints(self, tags: List[str], match_all: bool) -> List[Constraint]:
+        sets = [self._by_tag.get(tag, {}) for tag in dict.fromkeys(map(normalize_tag, tags)) if tag]
+        if match_all:
+            return [Constraint(len(ids), lambda ids=ids: ids, ids.__contains__) for ids in sets]
+        return [Constraint(
+            sum(map(len, sets)),
+            lambda: (i for ids in sets for i in ids),
+            lambda i: any(i in ids for ids in sets)
+        )]
+
+    def search(self, query: str = "", tags: Iterable[str] = (), match_all: bool = True,
+               user_id: Optional[int] = None, limit: int = 20) -> List[dict]:
+        """
+        Wallets matching every condition given, up to `limit`.
+
+        A query starting with "0x" is an address prefix; otherwise each of
+        its words must start a word of the wallet's label. Results come in
+        the order of the most selective index (address order for address
+        prefixes, word then creation order for labels, creation order for
+        tags and users).
+        """
+        constraints: List[Constraint] = []
+        query = query.strip().lower()
+        if ADDRESS_QUERY.fullmatch(query):
+            constraints.append(self._address_constraint(query))
+        else:
+            constraints.extend(self._word_constraint(word) for word in label_words(query))
+        tags = list(tags)
+        if tags:
+            constraints.extend(self._tags_constraints(tags, match_all))
+        if user_id is not None:
+            ids = self._by_user.get(user_id, {})
+            constraints.append(Constraint(len(ids), lambda: ids, ids.__contains__))
+        if not constraints:
+            return []
+
+        constraints.sort(key=lambda c: c.size)
+        driver, filters = constraints[0], constraints[1:]
+        seen: IdSet = {}
+        for wallet_id in driver.ids():
+            if wallet_id not in seen and all(f.matches(wallet_id) for f in filters):
+                seen[wallet_id] = None
+                if len(seen) >= limit:
+                    break
+        return [self._by_id[i] for i in seen]
@@ -0,0 +1,97 @@
+"""
+Smart Money Tracker - Wallet Store
+In-memory wallet repository with hash indexes by id, address and user,
+plus the search index over address prefix, label and tags
+"""
+
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from wallet_search import WalletSearchIndex
+
+
+class WalletStore:
+    """
+    Wallet dicts indexed by id, address (case-insensitive) and user_id.
+
+    Per-user and per-address indexes are insertion-ordered dicts used as
+    sets, so insert, delete and lookups are all O(1) and listings keep
+    creation order. IDs are never reused after a delete.
+    """
+
+    def __init__(self, wallets: Iterable[dict] = ()):
+        self._lock = threading.Lock()
+        self._by_id: Dict[int, dict] = {}
+        self._by_address: Dict[str, Dict[int, None]] = {}
+        self._by_user: Dict[int, Dict[int, None]] = {}
+        self._next_id = 1
+        self._search = WalletSearchIndex(self._by_id, self._by_address, self._by_user)
+        for wallet in wallets:
+            self.add(wallet)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[dict]:
+        with self._lock:
+            return iter(list(self._by_id.values()))
+
+    def allocate_id(self) -> int:
+        with self._lock:
+            wallet_id = self._next_id
+            self._next_id += 1
+            return wallet_id
+
+    def add(self, wallet: dict) -> dict:
+        """Index a wallet; assigns an id when the dict has none"""
+        with self._lock:
+            if wallet.get("id") is None:
+                wallet["id"] = self._next_id
+            wallet_id = wallet["id"]
+            if wallet_id in self._by_id:
+                raise ValueError(f"Wallet {wallet_id} already exists")
+            self._next_id = max(self._next_id, wallet_id + 1)
+
+            self._by_id[wallet_id] = wallet
+            self._by_address.setdefault(wallet["address"].lower(), {})[wallet_id] = None
+            self._by_user.setdefault(wallet["user_id"], {})[wallet_id] = None
+            self._search.add(wallet)
+        return wallet
+
+    def get(self, wallet_id: int) -> Optional[dict]:
+        return self._by_id.get(wallet_id)
+
+    def get_by_address(self, address: str) -> List[dict]:
+        with self._lock:
+            ids = self._by_address.get(address.lower(), {})
+            return [self._by_id[i] for i in ids]
+
+    def list_by_user(self, user_id: int) -> List[dict]:
+        with self._lock:
+            ids = self._by_user.get(user_id, {})
+            return [self._by_id[i] for i in ids]
+
+    def count_by_user(self, user_id: int) -> int:
+        return len(self._by_user.get(user_id, {}))
+
+    def remove(self, wallet_id: int) -> Optional[dict]:
+        with self._lock:
+            wallet = self._by_id.pop(wallet_id, None)
+            if wallet is None:
+                return None
+            for index, key in (
+                (self._by_address, wallet["address"].lower()),
+                (self._by_user, wallet["user_id"]),
+            ):
+                ids = index[key]
+                del ids[wallet_id]
+                if not ids:
+                    del index[key]
+            self._search.remove(wallet)
+        return wallet
+
+    def search(self, query: str = "", tags: Iterable[str] = (), match_all: bool = True,
+               user_id: Optional[int] = None, limit: int = 20) -> List[dict]:
+        """Typeahead lookup; see WalletSearchIndex.search"""
+        with self._lock:
+            return self._search.search(query, tags, match_all, user_id, limit)